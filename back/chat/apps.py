@@ -7,9 +7,9 @@ class ChatConfig(AppConfig):
     name = 'chat'
     
     def ready(self):
-        """Load models on app startup"""
+        """Preload the models listed in ML_MODELS_PRELOAD; others load on first use"""
         try:
-            ModelManager()
+            ModelManager().preload()
         except Exception as e:
             print(f"Warning: Could not load ML models on startup: {e}")
 
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 
 from core.enums.enums import ModelUsedEnum
@@ -7,39 +8,131 @@ class ChatRequestSerializer(serializers.Serializer):
     text = serializers.CharField(required=True)
     title = serializers.CharField(required=False, allow_blank=True)
     provider = serializers.ChoiceField(
-        choices=[(tag.value, tag.name) for tag in ModelUsedEnum],
+        choices=[(tag.value, tag.name) for tag in ModelUsedEnum] + [("auto", "AUTO")],
         default=ModelUsedEnum.GEMINI.value,
-        required=False
+        required=False,
+        help_text="'auto' routes to the fastest healthy provider, hedging slow requests"
+    )
+    client_message_id = serializers.CharField(
+        required=False,
+        max_length=64,
+        help_text="Idempotency key: retries with the same key return the stored answer"
+    )
+    decoding_profile = serializers.ChoiceField(
+        choices=list(settings.GENERATION_PROFILES),
+        required=False,
+        help_text="Decoding profile used to generate the title of a new conversation"
+    )
+    response_mode = serializers.ChoiceField(
+        choices=["full", "compact"],
+        required=False,
+        help_text="compact: conversation header and the two new lines only, instead of the whole conversation"
     )
     
 class GetConversationsReq(serializers.Serializer):
-    pageSize = serializers.IntegerField(required=False, default=20)
-    pageNumber = serializers.IntegerField(required=False, default=1)
+    pageSize = serializers.IntegerField(required=False, default=20, min_value=1, max_value=100)
+    pageNumber = serializers.IntegerField(required=False, default=1, min_value=1)
     search = serializers.CharField(required=False, allow_blank=True)
+    cursor = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        help_text="Keyset pagination: nextCursor of the previous page, empty for the first page"
+    )
+
+    def validate_cursor(self, value):
+        from chat.services.chat_crud import ConversationService
+        if value:
+            try:
+                ConversationService.decode_conversations_cursor(value)
+            except ValueError as e:
+                raise serializers.ValidationError(str(e))
+        return value
+    
+class SearchMessagesReq(serializers.Serializer):
+    q = serializers.CharField(max_length=200, help_text="Search text (websearch syntax: \"phrase\", or, -word)")
+    pageSize = serializers.IntegerField(required=False, default=20, min_value=1, max_value=100)
+    cursor = serializers.CharField(required=False, allow_blank=True, help_text="nextCursor of the previous page")
+
+    def validate_cursor(self, value):
+        from chat.services.search import ConversationSearchService
+        if value:
+            try:
+                ConversationSearchService.decode_search_cursor(value)
+            except ValueError as e:
+                raise serializers.ValidationError(str(e))
+        return value
+
+
+class SearchHitSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    conversation_id = serializers.IntegerField()
+    conversation_title = serializers.CharField()
+    sent_by = serializers.CharField()
+    created_at = serializers.DateTimeField()
+    rank = serializers.FloatField()
+    highlight = serializers.CharField(help_text="HTML-escaped excerpt, matches wrapped in <mark>")
+
+
+class SearchTitleHitSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    similarity = serializers.FloatField()
+
+
+class SearchMessagesSerializer(serializers.Serializer):
+    conversations = SearchTitleHitSerializer(many=True, help_text="Conversations whose title matches (first page only)")
+    items = SearchHitSerializer(many=True)
+    pageSize = serializers.IntegerField()
+    nextCursor = serializers.CharField(allow_null=True)
+
     
 class ConversationLineSerializer(serializers.Serializer):
     id = serializers.IntegerField()
-    text_ar = serializers.CharField()
-    text_en = serializers.CharField()
+    # Original text while the line is not translated yet
+    text_ar = serializers.SerializerMethodField()
+    text_en = serializers.SerializerMethodField()
+    translation_status = serializers.CharField()
     sent_by = serializers.CharField()
     model_used = ModelUsedEnum
-    language_code = serializers.CharField(source='language.language_code', allow_null=True)
+    # FK column holds the language code: no query per line
+    language_code = serializers.CharField(source='language_id', allow_null=True)
     created_at = serializers.DateTimeField()
+
+    def get_text_ar(self, obj) -> str:
+        return obj.get_text('ar')
+
+    def get_text_en(self, obj) -> str:
+        return obj.get_text('en')
     
     
 class ConversationGetSerializer(serializers.Serializer):
     id = serializers.IntegerField()
     title = serializers.CharField()
+    title_status = serializers.CharField()
+    messages_count = serializers.IntegerField()
+    last_message_at = serializers.DateTimeField()
+    last_message_snippet = serializers.CharField()
 class GetConversationsSerializer(serializers.Serializer):
     items = ConversationGetSerializer(many=True)  
     pageSize = serializers.IntegerField()
-    pageNumber = serializers.IntegerField()
-    totalPages = serializers.IntegerField()
+    pageNumber = serializers.IntegerField(allow_null=True)
+    totalPages = serializers.IntegerField(allow_null=True)
+    nextCursor = serializers.CharField(allow_null=True)
+
+class ConversationHeaderSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    title_en = serializers.CharField()
+    title_ar = serializers.CharField()
+    title_status = serializers.CharField()
+    user_id = serializers.IntegerField(allow_null=True)
+    created_at = serializers.DateTimeField()
+
 
 class ConversationSerializer(serializers.Serializer):
     id = serializers.IntegerField()
     title_en = serializers.CharField()
     title_ar = serializers.CharField()
+    title_status = serializers.CharField()
 
     user_id = serializers.IntegerField(source='user.id', allow_null=True)
     user_name = serializers.CharField(source='user.name', allow_null=True)
@@ -28,6 +28,7 @@ class AnalyzeTextRequestSerializer(serializers.Serializer):
         default='en'
     )
 
+from django.conf import settings
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
@@ -58,4 +59,13 @@ class ConversationTitleGenRequestSerializer(serializers.Serializer):
     """Serializer for generating or regenerating conversation title"""
     conversation_id = serializers.IntegerField(
         help_text="ID of the conversation to generate title for"
-    )
\ No newline at end of file
+    )
+
+
+class DecodingProfileReq(serializers.Serializer):
+    """Query parameters of the endpoints that generate titles or summaries"""
+    decoding_profile = serializers.ChoiceField(
+        choices=list(settings.GENERATION_PROFILES),
+        required=False,
+        help_text="Decoding profile (one of GENERATION_PROFILES)"
+    )
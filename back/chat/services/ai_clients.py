@@ -0,0 +1,218 @@
+import hashlib
+import threading
+import time
+from collections import deque
+from django.conf import settings
+from django.utils import timezone
+from decouple import config
+from google import genai
+from openai import OpenAI
+import httpx
+from core.enums.enums import ModelUsedEnum
+
+GEMINI_API_KEY = config("GEMINI_API_KEY")
+OPENROUTER_API_KEY = config("OPENROUTER_API_KEY")
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+
+class ProviderClientRegistry:
+    """
+    One long-lived client per provider endpoint and API key per process, so
+    TLS sessions and keep-alive connections are reused across requests.
+    DeepSeek and GPT both go through OpenRouter and share one client.
+
+    Also tracks per-provider health (successes, failures, latency) and, for
+    the httpx-based OpenRouter client, how many requests reused a pooled
+    connection instead of opening a new one.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._clients = {}
+                    instance._client_stats = {}
+                    instance._provider_stats = {}
+                    instance._windows = {}
+                    instance._lock = threading.Lock()
+                    cls._instance = instance
+        return cls._instance
+
+    def get(self, provider: str):
+        """Return the shared client for ``provider``, creating it on first use."""
+        endpoint, api_key = self._endpoint(provider)
+        key = (endpoint, hashlib.sha256(api_key.encode()).hexdigest()[:12])
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = self._create_client(endpoint, api_key, key)
+                self._client_stats[key]['created_at'] = timezone.now()
+            else:
+                self._client_stats[key]['reused'] += 1
+            return client
+
+    def record_success(self, provider: str, latency: float):
+        with self._lock:
+            stats = self._stats_for(provider)
+            stats['requests'] += 1
+            stats['consecutive_failures'] = 0
+            stats['last_success_at'] = timezone.now()
+            self._window_for(provider).append((latency, True))
+            # Exponentially weighted latency, recent requests count the most
+            stats['latency_ms'] = round(
+                latency * 1000 if stats['latency_ms'] is None
+                else 0.8 * stats['latency_ms'] + 0.2 * latency * 1000, 1
+            )
+
+    def record_failure(self, provider: str, error: Exception):
+        with self._lock:
+            stats = self._stats_for(provider)
+            stats['requests'] += 1
+            stats['failures'] += 1
+            stats['consecutive_failures'] += 1
+            stats['last_error'] = f"{type(error).__name__}: {error}"[:300]
+            stats['last_failure_at'] = timezone.now()
+            self._window_for(provider).append((None, False))
+
+    def is_healthy(self, provider: str) -> bool:
+        with self._lock:
+            return self._stats_for(provider)['consecutive_failures'] < settings.AI_PROVIDER_UNHEALTHY_AFTER
+
+    def window(self, provider: str) -> dict:
+        """Error rate and latency percentiles over the last AI_PROVIDER_STATS_WINDOW calls."""
+        with self._lock:
+            samples = list(self._window_for(provider))
+        latencies = sorted(latency for latency, ok in samples if ok)
+
+        def percentile(q):
+            if not latencies:
+                return None
+            return latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+
+        return {
+            'samples': len(samples),
+            'error_rate': (sum(1 for _, ok in samples if not ok) / len(samples)) if samples else 0.0,
+            'p50': percentile(0.5),
+            'p95': percentile(0.95),
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            providers = {}
+            for provider, value in self._provider_stats.items():
+                providers[provider] = dict(value)
+                providers[provider]['healthy'] = value['consecutive_failures'] < settings.AI_PROVIDER_UNHEALTHY_AFTER
+        for provider in providers:
+            providers[provider]['window'] = self.window(provider)
+        with self._lock:
+            clients = {
+                f"{endpoint}#{key_hash}": dict(value)
+                for (endpoint, key_hash), value in self._client_stats.items()
+            }
+        return {'providers': providers, 'clients': clients}
+
+    def _window_for(self, provider: str) -> deque:
+        provider = ModelUsedEnum(provider).value
+        if provider not in self._windows:
+            self._windows[provider] = deque(maxlen=settings.AI_PROVIDER_STATS_WINDOW)
+        return self._windows[provider]
+
+    def _stats_for(self, provider: str) -> dict:
+        provider = ModelUsedEnum(provider).value
+        if provider not in self._provider_stats:
+            self._provider_stats[provider] = {
+                'requests': 0,
+                'failures': 0,
+                'consecutive_failures': 0,
+                'latency_ms': None,
+                'last_error': None,
+                'last_success_at': None,
+                'last_failure_at': None,
+            }
+        return self._provider_stats[provider]
+
+    @staticmethod
+    def _endpoint(provider: str):
+        if provider == ModelUsedEnum.GEMINI:
+            return 'gemini', GEMINI_API_KEY
+        # view at https://openrouter.ai/deepseek/deepseek-chat-v3.1:free/api
+        #view at https://openrouter.ai/openai/gpt-oss-20b:free
+        elif (provider == ModelUsedEnum.DEEPSEEK or provider == ModelUsedEnum.GPT):
+            return 'openrouter', OPENROUTER_API_KEY
+        else:
+            raise ValueError(f"Unknown AI provider: {provider}")
+
+    def _create_client(self, endpoint: str, api_key: str, key):
+        stats = self._client_stats[key] = {
+            'created_at': None,
+            'reused': 0,
+            'http_requests': None,
+            'connections_opened': None,
+        }
+
+        if endpoint == 'gemini':
+            # google-genai 0.5 sends each request through requests with the
+            # (connect, read) timeout in seconds; it opens a new session per
+            # request and takes no connection pool, so AI_PROVIDER_POOL_SIZE
+            # does not apply (concurrency is still capped by ProviderGuard)
+            return genai.Client(
+                api_key=api_key,
+                http_options={
+                    'timeout': (settings.AI_PROVIDER_CONNECT_TIMEOUT, settings.AI_PROVIDER_READ_TIMEOUT),
+                }
+            )
+
+        stats['http_requests'] = 0
+        stats['connections_opened'] = 0
+
+        def trace(event_name, info):
+            if event_name == 'connection.connect_tcp.complete':
+                with self._lock:
+                    stats['connections_opened'] += 1
+
+        def on_request(request):
+            # httpcore reports connection events through the "trace" extension
+            request.extensions['trace'] = trace
+            with self._lock:
+                stats['http_requests'] += 1
+
+        http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=settings.AI_PROVIDER_POOL_SIZE,
+                max_keepalive_connections=settings.AI_PROVIDER_POOL_SIZE,
+            ),
+            timeout=httpx.Timeout(
+                settings.AI_PROVIDER_READ_TIMEOUT,
+                connect=settings.AI_PROVIDER_CONNECT_TIMEOUT,
+            ),
+            event_hooks={'request': [on_request]},
+        )
+        # Retries are handled by ProviderGuard, within the global retry budget
+        return OpenAI(base_url=OPENROUTER_BASE_URL, api_key=api_key, http_client=http_client, max_retries=0)
+
+
+class provider_call:
+    """
+    Context manager recording the outcome and latency of one provider call:
+
+        with provider_call(provider):
+            ...
+    """
+
+    def __init__(self, provider: str):
+        self.provider = provider
+
+    def __enter__(self):
+        self.started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        registry = ProviderClientRegistry()
+        if exc is None:
+            registry.record_success(self.provider, time.monotonic() - self.started)
+        elif isinstance(exc, Exception):
+            registry.record_failure(self.provider, exc)
+        return False
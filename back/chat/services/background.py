@@ -0,0 +1,41 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from core.utils.logger import exception_log
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'BACKGROUND_WORKERS', 2),
+                    thread_name_prefix="chat-background",
+                )
+    return _executor
+
+
+def _run(fn, args, kwargs):
+    close_old_connections()
+    try:
+        fn(*args, **kwargs)
+    except Exception as e:
+        exception_log(e, __file__, log_info=f"Background task {fn.__qualname__} failed")
+    finally:
+        # Worker threads keep their own connection; do not leak it
+        connection.close()
+
+
+def run_in_background(fn, *args, **kwargs):
+    """Run ``fn`` on the in-process background pool, off the request path."""
+    return _get_executor().submit(_run, fn, args, kwargs)
+
+
+def run_after_commit(fn, *args, **kwargs):
+    """Run ``fn`` in the background once the current transaction commits."""
+    transaction.on_commit(lambda: run_in_background(fn, *args, **kwargs))
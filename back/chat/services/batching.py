@@ -0,0 +1,124 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+
+
+class BatchScheduler:
+    """
+    Dynamic micro-batching of seq2seq generation.
+
+    Prompts submitted concurrently for the same model and decode params are
+    collected for up to ``window_ms`` (or until ``max_batch_size`` items are
+    pending) and run as one padded ``generate`` call. Batches are executed one
+    at a time by a single worker thread, so CPU cores are spent on one large
+    batch instead of several competing single-prompt calls.
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, runner: Callable[..., List[str]], window_ms: float = 15, max_batch_size: int = 8,
+                 result_timeout: float = None):
+        self.runner = runner
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.result_timeout = result_timeout
+        self._pending = OrderedDict()  # group key -> {"deadline", "key", "params", "items"}
+        self._cond = threading.Condition()
+        self._stats = {'batches': 0, 'items': 0, 'max_batch_size_seen': 0}
+        self._worker = threading.Thread(target=self._run, name="generation-batcher", daemon=True)
+        self._worker.start()
+
+    @classmethod
+    def shared(cls, runner: Callable[..., List[str]], window_ms: float, max_batch_size: int,
+               result_timeout: float = None) -> "BatchScheduler":
+        """Return the process-wide scheduler, creating it on first use."""
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls(runner, window_ms, max_batch_size, result_timeout)
+        return cls._shared
+
+    def submit(self, key: str, prompt: str, **params) -> Future:
+        future = Future()
+        group = (key, json.dumps(params, sort_keys=True))
+        with self._cond:
+            entry = self._pending.get(group)
+            if entry is None:
+                entry = self._pending[group] = {
+                    'deadline': time.monotonic() + self.window,
+                    'key': key,
+                    'params': params,
+                    'items': [],
+                }
+            entry['items'].append((prompt, future))
+            self._cond.notify()
+        return future
+
+    def generate(self, key: str, prompts: List[str], **params) -> List[str]:
+        """
+        Submit ``prompts`` and wait for all of their outputs, at most
+        ``result_timeout`` seconds in total (concurrent.futures.TimeoutError).
+        """
+        futures = [self.submit(key, prompt, **params) for prompt in prompts]
+        if self.result_timeout is None:
+            return [future.result() for future in futures]
+        deadline = time.monotonic() + self.result_timeout
+        return [future.result(timeout=max(deadline - time.monotonic(), 0)) for future in futures]
+
+    def stats(self) -> Dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats['pending'] = sum(len(entry['items']) for entry in self._pending.values())
+        stats['avg_batch_size'] = round(stats['items'] / stats['batches'], 2) if stats['batches'] else 0
+        return stats
+
+    def _run(self):
+        while True:
+            with self._cond:
+                batch = self._take_ready_batch()
+                while batch is None:
+                    self._cond.wait(timeout=self._time_to_next_deadline())
+                    batch = self._take_ready_batch()
+            self._execute(batch)
+
+    def _take_ready_batch(self):
+        now = time.monotonic()
+        for group, entry in self._pending.items():
+            if len(entry['items']) >= self.max_batch_size or entry['deadline'] <= now:
+                items = entry['items'][:self.max_batch_size]
+                entry['items'] = entry['items'][self.max_batch_size:]
+                if not entry['items']:
+                    del self._pending[group]
+                return entry['key'], entry['params'], items
+        return None
+
+    def _time_to_next_deadline(self):
+        if not self._pending:
+            return None
+        next_deadline = min(entry['deadline'] for entry in self._pending.values())
+        return max(next_deadline - time.monotonic(), 0)
+
+    def _execute(self, batch):
+        key, params, items = batch
+        prompts = [prompt for prompt, _ in items]
+        try:
+            outputs = self.runner(key, prompts, **params)
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+        if len(outputs) != len(items):
+            e = RuntimeError(f"Runner returned {len(outputs)} outputs for {len(items)} prompts of {key}")
+            for _, future in items:
+                future.set_exception(e)
+            return
+        for (_, future), output in zip(items, outputs):
+            future.set_result(output)
+
+        with self._cond:
+            self._stats['batches'] += 1
+            self._stats['items'] += len(items)
+            self._stats['max_batch_size_seen'] = max(self._stats['max_batch_size_seen'], len(items))
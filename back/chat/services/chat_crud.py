@@ -1,10 +1,16 @@
 
+import hashlib
+import json
 from django.contrib.auth import get_user_model
 from django.contrib.auth import get_user_model
-from django.db.models import F ,Count
+from django.db.models import F ,Count, Q, Subquery, Value
+from django.utils.dateparse import parse_datetime
 
 from core.models.conversation import Conversation
 from core.models.conversation_line import ConversationLine
+from chat.services.line_translation import LineTranslationService
+from core.utils.cursor import decode_cursor, encode_cursor
+from core.utils.search import NormalizeArabic
 
 User = get_user_model()
 
@@ -37,63 +43,179 @@ class ConversationService:
         return conv
 
     @staticmethod
-    def get_conversations(pageNumber: int, pageSize: int, user_id: str, language: str, search: str = ""):
-        print(language)
+    def get_conversations(pageNumber: int, pageSize: int, user_id: str, language: str, search: str = "",
+                          cursor: str = None):
+        """
+        One page of the user's conversations, most recent message first.
+
+        Offset mode (``cursor`` is None): LIMIT/OFFSET page ``pageNumber`` with
+        ``totalPages``. Keyset mode (``cursor`` given, "" for the first page):
+        the page after ``cursor`` on (last_message_at, id), constant cost however
+        deep; ``totalPages`` is not computed. Both return ``nextCursor`` (None
+        on the last page).
+        """
         title_field = f"title_{language}"
 
         queryset = Conversation.objects.filter(user_id=user_id)
 
         if search:
-            queryset = queryset.filter(title_en__icontains=search)
-
-        queryset = queryset.order_by('-updated_at')
-
-        conversations = queryset.annotate(title=F(title_field),messages_count=Count('lines', distinct=True)
-).values('id', 'title','messages_count')
-
-        start = (pageNumber - 1) * pageSize
-        end = start + pageSize
-        paginated = list(conversations)[start:end]
+            # Trigram word similarity, served by the title GIN indexes
+            queryset = queryset.alias(title_ar_normalized=NormalizeArabic('title_ar')).filter(
+                Q(title_en__trigram_word_similar=search)
+                | Q(title_ar_normalized__trigram_word_similar=NormalizeArabic(Value(search)))
+            )
+
+        total_pages = None
+        if cursor is None:
+            total_count = queryset.count()
+            total_pages = (total_count + pageSize - 1) // pageSize
+            start = (pageNumber - 1) * pageSize
+        else:
+            start = 0
+            if cursor:
+                last_message_at, last_id = ConversationService.decode_conversations_cursor(cursor)
+                queryset = queryset.filter(
+                    Q(last_message_at__lt=last_message_at) | Q(last_message_at=last_message_at, id__lt=last_id)
+                )
+
+        conversations = queryset.order_by('-last_message_at', '-id').annotate(
+            title=F(title_field),
+            messages_count=F('message_count')
+        ).values('id', 'title', 'title_status', 'messages_count', 'last_message_at', 'last_message_snippet')
+
+        # One extra row tells whether there is a next page
+        rows = list(conversations[start:start + pageSize + 1])
+        has_next = len(rows) > pageSize
+        paginated = rows[:pageSize]
+
+        next_cursor = None
+        if has_next:
+            last = paginated[-1]
+            next_cursor = encode_cursor([last['last_message_at'].isoformat(), last['id']])
 
         return {
             "items": paginated,
-            "pageNumber": pageNumber,
+            "pageNumber": pageNumber if cursor is None else None,
             "pageSize": pageSize,
-            "totalPages": (len(conversations) + pageSize - 1) // pageSize
+            "totalPages": total_pages,
+            "nextCursor": next_cursor,
         }
+
+    @staticmethod
+    def decode_conversations_cursor(cursor: str):
+        """(last_message_at, id) of a conversations cursor; raises ValueError."""
+        values = decode_cursor(cursor)
+        last_message_at = parse_datetime(values[0]) if len(values) == 2 and isinstance(values[0], str) else None
+        if last_message_at is None or not isinstance(values[1], int):
+            raise ValueError("Invalid cursor")
+        return last_message_at, values[1]
         
     @staticmethod
     def get_conversation_messages(
         conversation_id: int,
         pageNumber: int = 1,
         pageSize: int = 10,
-        user_id: str = None
+        user_id: str = None,
+        language_code: str = None,
+        before: int = None,
+        include_total: bool = False,
+        since: str = None
     ):
         """
-        Get paginated messages for a conversation.
-        Each message returns its HTML content based on its own language.
+        Get paginated messages for a conversation, oldest first within a page.
+        Each message returns its HTML content based on its own language, or in
+        ``language_code`` when given; lines not translated yet are served in
+        their original language and queued for background translation.
+
+        Page ``pageNumber`` counts back from the latest messages; with
+        ``before`` (a message id) the page holds the messages just older than
+        it, a keyset read on (conversation, created_at, id) whose cost does not
+        depend on how far back it is. ``totalPages`` is only computed when
+        ``include_total`` is set.
+
+        With ``since`` (a message id or an ISO timestamp) only the messages
+        newer than it are returned, oldest first, up to ``pageSize``;
+        ``nextSince`` is the new high-water mark.
         """
-        conversation = Conversation.objects.filter(id=conversation_id, user_id=user_id).first()
-        if not conversation:
+        if not Conversation.objects.filter(id=conversation_id, user_id=user_id).exists():
             raise ValueError("Conversation not found or access denied.")
 
-        queryset = ConversationLine.objects.filter(conversation_id=conversation_id).order_by("created_at")
+        queryset = ConversationLine.objects.filter(conversation_id=conversation_id)
+
+        total_pages = None
+        if include_total:
+            total_pages = (queryset.count() + pageSize - 1) // pageSize
 
-        total_count = queryset.count()
-        total_pages = (total_count + pageSize - 1) // pageSize
+        if since is not None:
+            return ConversationService._get_messages_since(queryset, since, pageSize, language_code, total_pages)
 
-        start_index = total_count - pageNumber * pageSize
-        end_index = total_count - (pageNumber - 1) * pageSize
-        if start_index < 0:
-            start_index = 0
+        if before is not None:
+            anchor = ConversationLine.objects.filter(
+                id=before, conversation_id=conversation_id
+            ).values('created_at')[:1]
+            queryset = queryset.filter(
+                Q(created_at__lt=Subquery(anchor)) | Q(created_at=Subquery(anchor), id__lt=before)
+            )
+            start = 0
+        else:
+            start = (pageNumber - 1) * pageSize
 
-        lines = list(queryset[start_index:end_index])
+        # Newest first, one extra row tells whether older messages remain
+        rows = list(queryset.order_by('-created_at', '-id')[start:start + pageSize + 1])
+        has_more = len(rows) > pageSize
+        lines = rows[:pageSize][::-1]
+
+        return {
+            "items": ConversationService._message_items(lines, language_code),
+            "totalPages": total_pages,
+            "pageNumber": pageNumber if before is None else None,
+            "pageSize": pageSize,
+            "hasMore": has_more,
+            "nextBefore": lines[0].id if has_more and lines else None,
+        }
+
+    @staticmethod
+    def _get_messages_since(queryset, since: str, pageSize: int, language_code: str = None, total_pages: int = None):
+        if str(since).isdigit():
+            since_id = int(since)
+            # queryset is scoped to the conversation, so is the anchor
+            anchor = queryset.filter(id=since_id).values_list('created_at', flat=True).first()
+            if anchor is None:
+                # since=0 (first poll), or a line deleted or of another conversation
+                queryset = queryset.filter(id__gt=since_id)
+            else:
+                queryset = queryset.filter(Q(created_at__gt=anchor) | Q(created_at=anchor, id__gt=since_id))
+        else:
+            since_at = parse_datetime(since)
+            if since_at is None:
+                raise ValueError("since must be a message id or an ISO 8601 timestamp")
+            queryset = queryset.filter(created_at__gt=since_at)
+
+        rows = list(queryset.order_by('created_at', 'id')[:pageSize + 1])
+        lines = rows[:pageSize]
+        return {
+            "items": ConversationService._message_items(lines, language_code),
+            "totalPages": total_pages,
+            "pageNumber": None,
+            "pageSize": pageSize,
+            "hasMore": len(rows) > pageSize,
+            "nextSince": lines[-1].id if lines else (int(since) if str(since).isdigit() else since),
+        }
+
+    @staticmethod
+    def _message_items(lines, language_code: str = None):
+        if language_code:
+            # Never call DeepL on the read path: untranslated lines are served in
+            # their original language and translated in the background
+            LineTranslationService().queue_untranslated(lines, language_code)
 
         items = []
         for line in lines:
-            lang_code = line.language.language_code if line.language else "en"
-            html_field = f"text_html_{lang_code}"
-            content = getattr(line, html_field, line.text_en)  
+            # language_id is the language_code column itself: no query per line
+            lang_code = language_code or line.language_id or "en"
+            if LineTranslationService.needs_translation(line, lang_code):
+                lang_code = line.language_id
+            content = line.get_text_html(lang_code)
 
             items.append({
                 "id": line.id,
@@ -103,10 +225,20 @@ class ConversationService:
                 "model_used": line.model_used,
                 "language_code": lang_code,
             })
+        return items
 
-        return {
-            "items": items,
-            "totalPages": total_pages,
-            "pageNumber": pageNumber,
-            "pageSize": pageSize,
-        }
+    @staticmethod
+    def get_messages_etag(conversation_id: int, user_id: str = None, params: dict = None) -> str:
+        """
+        ETag of a messages response: the conversation's content_version (bumped
+        when lines are added or translated; one primary key lookup, no line
+        query) and a hash of the normalized query ``params``, so each page,
+        cursor and language has its own.
+        """
+        state = Conversation.objects.filter(id=conversation_id, user_id=user_id).values('content_version').first()
+        if state is None:
+            raise ValueError("Conversation not found or access denied.")
+        params_hash = hashlib.sha1(
+            json.dumps(params or {}, sort_keys=True, default=str).encode()
+        ).hexdigest()[:16]
+        return f'W/"{conversation_id}-{state["content_version"]}-{params_hash}"'
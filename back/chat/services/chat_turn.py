@@ -0,0 +1,176 @@
+from typing import Dict, Optional, Tuple
+from django.db import transaction
+from django.db.models import F
+from django.utils.html import linebreaks
+from langdetect import detect
+from chat.services.context_builder import ContextBuilder, ConversationMemoryService
+from chat.services.line_translation import LineTranslationService, translation_mode
+from chat.services.model import ConversationTitleService
+from core.enums.enums import SentByEnum, TranslationStatusEnum
+from core.models import Conversation, ConversationLine, Language, User
+from core.utils.translate_text import translate_texts
+
+
+class ChatTurnService:
+    """
+    One question/answer turn of ChatView, split so that no database
+    transaction is held open while waiting on the AI provider and DeepL:
+
+    1. ``prepare``: short reads (language, conversation, context window)
+    2. the caller runs the external calls outside of any transaction
+    3. ``persist``: one short write transaction, idempotent on ``client_message_id``
+    """
+
+    @staticmethod
+    def prepare(user: User, question: str, conversation_id: int = None, title: str = None,
+                client_message_id: str = None) -> Dict:
+        language_to_be_used = detect(question)
+        if language_to_be_used not in ['en', 'ar']:
+            language_to_be_used = 'en'
+
+        language_obj = Language.objects.filter(language_code=language_to_be_used).first()
+        if not language_obj:
+            language_obj = Language.objects.filter(language_code='en').first()
+
+        conversation = None
+        context = {"summary": "", "lines": []}
+        if conversation_id:
+            conversation = Conversation.objects.filter(id=conversation_id, user=user).first()
+            if not conversation:
+                raise ValueError("Conversation not found or access denied.")
+            context = ContextBuilder.build(conversation, language_to_be_used)
+
+        return {
+            "question": question,
+            "language": language_to_be_used,
+            "opposite_language": 'ar' if language_to_be_used == 'en' else 'en',
+            "language_obj": language_obj,
+            "conversation": conversation,
+            "history": context["lines"],
+            "memory": context["summary"],
+            "title": title or "New Conversation",
+            "client_message_id": client_message_id,
+            "existing": ChatTurnService.find_existing_turn(user, client_message_id),
+        }
+
+    @staticmethod
+    def find_existing_turn(user: User, client_message_id: Optional[str]) -> Optional[Tuple[ConversationLine, ConversationLine]]:
+        """Lines already stored for a retried request, as (user_line, bot_line)."""
+        if not client_message_id:
+            return None
+        lines = {
+            line.sent_by: line
+            for line in ConversationLine.objects.filter(
+                conversation__user=user, client_message_id=client_message_id
+            ).select_related('conversation')
+        }
+        if SentByEnum.USER.value in lines and SentByEnum.BOT.value in lines:
+            return lines[SentByEnum.USER.value], lines[SentByEnum.BOT.value]
+        return None
+
+    @staticmethod
+    def translate(turn: Dict, answer: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Question and answer in the opposite language (one external DeepL call),
+        or (None, None) when translations are deferred (CHAT_TRANSLATION_MODE).
+        """
+        if translation_mode() != "eager":
+            return None, None
+        user_text, bot_text = translate_texts(
+            [turn["question"], answer], turn["language"], turn["opposite_language"]
+        )
+        return user_text, bot_text
+
+    @staticmethod
+    def persist(turn: Dict, user: User, provider: str, answer: str, user_text: str, bot_text: str,
+                decoding_profile: str = None) -> Tuple[Conversation, ConversationLine, ConversationLine]:
+        """
+        Store the turn. Returns (conversation, user_line, bot_line); when the same
+        client_message_id was already stored by a concurrent retry, the stored
+        lines are returned instead of writing duplicates.
+        """
+        language = turn["language"]
+        opposite_language = turn["opposite_language"]
+        question = turn["question"]
+        translated = user_text is not None and bot_text is not None
+        translation_status = (
+            TranslationStatusEnum.DONE.value if translated else TranslationStatusEnum.PENDING.value
+        )
+        # Deferred translation: only the original language is written now
+        user_translation = {f"text_{opposite_language}": user_text} if translated else {}
+        bot_translation = {f"text_{opposite_language}": bot_text} if translated else {}
+
+        with transaction.atomic():
+            # Serializes the writes of one user: retries and conversation counters
+            User.objects.select_for_update().only('id').get(id=user.id)
+
+            existing = ChatTurnService.find_existing_turn(user, turn["client_message_id"])
+            if existing:
+                return existing[0].conversation, existing[0], existing[1]
+
+            conversation = turn["conversation"]
+            is_new = conversation is None
+            if is_new:
+                conversation = Conversation.objects.create(
+                    user=user,
+                    **{f"title_{language}": turn["title"]}
+                )
+            elif not Conversation.objects.filter(id=conversation.id).exists():
+                raise ValueError("Conversation was deleted while the answer was generated.")
+
+            user_line = ConversationLine.objects.create(
+                conversation=conversation,
+                user=user,
+                sent_by=SentByEnum.USER.value,
+                model_used=provider,
+                language=turn["language_obj"],
+                client_message_id=turn["client_message_id"],
+                translation_status=translation_status,
+                **{
+                    f"text_{language}": question,
+                    f"text_html_{language}": linebreaks(question)
+                },
+                **user_translation
+            )
+
+            # --- Save AI (bot) response ---
+            bot_line = ConversationLine.objects.create(
+                conversation=conversation,
+                user=user,
+                sent_by=SentByEnum.BOT.value,
+                model_used=provider,
+                language=turn["language_obj"],
+                client_message_id=turn["client_message_id"],
+                translation_status=translation_status,
+                **{
+                    f"text_{language}": answer,
+                    f"text_html_{language}": linebreaks(answer)
+                },
+                **bot_translation
+            )
+
+            if is_new:
+                # Keyword title now, model-generated titles after commit (poll GET conversations/<id>/title)
+                service = ConversationTitleService()
+                texts = {language: [question, answer], opposite_language: [user_text, bot_text] if translated else [question, answer]}
+                conversation = service.set_provisional_title(conversation, texts['en'], texts['ar'])
+                service.regenerate_after_commit(conversation.id, user, profile=decoding_profile)
+            else:
+                ConversationMemoryService().update_after_commit(conversation.id)
+
+            Conversation.objects.filter(id=conversation.id).update(
+                message_count=F('message_count') + 2,
+                content_version=F('content_version') + 1,
+                last_message_at=bot_line.created_at,
+                last_message_snippet=Conversation.make_snippet(answer),
+            )
+            # The counters were updated in the database; the response must show them
+            conversation.refresh_from_db()
+
+            if not translated and translation_mode() == "background":
+                LineTranslationService().translate_after_commit([user_line.id, bot_line.id])
+
+            # One count per turn, a new conversation included
+            user.increment_conversations_count()
+
+        return conversation, user_line, bot_line
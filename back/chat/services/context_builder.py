@@ -0,0 +1,180 @@
+import logging
+import re
+from typing import Dict, List
+from django.conf import settings
+from chat.services.background import run_after_commit
+from chat.services.model import GenerationTimeout, decoding_params, generate_text
+from core.enums.enums import SentByEnum
+from core.models import Conversation, ConversationLine
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), enough for budgeting."""
+    return len(text or "") // 4 + 1
+
+
+LINE_FIELDS = ('id', 'conversation', 'sent_by', 'created_at', 'text_en', 'text_ar', 'language', 'translation_status')
+
+
+def unsummarized_lines(conversation: Conversation):
+    """Lines of ``conversation`` not folded into its memory summary yet."""
+    lines = conversation.lines.all()
+    if conversation.memory_line_id:
+        lines = lines.filter(id__gt=conversation.memory_line_id)
+    return lines
+
+
+class ContextBuilder:
+    """
+    Prompt context of a conversation with a flat per-turn cost: the rolling
+    summary stored on the conversation plus the lines after it, newest first,
+    within CHAT_CONTEXT_TOKEN_BUDGET.
+
+    The fold (ConversationMemoryService) keeps at most ``max_lines()`` lines
+    outside the summary, so every line is either summarized or sent.
+    """
+
+    @staticmethod
+    def max_lines() -> int:
+        # The fold runs every FOLD_BATCH lines beyond MAX_LINES
+        return settings.CHAT_CONTEXT_MAX_LINES + settings.CHAT_MEMORY_FOLD_BATCH - 1
+
+    @staticmethod
+    def fit(recent: List[ConversationLine], summary: str, language: str, max_lines: int) -> List[ConversationLine]:
+        """The newest of ``recent`` (newest first) within ``max_lines`` and the token budget."""
+        budget = settings.CHAT_CONTEXT_TOKEN_BUDGET - estimate_tokens(summary)
+        lines = []
+        for line in recent[:max_lines]:
+            budget -= estimate_tokens(line.get_text(language))
+            if budget < 0 and lines:
+                break
+            lines.append(line)
+        return lines
+
+    @staticmethod
+    def build(conversation: Conversation, language: str) -> Dict:
+        max_lines = ContextBuilder.max_lines()
+        recent = list(
+            unsummarized_lines(conversation)
+            .order_by('-created_at', '-id')
+            .only(*LINE_FIELDS)
+            [:max_lines + 1]
+        )
+
+        summary = conversation.memory_summary
+        lines = ContextBuilder.fit(recent, summary, language, max_lines)
+        dropped = recent[len(lines):]
+        if dropped and settings.CHAT_MEMORY_ENABLED:
+            # Not folded yet (the fold runs after commit): keep their questions in the prompt
+            summary = ConversationMemoryService.fallback(summary, dropped[::-1])
+        lines.reverse()
+
+        return {"summary": summary, "lines": lines}
+
+
+class ConversationMemoryService:
+    """
+    Rolling summary of the lines that left the context window, stored on the
+    conversation (``memory_summary``, up to line ``memory_line_id``) and
+    folded forward in the background once FOLD_BATCH lines left the window,
+    or as soon as the unsummarized lines no longer fit the prompt. Long
+    backlogs are folded in chunks of at most CHAT_MEMORY_CHUNK_CHARS.
+    """
+
+    def update_after_commit(self, conversation_id: int):
+        if settings.CHAT_MEMORY_ENABLED:
+            run_after_commit(self.update, conversation_id)
+
+    def update(self, conversation_id: int):
+        conversation = Conversation.objects.filter(id=conversation_id).only(
+            'id', 'memory_summary', 'memory_line_id'
+        ).first()
+        if not conversation:
+            return
+
+        max_lines = ContextBuilder.max_lines()
+        recent = list(
+            unsummarized_lines(conversation)
+            .order_by('-created_at', '-id')
+            .only(*LINE_FIELDS)
+            [:max_lines + 1]
+        )
+        sent = ContextBuilder.fit(recent, conversation.memory_summary, 'en', max_lines)
+        keep = ContextBuilder.fit(recent, conversation.memory_summary, 'en', settings.CHAT_CONTEXT_MAX_LINES)
+        if len(sent) == len(recent) and len(recent) - len(keep) < settings.CHAT_MEMORY_FOLD_BATCH:
+            return
+
+        # Everything older than the lines kept in the window is folded
+        oldest_kept_id = keep[-1].id
+        summary, memory_line_id = conversation.memory_summary, conversation.memory_line_id
+        while True:
+            chunk = self._next_chunk(conversation, memory_line_id, oldest_kept_id)
+            if not chunk:
+                return
+            summary = self.summarize(summary, chunk)
+            # Conditional update: a concurrent fold of the same lines wins once
+            updated = Conversation.objects.filter(
+                id=conversation.id, memory_line_id=memory_line_id
+            ).update(memory_summary=summary, memory_line_id=chunk[-1].id)
+            if not updated:
+                return
+            memory_line_id = chunk[-1].id
+
+    @staticmethod
+    def _next_chunk(conversation: Conversation, memory_line_id: int, before_id: int) -> List[ConversationLine]:
+        """Oldest unsummarized lines before ``before_id``, up to CHAT_MEMORY_CHUNK_CHARS of text."""
+        lines = conversation.lines.filter(id__lt=before_id)
+        if memory_line_id:
+            lines = lines.filter(id__gt=memory_line_id)
+
+        chunk, chars = [], 0
+        for line in lines.order_by('created_at', 'id').only(*LINE_FIELDS)[:settings.CHAT_MEMORY_FOLD_BATCH * 4]:
+            chars += len(line.get_text('en'))
+            if chunk and chars > settings.CHAT_MEMORY_CHUNK_CHARS:
+                break
+            chunk.append(line)
+        return chunk
+
+    def summarize(self, previous: str, lines: List[ConversationLine]) -> str:
+        # Untranslated lines are summarized in their original language
+        # Chunks are bounded by _next_chunk; a single oversized line is cut
+        transcript = "\n".join(
+            f"{line.sent_by}: {line.get_text('en')[:settings.CHAT_MEMORY_CHUNK_CHARS]}" for line in lines
+        )
+        # Only the new lines are summarized; the result is appended to the previous summary
+        prompt = f"""Summarize this conversation between a user and an assistant in a few sentences. Keep names, facts and decisions.
+
+Conversation:
+{transcript}
+
+Summary:"""
+        try:
+            summary = generate_text(
+                'title_en',
+                prompt,
+                max_length=150,
+                no_repeat_ngram_size=3,
+                do_sample=False,
+                **decoding_params('memory')
+            )
+            summary = re.sub(r'\s+', ' ', summary).strip()
+            if len(summary) < 10:
+                raise ValueError("Summary too short")
+            return f"{previous} {summary}".strip()[-settings.CHAT_MEMORY_MAX_CHARS:]
+        except GenerationTimeout:
+            pass
+        except Exception as e:
+            logger.warning("Conversation memory generation failed: %s", e)
+        return self.fallback(previous, lines)
+
+    @staticmethod
+    def fallback(previous: str, lines: List[ConversationLine]) -> str:
+        """Truncated transcript of the user questions, newest kept."""
+        questions = [
+            line.get_text('en')[:200] for line in lines
+            if line.sent_by == SentByEnum.USER.value
+        ]
+        summary = f"{previous} The user asked: {' | '.join(questions)}." if questions else previous
+        return summary.strip()[-settings.CHAT_MEMORY_MAX_CHARS:]
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+import unicodedata
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from core.models.generation_cache import GenerationCacheEntry
+from core.utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationCache:
+    """
+    Content-addressed cache of generated titles and summaries.
+
+    Entries are keyed by hash(model id, decode params, normalized input), so
+    byte-identical requests skip beam search. Lookups go through an in-process
+    LRU first, then the database, which is shared by all workers and survives
+    restarts.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._lru = LRUCache(getattr(settings, 'GENERATION_CACHE_LRU_SIZE', 1024))
+                    instance._counters = {'memory_hits': 0, 'db_hits': 0, 'misses': 0}
+                    instance._counters_lock = threading.Lock()
+                    cls._instance = instance
+        return cls._instance
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(settings, 'GENERATION_CACHE_ENABLED', True)
+
+    @staticmethod
+    def make_key(model_id: str, params: dict, text: str) -> str:
+        normalized = re.sub(r'\s+', ' ', unicodedata.normalize('NFC', text)).strip()
+        payload = json.dumps([model_id, params, normalized], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str):
+        output = self._lru.get(key)
+        if output is not None:
+            self._count('memory_hits')
+            return output
+
+        try:
+            output = GenerationCacheEntry.objects.filter(key=key).values_list('output', flat=True).first()
+        except DatabaseError as e:
+            logger.warning("Generation cache lookup failed: %s", e)
+            output = None
+
+        if output is None:
+            self._count('misses')
+            return None
+        self._lru.set(key, output)
+        self._count('db_hits')
+        return output
+
+    def set(self, key: str, model_id: str, output: str):
+        self._lru.set(key, output)
+        try:
+            with transaction.atomic():
+                GenerationCacheEntry.objects.get_or_create(
+                    key=key, defaults={'model_id': model_id, 'output': output}
+                )
+        except DatabaseError as e:
+            logger.warning("Generation cache write failed: %s", e)
+
+    def stats(self) -> dict:
+        with self._counters_lock:
+            stats = dict(self._counters)
+        lookups = sum(stats.values())
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['db_hits']) / lookups, 3) if lookups else 0
+        stats['memory_entries'] = len(self._lru)
+        return stats
+
+    def _count(self, name: str):
+        with self._counters_lock:
+            self._counters[name] += 1
@@ -0,0 +1,67 @@
+from typing import List, Optional, Tuple
+from django.conf import settings
+import requests
+
+
+class InferenceServerError(Exception):
+    """Raised when the shared inference server fails or times out."""
+
+
+class InferenceClient:
+    """
+    Thin HTTP client of the shared inference server
+    (see ``manage.py run_inference_server``).
+    """
+    _session = None
+
+    def __init__(self, base_url: str, connect_timeout: float, read_timeout: float):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+
+    @classmethod
+    def from_settings(cls):
+        """Return a client when INFERENCE_SERVER_URL is configured, else None."""
+        base_url = getattr(settings, 'INFERENCE_SERVER_URL', '')
+        if not base_url:
+            return None
+        return cls(
+            base_url,
+            getattr(settings, 'INFERENCE_SERVER_CONNECT_TIMEOUT', 2),
+            getattr(settings, 'INFERENCE_SERVER_READ_TIMEOUT', 30),
+        )
+
+    @classmethod
+    def session(cls) -> requests.Session:
+        # One keep-alive session per process
+        if cls._session is None:
+            cls._session = requests.Session()
+        return cls._session
+
+    def generate(self, key: str, prompts: List[str], **params) -> List[str]:
+        return self.generate_with_model_id(key, prompts, **params)[0]
+
+    def generate_with_model_id(self, key: str, prompts: List[str], **params) -> Tuple[List[str], Optional[str]]:
+        """Outputs and the id of the weights that produced them (None from older servers)."""
+        timeout = self.timeout
+        if params.get('max_time'):
+            # No point waiting past the caller's generation budget
+            timeout = (timeout[0], min(timeout[1], params['max_time'] + 1))
+        try:
+            response = self.session().post(
+                f"{self.base_url}/generate",
+                json={"model": key, "prompts": prompts, "params": params},
+                timeout=timeout,
+            )
+            response.raise_for_status()
+            body = response.json()
+            return body["outputs"], body.get("model_id")
+        except (requests.RequestException, KeyError, ValueError) as e:
+            raise InferenceServerError(f"Inference server request failed: {e}") from e
+
+    def health(self) -> dict:
+        try:
+            response = self.session().get(f"{self.base_url}/health", timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise InferenceServerError(f"Inference server request failed: {e}") from e
@@ -0,0 +1,72 @@
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from chat.services.model import ModelManager, generate_local
+
+logger = logging.getLogger(__name__)
+
+# Generation arguments accepted from clients
+ALLOWED_PARAMS = {
+    'max_length', 'min_length', 'num_beams', 'no_repeat_ngram_size',
+    'early_stopping', 'do_sample', 'length_penalty', 'max_time',
+}
+
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON API of the inference server:
+        POST /generate  {"model": key, "prompts": [...], "params": {...}} -> {"outputs": [...], "model_id": ...}
+        GET  /health    -> ModelManager stats
+    """
+
+    def do_GET(self):
+        if self.path != '/health':
+            return self._send(404, {"error": "Not found"})
+        self._send(200, ModelManager().stats())
+
+    def do_POST(self):
+        if self.path != '/generate':
+            return self._send(404, {"error": "Not found"})
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length))
+            key = payload["model"]
+            prompts = payload["prompts"]
+            params = payload.get("params", {})
+            if key not in ModelManager.MODEL_SPECS:
+                raise ValueError(f"Unknown model: {key}")
+            if not isinstance(prompts, list) or not all(isinstance(p, str) for p in prompts):
+                raise ValueError("prompts must be a list of strings")
+            unknown = set(params) - ALLOWED_PARAMS
+            if unknown:
+                raise ValueError(f"Unsupported params: {', '.join(sorted(unknown))}")
+        except (KeyError, ValueError) as e:
+            return self._send(400, {"error": str(e)})
+
+        try:
+            outputs = generate_local(key, prompts, **params)
+        except Exception as e:
+            logger.exception("Generation failed for %s", key)
+            return self._send(500, {"error": str(e)})
+        self._send(200, {"outputs": outputs, "model_id": ModelManager().model_id(key)})
+
+    def _send(self, status_code: int, body: dict):
+        data = json.dumps(body, default=str, ensure_ascii=False).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+
+def serve(host: str = '127.0.0.1', port: int = 8501):
+    """Run the inference server until interrupted; one thread per request."""
+    server = ThreadingHTTPServer((host, port), InferenceRequestHandler)
+    server.daemon_threads = True
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
@@ -0,0 +1,129 @@
+import logging
+import threading
+from collections import defaultdict
+from typing import Iterable, List
+from django.conf import settings
+from django.db.models import F
+from django.utils.html import linebreaks
+from chat.services.background import run_after_commit
+from core.enums.enums import TranslationStatusEnum
+from core.models import Conversation, ConversationLine
+from core.utils.translate_text import translate_texts
+
+logger = logging.getLogger(__name__)
+
+LANGUAGES = ('en', 'ar')
+
+
+def translation_mode() -> str:
+    """CHAT_TRANSLATION_MODE: eager (at write time), background (after commit) or lazy (on read)."""
+    return settings.CHAT_TRANSLATION_MODE
+
+
+class LineTranslationService:
+    """
+    Fills the opposite-language fields of conversation lines stored with
+    ``translation_status`` pending (or failed), one DeepL request per source
+    language. Lines keep serving their original text until then (see
+    ConversationLine.get_text).
+    """
+    # Line ids queued for background translation in this process
+    _queued = set()
+    _queued_lock = threading.Lock()
+
+    @staticmethod
+    def needs_translation(line: ConversationLine, lang_code: str = None) -> bool:
+        if line.translation_status == TranslationStatusEnum.DONE.value:
+            return False
+        return not (lang_code and (line.language_id or 'en') == lang_code)
+
+    def ensure_translated(self, lines: Iterable[ConversationLine], lang_code: str = None) -> List[ConversationLine]:
+        """
+        Translate the untranslated lines among ``lines``, in place; when
+        ``lang_code`` is given, only those that are not already in it.
+        """
+        by_source = defaultdict(list)
+        for line in lines:
+            if self.needs_translation(line, lang_code):
+                by_source[line.language_id or 'en'].append(line)
+
+        translated = []
+        for source, source_lines in by_source.items():
+            target = 'ar' if source == 'en' else 'en'
+            texts = [line.get_text(source) for line in source_lines]
+            try:
+                translations = translate_texts(texts, source, target, fallback=False)
+                status = TranslationStatusEnum.DONE.value
+            except Exception as e:
+                logger.warning("Translation of %d lines failed: %s", len(source_lines), e)
+                translations = [None] * len(source_lines)
+                status = TranslationStatusEnum.FAILED.value
+
+            for line, translation in zip(source_lines, translations):
+                if translation is not None:
+                    setattr(line, f"text_{target}", translation)
+                    setattr(line, f"text_html_{target}", linebreaks(translation))
+                line.translation_status = status
+                translated.append(line)
+
+        if translated:
+            ConversationLine.objects.bulk_update(
+                translated,
+                [f"text_{lang}" for lang in LANGUAGES] + [f"text_html_{lang}" for lang in LANGUAGES] + ['translation_status'],
+            )
+            # New texts to serve: invalidates the ETag of their conversations
+            changed = {line.conversation_id for line in translated if line.translation_status == TranslationStatusEnum.DONE.value}
+            if changed:
+                Conversation.objects.filter(id__in=changed).update(content_version=F('content_version') + 1)
+        return translated
+
+    def translate_after_commit(self, line_ids: List[int]) -> List[int]:
+        """
+        Translate ``line_ids`` in the background once the transaction commits.
+        Lines already queued in this process are skipped; returns the queued ids.
+        """
+        with self._queued_lock:
+            line_ids = [line_id for line_id in line_ids if line_id not in self._queued]
+            self._queued.update(line_ids)
+        if line_ids:
+            run_after_commit(self._translate_queued, line_ids)
+        return line_ids
+
+    def queue_untranslated(self, lines: Iterable[ConversationLine], lang_code: str = None) -> List[int]:
+        """
+        Read path of the lazy mode: queue the pending lines not yet available
+        in ``lang_code`` for background translation, without waiting for DeepL.
+        Failed lines are left to the backfill_translations command, so reads
+        never retry them while DeepL is down or out of quota.
+        """
+        return self.translate_after_commit([
+            line.id for line in lines
+            if line.translation_status == TranslationStatusEnum.PENDING.value and self.needs_translation(line, lang_code)
+        ])
+
+    def _translate_queued(self, line_ids: List[int]):
+        try:
+            self.backfill(line_ids=line_ids)
+        finally:
+            with self._queued_lock:
+                self._queued.difference_update(line_ids)
+
+    def backfill(self, line_ids: List[int] = None, batch_size: int = 50, limit: int = None) -> int:
+        """Translate pending/failed lines (all, or ``line_ids``) in batches; returns the number processed."""
+        queryset = ConversationLine.objects.exclude(
+            translation_status=TranslationStatusEnum.DONE.value
+        ).order_by('id')
+        if line_ids is not None:
+            queryset = queryset.filter(id__in=line_ids)
+
+        processed = 0
+        last_id = 0
+        while limit is None or processed < limit:
+            size = batch_size if limit is None else min(batch_size, limit - processed)
+            batch = list(queryset.filter(id__gt=last_id)[:size])
+            if not batch:
+                break
+            self.ensure_translated(batch)
+            processed += len(batch)
+            last_id = batch[-1].id
+        return processed
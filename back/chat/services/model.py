@@ -1,67 +1,416 @@
 from typing import List, Dict
+import gc
+import logging
+import os
 import re
+import shutil
+import threading
+import time
+from pathlib import Path
 import torch
-from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+from django.conf import settings
 from django.utils import timezone
 from core.models.conversation import Conversation
 from core.models.conversation_line import ConversationLine
 from core.models.conversation_analysis import ConversationAnalysis
 from core.models.user import User
-from core.enums.enums import SentByEnum
-from collections import Counter
+from core.enums.enums import SentByEnum, TitleStatusEnum
+from chat.services.background import run_after_commit
+from chat.services.batching import BatchScheduler
+from chat.services.generation_cache import GenerationCache
+from chat.services.inference_client import InferenceClient
+from chat.services.line_translation import LineTranslationService
+from collections import Counter, OrderedDict
+
+logger = logging.getLogger(__name__)
 
 
 class ModelManager:
-    """Singleton for ML models."""
+    """
+    Singleton for ML models.
+
+    Models are loaded lazily on first use and kept under a RAM budget
+    (``ML_MODELS_MEMORY_BUDGET_MB``); when the budget is exceeded the least
+    recently used models are evicted. Load time and resident size are tracked
+    per model and exposed through ``stats()``.
+    """
     _instance = None
-    _loaded = False
+    _lock = threading.RLock()
+
+    # English summarization (BART)
+    # Model no more used in this context , suitable better for text or pdf summarizing..
+    # In conversations it gave nonesense ("facebook/bart-large-cnn")
+    MODEL_SPECS = {
+        # Arabic summarization (mT5)
+        'summary_ar': {'repo': "csebuetnlp/mT5_multilingual_XLSum"},
+        # Flan-T5 for title generation & conversation summaries (supports both Arabic and English but used in english here)
+        'title_en': {'repo': "google/flan-t5-base"},  # Used flan-t5-large for better quality
+        # Option 1: AraT5 for Arabic (specialized for Arabic)
+        # Option 2: Fallback to mBART-50 (good multilingual support)
+        'title_ar': {
+            'repo': "UBC-NLP/AraT5-base-title-generation",
+            'method': 'arat5',
+            'fallback': {'repo': "facebook/mbart-large-50", 'method': 'mbart'},
+        },
+        # MarianMT for local en<->ar translation (alternative to DeepL, see
+        # core/utils/translation_backends.py). opus-mt-en-ar needs the target language token
+        'mt_en_ar': {'repo': "Helsinki-NLP/opus-mt-en-ar", 'prefix': ">>ara<< "},
+        'mt_ar_en': {'repo': "Helsinki-NLP/opus-mt-ar-en"},
+    }
+
+    # fp32: plain PyTorch, int8: dynamic int8-quantized PyTorch (CPU),
+    # onnx: ONNX Runtime encoder/decoder with KV cache (needs optimum[onnxruntime])
+    BACKENDS = ('fp32', 'int8', 'onnx')
 
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            with cls._lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._models = OrderedDict()
+                    # key -> id of the weights last loaded for it (primary or fallback),
+                    # locally or as reported by the inference server
+                    instance._model_ids = {}
+                    instance._stats = {
+                        key: {
+                            'loaded': False,
+                            'backend': None,
+                            'loads': 0,
+                            'evictions': 0,
+                            'load_time_s': None,
+                            'size_mb': None,
+                            'last_used': None,
+                        }
+                        for key in cls.MODEL_SPECS
+                    }
+                    cls._instance = instance
         return cls._instance
 
-    def __init__(self):
-        if not ModelManager._loaded:
-            self._load_models()
-            ModelManager._loaded = True
-
-    def _load_models(self):
-        # English summarization (BART)
-        # Model no more used in this context , suitable better for text or pdf summarizing..
-        # In conversations it gave nonesense
-        # self.summarizer_en = pipeline(
-        #     "summarization",
-        #     model="facebook/bart-large-cnn",
-        #     device=0 if torch.cuda.is_available() else -1
-        # )
-        # Arabic summarization (mT5)
-        self.tokenizer_ar = AutoTokenizer.from_pretrained("csebuetnlp/mT5_multilingual_XLSum")
-        self.model_ar = AutoModelForSeq2SeqLM.from_pretrained("csebuetnlp/mT5_multilingual_XLSum")
+    @property
+    def budget_mb(self) -> int:
+        return getattr(settings, 'ML_MODELS_MEMORY_BUDGET_MB', 0)
+
+    def get(self, key: str) -> Dict:
+        """Return the loaded objects for ``key``, loading them on first use."""
+        if key not in self.MODEL_SPECS:
+            raise ValueError(f"Unknown model: {key}")
+
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                entry = self._load(key)
+            self._models.move_to_end(key)
+            self._stats[key]['last_used'] = timezone.now()
+            return entry
+
+    def preload(self, keys: List[str] = None):
+        """Load the given models eagerly (defaults to ``ML_MODELS_PRELOAD``)."""
+        for key in keys if keys is not None else getattr(settings, 'ML_MODELS_PRELOAD', []):
+            self.get(key)
+
+    def evict(self, key: str):
+        with self._lock:
+            if self._models.pop(key, None) is None:
+                return
+            self._stats[key]['loaded'] = False
+            self._stats[key]['evictions'] += 1
+        gc.collect()
         if torch.cuda.is_available():
-            self.model_ar = self.model_ar.cuda()
-            
-        # Flan-T5 for title generation & conversation summaries (supports both Arabic and English but used in english here)
-        self.title_generator_en = pipeline(
-            "text2text-generation",
-            model="google/flan-t5-base",  # Used flan-t5-large for better quality
-            device=0 if torch.cuda.is_available() else -1
+            torch.cuda.empty_cache()
+        logger.info("Evicted model %s", key)
+
+    def resident_mb(self) -> float:
+        return sum(
+            self._stats[key]['size_mb'] or 0 for key in self._models
         )
-        
-        # Option 1: AraT5 for Arabic (specialized for Arabic)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'budget_mb': self.budget_mb,
+                'resident_mb': round(self.resident_mb(), 1),
+                'models': {key: dict(value) for key, value in self._stats.items()},
+            }
+
+    def _load(self, key: str) -> Dict:
+        # Make room up front when the size is known from a previous load
+        expected_mb = self._stats[key]['size_mb'] or 0
+        self._enforce_budget(reserve_mb=expected_mb)
+
+        started = time.perf_counter()
+        entry = self.load_entry(key)
+        load_time = time.perf_counter() - started
+
+        size_mb = sum(
+            self._module_size_bytes(obj) for obj in entry.values()
+        ) / (1024 * 1024)
+        self._models[key] = entry
+        self.remember_model_id(key, self.make_model_id(entry['repo'], entry['backend']))
+        self._stats[key].update({
+            'loaded': True,
+            'backend': entry['backend'],
+            'load_time_s': round(load_time, 2),
+            'size_mb': round(size_mb, 1),
+        })
+        self._stats[key]['loads'] += 1
+        logger.info("Loaded model %s (%s) in %.2fs (%.1f MB)", key, entry['backend'], load_time, size_mb)
+
+        self._enforce_budget(keep=key)
+        return entry
+
+    def _enforce_budget(self, reserve_mb: float = 0, keep: str = None):
+        budget = self.budget_mb
+        if not budget:
+            return
+        for key in list(self._models):
+            if self.resident_mb() + reserve_mb <= budget:
+                break
+            if key != keep:
+                self.evict(key)
+
+    @staticmethod
+    def _module_size_bytes(obj) -> int:
+        if isinstance(obj, torch.nn.Module):
+            params = sum(p.numel() * p.element_size() for p in obj.parameters())
+            buffers = sum(b.numel() * b.element_size() for b in obj.buffers())
+            return params + buffers
+        # ONNX Runtime sessions: size of the exported graphs on disk
+        model_dir = getattr(obj, 'model_save_dir', None)
+        if model_dir:
+            return sum(f.stat().st_size for f in Path(model_dir).glob('*.onnx*'))
+        return 0
+
+    def backend_for(self, key: str) -> str:
+        return getattr(settings, 'ML_MODEL_BACKENDS', {}).get(key, 'fp32')
+
+    @staticmethod
+    def make_model_id(repo: str, backend: str) -> str:
+        return f"{repo}:{backend}"
+
+    def model_id(self, key: str) -> str:
+        """
+        Identifies the weights and backend that produce the outputs of ``key``:
+        those of the spec actually loaded (e.g. the fallback of ``title_ar``),
+        or the primary spec while nothing was loaded yet.
+        """
+        return self._model_ids.get(key) or self.make_model_id(self.MODEL_SPECS[key]['repo'], self.backend_for(key))
+
+    def remember_model_id(self, key: str, model_id: str):
+        self._model_ids[key] = model_id
+
+    # Written last into a finished export; a directory without it is ignored
+    ARTIFACT_MARKER = 'EXPORT_COMPLETE'
+
+    def artifact_dir(self, repo: str, backend: str) -> Path:
+        return Path(settings.ML_MODEL_CACHE_DIR) / repo.replace('/', '--') / backend
+
+    def artifacts_ready(self, repo: str, backend: str) -> bool:
+        return (self.artifact_dir(repo, backend) / self.ARTIFACT_MARKER).exists()
+
+    def load_entry(self, key: str, backend: str = None) -> Dict:
+        """Load ``key`` with ``backend`` (defaults to ML_MODEL_BACKENDS), bypassing the registry."""
+        backend = backend or self.backend_for(key)
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend {backend} for model {key}")
+
+        specs = self._candidate_specs(key)
+        for spec in specs:
+            try:
+                return {
+                    'tokenizer': AutoTokenizer.from_pretrained(spec['repo']),
+                    'model': self._load_model(spec['repo'], backend),
+                    'method': spec.get('method'),
+                    'prefix': spec.get('prefix', ''),
+                    'backend': backend,
+                    'repo': spec['repo'],
+                }
+            except Exception:
+                if spec is specs[-1]:
+                    raise
+                logger.warning("Could not load %s, trying fallback", spec['repo'])
+
+    def export(self, key: str, backend: str) -> Path:
+        """Build the ``backend`` artifacts of ``key`` once and cache them on disk."""
+        specs = self._candidate_specs(key)
+        for spec in specs:
+            try:
+                return self._export_model(spec['repo'], backend)
+            except Exception:
+                if spec is specs[-1]:
+                    raise
+
+    def _candidate_specs(self, key: str) -> List[Dict]:
+        spec = self.MODEL_SPECS[key]
+        return [spec, spec['fallback']] if 'fallback' in spec else [spec]
+
+    def _load_model(self, repo: str, backend: str):
+        if backend == 'int8':
+            if self.artifacts_ready(repo, backend):
+                return torch.load(self.artifact_dir(repo, backend) / 'model.pt', weights_only=False)
+            return self.quantize_int8(AutoModelForSeq2SeqLM.from_pretrained(repo))
+
+        if backend == 'onnx':
+            ORTModelForSeq2SeqLM = self._ort_model_class()
+            if self.artifacts_ready(repo, backend):
+                return ORTModelForSeq2SeqLM.from_pretrained(self.artifact_dir(repo, backend), use_cache=True)
+            return ORTModelForSeq2SeqLM.from_pretrained(repo, export=True, use_cache=True)
+
+        model = AutoModelForSeq2SeqLM.from_pretrained(repo)
+        if torch.cuda.is_available():
+            model = model.cuda()
+        return model
+
+    def _export_model(self, repo: str, backend: str) -> Path:
+        if backend not in ('int8', 'onnx'):
+            raise ValueError(f"Backend {backend} has no artifacts to export")
+        path = self.artifact_dir(repo, backend)
+        # Built in a temporary directory and renamed into place once complete,
+        # so a failed export never leaves a half-written cache behind
+        tmp_path = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir(parents=True)
         try:
-            self.title_tokenizer_ar = AutoTokenizer.from_pretrained("UBC-NLP/AraT5-base-title-generation")
-            self.title_model_ar = AutoModelForSeq2SeqLM.from_pretrained("UBC-NLP/AraT5-base-title-generation")
-            if torch.cuda.is_available():
-                self.title_model_ar = self.title_model_ar.cuda()
-            self.arabic_title_method = 'arat5'
-        except:
-            # Option 2: Fallback to mBART-50 (good multilingual support)
-            self.title_tokenizer_ar = AutoTokenizer.from_pretrained("facebook/mbart-large-50")
-            self.title_model_ar = AutoModelForSeq2SeqLM.from_pretrained("facebook/mbart-large-50")
-            if torch.cuda.is_available():
-                self.title_model_ar = self.title_model_ar.cuda()
-            self.arabic_title_method = 'mbart'
+            if backend == 'int8':
+                model = self.quantize_int8(AutoModelForSeq2SeqLM.from_pretrained(repo))
+                torch.save(model, tmp_path / 'model.pt')
+            else:
+                model = self._ort_model_class().from_pretrained(repo, export=True, use_cache=True)
+                model.save_pretrained(tmp_path)
+            (tmp_path / self.ARTIFACT_MARKER).touch()
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp_path, path)
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        return path
+
+    @staticmethod
+    def quantize_int8(model):
+        # Dynamic quantization: int8 weights for the linear layers, activations quantized on the fly
+        return torch.ao.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+
+    @staticmethod
+    def _ort_model_class():
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError as e:
+            raise ImportError("The onnx backend requires optimum[onnxruntime] to be installed") from e
+        return ORTModelForSeq2SeqLM
+
+    def generate(self, key: str, prompts: List[str], **params) -> List[str]:
+        """Run one ``generate`` call of model ``key`` over ``prompts``."""
+        return self.run(self.get(key), prompts, **params)
+
+    @staticmethod
+    def run(entry: Dict, prompts: List[str], **params) -> List[str]:
+        tokenizer = entry['tokenizer']
+        if entry.get('method') == 'mbart':
+            # mBART: Set source language
+            tokenizer.src_lang = "ar_AR"
+        if entry.get('prefix'):
+            prompts = [entry['prefix'] + prompt for prompt in prompts]
+        inputs = tokenizer(
+            prompts, return_tensors="pt", max_length=512, truncation=True, padding=True
+        )
+        if entry['backend'] == 'fp32' and torch.cuda.is_available():
+            inputs = inputs.to('cuda')
+
+        output_ids = entry['model'].generate(**inputs, **params)
+        return [
+            tokenizer.decode(ids, skip_special_tokens=True).strip()
+            for ids in output_ids
+        ]
+
+
+class GenerationTimeout(Exception):
+    """Raised when a generation exceeds its wall-clock budget (``max_time``)."""
+
+
+def decoding_params(call_site: str, profile: str = None) -> Dict:
+    """
+    Decode params of a named profile from GENERATION_PROFILES.
+    Defaults to the profile configured for the call site ('title' or 'summary').
+    """
+    name = profile or settings.GENERATION_CALL_SITE_PROFILES.get(call_site, 'quality')
+    if name not in settings.GENERATION_PROFILES:
+        raise ValueError(f"Unknown decoding profile: {name}")
+    return dict(settings.GENERATION_PROFILES[name])
+
+
+def generate_text(key: str, prompt: str, **params) -> str:
+    """
+    Generate text for a single prompt.
+    Deterministic decodes are served from the generation cache when possible.
+    Runs on the shared inference server when INFERENCE_SERVER_URL is set,
+    otherwise with the models of the current process.
+    Raises GenerationTimeout when ``max_time`` (seconds) is exceeded.
+    """
+    max_time = params.get('max_time')
+    cache = GenerationCache()
+    use_cache = cache.enabled and not params.get('do_sample')
+    if use_cache:
+        model_id = ModelManager().model_id(key)
+        # The budget does not change what a finished decode produces
+        cache_params = {k: v for k, v in params.items() if k != 'max_time'}
+        cache_key = cache.make_key(model_id, cache_params, prompt)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    started = time.monotonic()
+    client = InferenceClient.from_settings()
+    if client:
+        outputs, produced_by = client.generate_with_model_id(key, [prompt], **params)
+        output = outputs[0]
+        if produced_by:
+            ModelManager().remember_model_id(key, produced_by)
+    else:
+        output = generate_local(key, [prompt], **params)[0]
+        produced_by = ModelManager().model_id(key)
+
+    # generate() stops at max_time and returns a truncated decode: discard it
+    elapsed = time.monotonic() - started
+    if max_time and elapsed >= max_time:
+        raise GenerationTimeout(f"{key} generation exceeded its {max_time}s budget ({elapsed:.2f}s)")
+
+    # Only cache under the weights that actually produced the output: a fallback
+    # model's decode must not be served for the primary model's key
+    if use_cache and produced_by == model_id:
+        cache.set(cache_key, model_id, output)
+    return output
+
+
+def generate_texts(key: str, prompts: List[str], **params) -> List[str]:
+    """
+    Generate for several prompts in one call, bypassing the generation cache
+    (e.g. local translation, cached by the translation memory instead).
+    """
+    client = InferenceClient.from_settings()
+    if client:
+        return client.generate(key, prompts, **params)
+    return generate_local(key, prompts, **params)
+
+
+def generate_local(key: str, prompts: List[str], **params) -> List[str]:
+    """
+    Generate with the models of the current process. When ML_BATCHING_ENABLED,
+    prompts are micro-batched with those of concurrent callers.
+    """
+    scheduler = get_batch_scheduler()
+    if scheduler:
+        return scheduler.generate(key, prompts, **params)
+    return ModelManager().generate(key, prompts, **params)
+
+
+def get_batch_scheduler():
+    if not getattr(settings, 'ML_BATCHING_ENABLED', False):
+        return None
+    return BatchScheduler.shared(
+        ModelManager().generate,
+        window_ms=getattr(settings, 'ML_BATCHING_WINDOW_MS', 15),
+        max_batch_size=getattr(settings, 'ML_BATCHING_MAX_SIZE', 8),
+        result_timeout=getattr(settings, 'ML_BATCHING_RESULT_TIMEOUT', None),
+    )
 
 
 class ConversationExtractor:
@@ -73,7 +422,8 @@ class ConversationExtractor:
         chat_texts = []
 
         for conv in conversations:
-            lines = conv.lines.order_by('created_at')
+            lines = list(conv.lines.order_by('created_at'))
+            LineTranslationService().ensure_translated(lines, lang_code)
             chat_lines = []
 
             for line in lines:
@@ -93,11 +443,10 @@ class ChatAnalyzerService:
     """Analyze conversations and produce plain-text summaries."""
 
     def __init__(self):
-        self.model_manager = ModelManager()
         self.extractor = ConversationExtractor()
 
     def analyze_conversations(
-        self, conversation_ids: List[int], user: User, output_lang: str = 'en'
+        self, conversation_ids: List[int], user: User, output_lang: str = 'en', profile: str = None
     ) -> ConversationAnalysis:
         analysis = ConversationAnalysis.objects.create(
             user=user, output_lang=output_lang, status='processing'
@@ -109,7 +458,7 @@ class ChatAnalyzerService:
             # Link conversations
             analysis.conversations.set(Conversation.objects.filter(id__in=conversation_ids, user=user))
             # Perform analysis
-            result = self._perform_analysis(chat_texts, output_lang)
+            result = self._perform_analysis(chat_texts, output_lang, profile)
             # Save results
             self._save_results(analysis, result, output_lang)
             # Update user
@@ -124,14 +473,14 @@ class ChatAnalyzerService:
             raise
 
     def analyze_text(
-        self, messages: List[str], user: User, output_lang: str = 'en'
+        self, messages: List[str], user: User, output_lang: str = 'en', profile: str = None
     ) -> Dict:
         """Analyze raw user messages without saving conversations."""
         analysis = ConversationAnalysis.objects.create(
             user=user, output_lang=output_lang, status='processing'
         )
         try:
-            result = self._perform_analysis(messages, output_lang)
+            result = self._perform_analysis(messages, output_lang, profile)
             self._save_results(analysis, result, output_lang)
             self._update_user(user, result, output_lang)
             analysis.status = 'completed'
@@ -143,7 +492,7 @@ class ChatAnalyzerService:
             analysis.save()
             raise
 
-    def _perform_analysis(self, chat_texts: List[str], lang_code: str) -> Dict:
+    def _perform_analysis(self, chat_texts: List[str], lang_code: str, profile: str = None) -> Dict:
         """Core analysis logic."""
         user_messages = []
         bot_messages = []
@@ -155,7 +504,7 @@ class ChatAnalyzerService:
                 elif line.startswith('Bot:') or line.startswith('بوت:'):
                     bot_messages.append(re.sub(r'^(Bot:|بوت:)', '', line).strip())
 
-        summary = self._generate_summary(user_messages, lang_code)
+        summary = self._generate_summary(user_messages, lang_code, profile)
         
 
         return {
@@ -166,11 +515,13 @@ class ChatAnalyzerService:
             "total_bot_messages": len(bot_messages)
         }
 
-    def _generate_summary(self, messages: List[str], lang_code: str) -> str:
+    def _generate_summary(self, messages: List[str], lang_code: str, profile: str = None) -> str:
         """Generate thematic analysis of user interests."""
         if not messages:
             return "No user interactions to summarize." if lang_code == 'en' else "لا توجد محادثات للتحليل."
 
+        decode = decoding_params('summary', profile)
+
         # Combine messages with more context
         text_to_analyze = ' '.join(messages)[:800]
 
@@ -180,28 +531,21 @@ class ChatAnalyzerService:
 {text_to_analyze}
  بحثت في الآونة الأخيرة عن:"""
             try:
-                input_ids = self.model_manager.tokenizer_ar.encode(
-                    prompt, return_tensors="pt", max_length=512, truncation=True
-                )
-                if torch.cuda.is_available():
-                    input_ids = input_ids.cuda()
-                    
-                output_ids = self.model_manager.model_ar.generate(
-                    input_ids,
+                summary = generate_text(
+                    'summary_ar',
+                    prompt,
                     max_length=100,
                     min_length=20,
-                    num_beams=5,
                     no_repeat_ngram_size=3,
-                    early_stopping=True
+                    **decode
                 )
-                summary = self.model_manager.tokenizer_ar.decode(
-                    output_ids[0], skip_special_tokens=True
-                ).strip()
                 
                 # Validate output
                 if len(summary) < 10 or self._is_repetitive(summary):
                     summary = self._extract_topics_fallback(messages, 'ar')
                     
+            except GenerationTimeout:
+                summary = self._extract_topics_fallback(messages, 'ar')
             except Exception as e:
                 print(f"⚠ Arabic generation error: {e}")
                 summary = self._extract_topics_fallback(messages, 'ar')
@@ -214,16 +558,15 @@ User messages: {text_to_analyze}
 Analysis: The user asks about"""
             
             try:
-                result = self.model_manager.title_generator_en(
+                summary = generate_text(
+                    'title_en',
                     prompt,
                     max_length=80,
                     min_length=15,
-                    num_beams=5,
                     no_repeat_ngram_size=3,
-                    early_stopping=True,
-                    do_sample=False
+                    do_sample=False,
+                    **decode
                 )
-                summary = result[0]['generated_text'].strip()
                 
                 # Clean output
                 summary = self._clean_summary_output(summary)
@@ -236,6 +579,8 @@ Analysis: The user asks about"""
                     if not summary.endswith('.'):
                         summary += '.'
                         
+            except GenerationTimeout:
+                summary = self._extract_topics_fallback(messages, 'en')
             except Exception as e:
                 print(f"⚠ English generation error: {e}")
                 summary = self._extract_topics_fallback(messages, 'en')
@@ -378,32 +723,54 @@ Analysis: The user asks about"""
 class ConversationTitleService:
     """Service to generate conversation subject/title in English and Arabic."""
 
-    def __init__(self):
-        self.model_manager = ModelManager()
-
-    def regenerate_conversation_title(self, conversation_id: int, user: User) -> Conversation:
+    def regenerate_conversation_title(self, conversation_id: int, user: User, profile: str = None) -> Conversation:
         conversation = Conversation.objects.filter(id=conversation_id, user=user).first()
         if not conversation:
             raise ValueError("Conversation not found")
 
-        last_lines = conversation.lines.order_by('-created_at')[:6]
+        last_lines = list(conversation.lines.order_by('-created_at')[:6])
         if not last_lines:
             raise ValueError("No conversation lines found")
 
-        texts_en = [line.text_en for line in reversed(last_lines)]
-        texts_ar = [line.text_ar for line in reversed(last_lines)]
+        # Both titles need both languages: fill deferred translations first
+        LineTranslationService().ensure_translated(last_lines)
+        texts_en = [line.get_text('en') for line in reversed(last_lines)]
+        texts_ar = [line.get_text('ar') for line in reversed(last_lines)]
 
         # Generate titles using appropriate models
-        title_en = self._generate_topic_title(texts_en, lang='en')
-        title_ar = self._generate_topic_title(texts_ar, lang='ar')
+        title_en = self._generate_topic_title(texts_en, lang='en', profile=profile)
+        title_ar = self._generate_topic_title(texts_ar, lang='ar', profile=profile)
 
         conversation.title_en = title_en
         conversation.title_ar = title_ar
-        conversation.save(update_fields=['title_en', 'title_ar'])
+        conversation.title_status = TitleStatusEnum.GENERATED.value
+        conversation.save(update_fields=['title_en', 'title_ar', 'title_status'])
 
         return conversation
 
-    def _generate_topic_title(self, messages: List[str], lang: str) -> str:
+    def set_provisional_title(self, conversation: Conversation, texts_en: List[str], texts_ar: List[str]) -> Conversation:
+        """Instant keyword-based titles, replaced once the model titles are generated."""
+        conversation.title_en = self._extract_keywords(" ".join(texts_en)[:500], lang='en')
+        conversation.title_ar = self._extract_keywords(" ".join(texts_ar)[:500], lang='ar')
+        conversation.title_status = TitleStatusEnum.PROVISIONAL.value
+        conversation.save(update_fields=['title_en', 'title_ar', 'title_status'])
+        return conversation
+
+    def regenerate_after_commit(self, conversation_id: int, user: User, profile: str = None):
+        """Generate the model titles in the background once the current transaction commits."""
+        run_after_commit(self._regenerate_in_background, conversation_id, user.id, profile)
+
+    def _regenerate_in_background(self, conversation_id: int, user_id: int, profile: str = None):
+        user = User.objects.get(id=user_id)
+        try:
+            self.regenerate_conversation_title(conversation_id, user, profile)
+        except Exception:
+            Conversation.objects.filter(
+                id=conversation_id, title_status=TitleStatusEnum.PROVISIONAL.value
+            ).update(title_status=TitleStatusEnum.FAILED.value)
+            raise
+
+    def _generate_topic_title(self, messages: List[str], lang: str, profile: str = None) -> str:
         """Generate a short, topic-style title (English: Flan-T5, Arabic: AraT5/mBART)."""
         if not messages:
             return "No Title" if lang == 'en' else "بدون عنوان"
@@ -411,49 +778,19 @@ class ConversationTitleService:
         text = " ".join(messages)[:500]
 
         try:
+            decode = decoding_params('title', profile)
             if lang == 'ar':
-                # Use Arabic-specific models (AraT5 or mBART)
-                if self.model_manager.arabic_title_method == 'keywords':
-                    # Fallback to keyword extraction if models failed to load
-                    return self._extract_keywords(text, lang='ar')
-                
-                tokenizer = self.model_manager.title_tokenizer_ar
-                model = self.model_manager.title_model_ar
-                
-                if self.model_manager.arabic_title_method == 'arat5':
-                    # AraT5: Feed text directly without instruction
-                    input_ids = tokenizer.encode(
-                        text,
-                        return_tensors="pt",
-                        max_length=512,
-                        truncation=True
-                    )
-                elif self.model_manager.arabic_title_method == 'mbart':
-                    # mBART: Set source language
-                    tokenizer.src_lang = "ar_AR"
-                    input_ids = tokenizer.encode(
-                        text,
-                        return_tensors="pt",
-                        max_length=512,
-                        truncation=True
-                    )
-                
-                if torch.cuda.is_available():
-                    input_ids = input_ids.cuda()
-                
-                # Generate title
-                output_ids = model.generate(
-                    input_ids,
+                # Use Arabic-specific models (AraT5 or mBART): feed text directly without instruction
+                title = generate_text(
+                    'title_ar',
+                    text,
                     max_length=15,
                     min_length=3,
-                    num_beams=5,
-                    early_stopping=True,
                     no_repeat_ngram_size=2,
-                    length_penalty=0.8
+                    length_penalty=0.8,
+                    **decode
                 )
                 
-                title = tokenizer.decode(output_ids[0], skip_special_tokens=True).strip()
-                
                 # Check if result is valid
                 if not title or len(title.strip()) < 2 or title.isspace():
                     print(f"⚠ Arabic model returned empty/whitespace: '{title}'")
@@ -462,15 +799,14 @@ class ConversationTitleService:
             else:
                 # English: Use Flan-T5
                 prompt = f"Write a short and concise title for this conversation in 3-5 words only: {text}"
-                result = self.model_manager.title_generator_en(
+                title = generate_text(
+                    'title_en',
                     prompt,
                     max_length=20,
                     min_length=3,
                     do_sample=False,
-                    num_beams=5,
-                    early_stopping=True
+                    **decode
                 )
-                title = result[0]['generated_text'].strip()
                 
                 if not title or len(title.strip()) < 2:
                     return self._extract_keywords(text, lang='en')
@@ -489,6 +825,9 @@ class ConversationTitleService:
             
             return title
             
+        except GenerationTimeout:
+            # Over the latency budget: keyword title instead of waiting
+            return self._extract_keywords(text, lang)
         except Exception as e:
             print(f"❌ Error generating {lang} title: {e}")
             # Fallback to keyword extraction
@@ -0,0 +1,266 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator
+from django.conf import settings
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+from core.enums.enums import ModelUsedEnum
+
+
+class ProviderUnavailable(Exception):
+    """The provider is not called: its circuit is open or it has no free slot."""
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors, timeouts and connection errors are worth a retry."""
+    if isinstance(error, ProviderUnavailable):
+        return False
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    name = type(error).__name__
+    return 'Timeout' in name or 'Connection' in name
+
+
+class CircuitBreaker:
+    """
+    closed: calls go through; BREAKER_FAILURES failures within BREAKER_WINDOW
+    seconds open the circuit.
+    open: calls are rejected for BREAKER_COOLDOWN seconds.
+    half_open: a single trial call; success closes the circuit, failure reopens it.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failures: int, window: float, cooldown: float):
+        self.failures = failures
+        self.window = window
+        self.cooldown = cooldown
+        self._state = self.CLOSED
+        self._failure_times = deque()
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self._state = self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        state = self.state
+        with self._lock:
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._trial_in_flight = False
+            self._failure_times.clear()
+
+    def record_failure(self):
+        now = time.monotonic()
+        with self._lock:
+            self._trial_in_flight = False
+            self._failure_times.append(now)
+            while self._failure_times and now - self._failure_times[0] > self.window:
+                self._failure_times.popleft()
+            if self._state == self.HALF_OPEN or len(self._failure_times) >= self.failures:
+                self._state = self.OPEN
+                self._opened_at = now
+                self._failure_times.clear()
+
+
+class RetryBudget:
+    """
+    Token bucket shared by all providers, so retries stay a fraction of the
+    traffic: every call deposits ``ratio`` tokens (up to ``capacity``), every
+    retry spends one.
+    """
+
+    def __init__(self, ratio: float, capacity: float):
+        self.ratio = ratio
+        self.capacity = capacity
+        self._tokens = capacity
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.exhausted += 1
+            return False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'tokens': round(self._tokens, 2), 'capacity': self.capacity, 'exhausted': self.exhausted}
+
+
+class ProviderGuard:
+    """
+    Guard of the calls to one AI provider: at most AI_PROVIDER_MAX_IN_FLIGHT
+    concurrent calls (others wait up to AI_PROVIDER_QUEUE_TIMEOUT seconds for
+    a slot), a circuit breaker, and jittered exponential retries of transient
+    errors within the global retry budget.
+    """
+    _guards: Dict[str, 'ProviderGuard'] = {}
+    _guards_lock = threading.Lock()
+    _budget = None
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.max_in_flight = settings.AI_PROVIDER_MAX_IN_FLIGHT
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self.breaker = CircuitBreaker(
+            failures=settings.AI_PROVIDER_BREAKER_FAILURES,
+            window=settings.AI_PROVIDER_BREAKER_WINDOW,
+            cooldown=settings.AI_PROVIDER_BREAKER_COOLDOWN,
+        )
+        self._in_flight = 0
+        self._queued = 0
+        self._counters = {'calls': 0, 'retries': 0, 'rejected': 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get(cls, provider: str) -> 'ProviderGuard':
+        provider = ModelUsedEnum(provider).value
+        with cls._guards_lock:
+            if provider not in cls._guards:
+                cls._guards[provider] = cls(provider)
+            if cls._budget is None:
+                cls._budget = RetryBudget(
+                    ratio=settings.AI_PROVIDER_RETRY_BUDGET_RATIO,
+                    capacity=settings.AI_PROVIDER_RETRY_BUDGET_CAPACITY,
+                )
+            return cls._guards[provider]
+
+    @classmethod
+    def all_stats(cls) -> Dict:
+        with cls._guards_lock:
+            guards = list(cls._guards.values())
+            budget = cls._budget
+        return {
+            'providers': {guard.provider: guard.stats() for guard in guards},
+            'retry_budget': budget.stats() if budget else None,
+        }
+
+    def available(self) -> bool:
+        return self.breaker.state != CircuitBreaker.OPEN
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """``fn(*args, **kwargs)`` under the guard, retried on transient errors."""
+        self._budget.deposit()
+        for attempt in self._retrying():
+            with attempt:
+                with self._slot():
+                    return self._checked(fn, *args, **kwargs)
+
+    def stream(self, fn: Callable, *args, **kwargs) -> Iterator:
+        """
+        Iterate ``fn(*args, **kwargs)`` under the guard. Only failures before
+        the first chunk are retried; the slot is held until the stream ends.
+        """
+        self._budget.deposit()
+        for attempt in self._retrying():
+            with attempt:
+                slot = self._slot()
+                slot.__enter__()
+                try:
+                    iterator = iter(fn(*args, **kwargs))
+                    first = self._checked(next, iterator, None)
+                except BaseException:
+                    slot.__exit__(None, None, None)
+                    raise
+
+        try:
+            if first is None:
+                return
+            yield first
+            for chunk in iterator:
+                yield chunk
+        except Exception as e:
+            self._record_error(e)
+            raise
+        finally:
+            slot.__exit__(None, None, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'state': self.breaker.state,
+                'in_flight': self._in_flight,
+                'queued': self._queued,
+                'max_in_flight': self.max_in_flight,
+                **self._counters,
+            }
+
+    def _retrying(self) -> Retrying:
+        def out_of_budget(retry_state):
+            # Evaluated last: a token is only spent when a retry will happen
+            if not self._budget.try_spend():
+                return True
+            with self._lock:
+                self._counters['retries'] += 1
+            return False
+
+        return Retrying(
+            stop=stop_after_attempt(settings.AI_PROVIDER_RETRY_ATTEMPTS) | out_of_budget,
+            wait=wait_random_exponential(multiplier=0.5, max=settings.AI_PROVIDER_RETRY_MAX_WAIT),
+            retry=retry_if_exception(is_retryable),
+            reraise=True,
+        )
+
+    def _checked(self, fn: Callable, *args, **kwargs):
+        """One attempt, through the circuit breaker."""
+        if not self.breaker.allow():
+            self._reject(f"Provider {self.provider} is temporarily unavailable (circuit open)")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._record_error(e)
+            raise
+        self.breaker.record_success()
+        return result
+
+    def _record_error(self, error: Exception):
+        """Only provider-side errors count against the breaker, not bad requests."""
+        if is_retryable(error):
+            self.breaker.record_failure()
+
+    def _reject(self, message: str):
+        with self._lock:
+            self._counters['rejected'] += 1
+        raise ProviderUnavailable(message)
+
+    @contextmanager
+    def _slot(self):
+        """One of the max_in_flight call slots, waiting up to AI_PROVIDER_QUEUE_TIMEOUT."""
+        with self._lock:
+            self._queued += 1
+        acquired = self._slots.acquire(timeout=settings.AI_PROVIDER_QUEUE_TIMEOUT)
+        with self._lock:
+            self._queued -= 1
+            if acquired:
+                self._in_flight += 1
+                self._counters['calls'] += 1
+        if not acquired:
+            self._reject(f"Provider {self.provider} is saturated ({self.max_in_flight} calls in flight)")
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
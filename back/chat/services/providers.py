@@ -0,0 +1,121 @@
+from typing import Dict, Iterator, List
+from google import genai
+from chat.services.ai_clients import ProviderClientRegistry, provider_call
+from chat.services.provider_guard import ProviderGuard
+from core.enums.enums import ModelUsedEnum, SentByEnum
+
+SYSTEM_INSTRUCTION = """As an AI assistant, answer the user's question using your own knowledge.
+Include previous chat history for context but do not invent information.detect user language from the LAST {question} and respond in the same language.Note that languages supported are English and Arabic only . But you must strictly respond in one single language ! Start directly from yur answer, please do not mention the history before replying !!"""
+
+# model name per provider
+# view at https://openrouter.ai/deepseek/deepseek-chat-v3.1:free/api
+# view at https://openrouter.ai/openai/gpt-oss-20b:free
+PROVIDER_MODELS = {
+    ModelUsedEnum.GEMINI: "gemini-2.5-flash",
+    ModelUsedEnum.DEEPSEEK: "deepseek/deepseek-chat-v3.1:free",
+    ModelUsedEnum.GPT: "openai/gpt-oss-20b:free",
+}
+
+
+def get_ai_client(provider: str):
+    """
+    Return the shared, long-lived client for the requested AI provider.
+    """
+    return ProviderClientRegistry().get(provider)
+
+
+def provider_model(provider: str) -> str:
+    try:
+        return PROVIDER_MODELS[ModelUsedEnum(provider)]
+    except ValueError:
+        raise ValueError(f"Provider {provider} is not supported")
+
+
+def build_messages(turn: Dict) -> Dict:
+    """
+    Provider-neutral request of a chat turn: the system instruction (with the
+    conversation memory, if any) and the role-tagged turns, ending with the
+    new question. Roles are "user" and "assistant"; consecutive lines of the
+    same role are merged since providers expect alternating turns.
+    """
+    messages: List[Dict] = []
+    for line in turn["history"]:
+        text = line.get_text(turn["language"]).strip()
+        if not text:
+            continue
+        role = "user" if line.sent_by == SentByEnum.USER.value else "assistant"
+        if messages and messages[-1]["role"] == role:
+            messages[-1]["content"] += f"\n{text}"
+        else:
+            messages.append({"role": role, "content": text})
+
+    if messages and messages[-1]["role"] == "user":
+        messages[-1]["content"] += f"\n{turn['question']}"
+    else:
+        messages.append({"role": "user", "content": turn["question"]})
+
+    system_instruction = SYSTEM_INSTRUCTION
+    if turn.get("memory"):
+        system_instruction += f"\n\nSummary of the earlier conversation: {turn['memory']}"
+    return {"system": system_instruction, "messages": messages}
+
+
+def _gemini_request(model: str, request: Dict) -> Dict:
+    return {
+        "model": model,
+        "contents": [
+            genai.types.Content(
+                role="model" if message["role"] == "assistant" else "user",
+                parts=[genai.types.Part(text=message["content"])]
+            )
+            for message in request["messages"]
+        ],
+        "config": genai.types.GenerateContentConfig(system_instruction=request["system"]),
+    }
+
+
+def _openai_request(model: str, request: Dict) -> Dict:
+    return {
+        "model": model,
+        "messages": [{"role": "system", "content": request["system"]}] + request["messages"],
+    }
+
+
+def complete(provider: str, turn: Dict) -> str:
+    """Full answer of the provider to the turn."""
+    model = provider_model(provider)
+    request = build_messages(turn)
+    return ProviderGuard.get(provider).call(_complete, provider, model, request)
+
+
+def stream(provider: str, turn: Dict) -> Iterator[str]:
+    """Yield the answer of the provider to the turn as text chunks, as it produces them."""
+    model = provider_model(provider)
+    request = build_messages(turn)
+    return ProviderGuard.get(provider).stream(_stream, provider, model, request)
+
+
+def _complete(provider: str, model: str, request: Dict) -> str:
+    client = get_ai_client(provider)
+    with provider_call(provider):
+        if provider == ModelUsedEnum.GEMINI:
+            response = client.models.generate_content(**_gemini_request(model, request))
+            return response.text
+
+        completion = client.chat.completions.create(**_openai_request(model, request))
+        return completion.choices[0].message.content
+
+
+def _stream(provider: str, model: str, request: Dict) -> Iterator[str]:
+    client = get_ai_client(provider)
+    # Latency is recorded for the whole stream, until the last chunk
+    with provider_call(provider):
+        if provider == ModelUsedEnum.GEMINI:
+            for chunk in client.models.generate_content_stream(**_gemini_request(model, request)):
+                if chunk.text:
+                    yield chunk.text
+            return
+
+        for chunk in client.chat.completions.create(**_openai_request(model, request), stream=True):
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
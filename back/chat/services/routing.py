@@ -0,0 +1,178 @@
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Tuple
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from chat.services import providers
+from chat.services.ai_clients import ProviderClientRegistry
+from chat.services.provider_guard import ProviderGuard
+from core.enums.enums import ModelUsedEnum
+
+logger = logging.getLogger(__name__)
+
+# Value of the ``provider`` request field selecting latency-aware routing
+AUTO_PROVIDER = "auto"
+
+
+class ProviderRouter:
+    """
+    Latency-aware routing across the interchangeable chat providers.
+
+    Providers are ranked by rolling median latency among the healthy ones
+    (closed circuit, see ProviderGuard, and low error rate in
+    ProviderClientRegistry.window). ``complete`` sends the turn to the
+    first one and, if it has not answered by the hedge deadline (its p95
+    latency, clamped to CHAT_ROUTING_HEDGE_MIN/MAX_DELAY), also sends it to
+    the next one; the first successful answer wins. The slower request is
+    not cancelled (the SDK calls are blocking) but its outcome still feeds
+    the latency statistics. No hedge is sent while every routing worker is
+    busy: it would only queue behind other requests.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._executor = ThreadPoolExecutor(
+                        max_workers=settings.CHAT_ROUTING_WORKERS,
+                        thread_name_prefix="chat-routing",
+                    )
+                    instance._hedges = 0
+                    instance._hedge_wins = 0
+                    instance._hedges_skipped = 0
+                    instance._busy = 0
+                    instance._lock = threading.Lock()
+                    cls._instance = instance
+        return cls._instance
+
+    def ranked(self) -> List[str]:
+        """Configured providers, fastest healthy first, unhealthy ones last."""
+        registry = ProviderClientRegistry()
+
+        def sort_key(provider):
+            window = registry.window(provider)
+            healthy = (
+                ProviderGuard.get(provider).available()
+                and registry.is_healthy(provider)
+                and window['error_rate'] <= settings.CHAT_ROUTING_MAX_ERROR_RATE
+            )
+            # Providers without samples yet rank first so they get measured
+            return (not healthy, window['p50'] or 0.0, window['error_rate'])
+
+        known = {tag.value for tag in ModelUsedEnum}
+        providers = [provider for provider in settings.CHAT_ROUTING_PROVIDERS if provider in known]
+        if not providers:
+            raise ImproperlyConfigured(
+                f"CHAT_ROUTING_PROVIDERS names no known provider: {settings.CHAT_ROUTING_PROVIDERS!r}"
+            )
+        return sorted(providers, key=sort_key)
+
+    def hedge_delay(self, provider: str) -> float:
+        p95 = ProviderClientRegistry().window(provider)['p95']
+        if p95 is None:
+            return settings.CHAT_ROUTING_HEDGE_MAX_DELAY
+        return min(max(p95, settings.CHAT_ROUTING_HEDGE_MIN_DELAY), settings.CHAT_ROUTING_HEDGE_MAX_DELAY)
+
+    def complete(self, turn: Dict) -> Tuple[str, str]:
+        """Answer of the fastest provider, as (provider, answer)."""
+        candidates = self.ranked()
+        primary = candidates[0]
+        pending = {}
+        errors = []
+
+        def launch():
+            provider = candidates.pop(0)
+            pending[self._submit(providers.complete, provider, turn)] = provider
+            return self.hedge_delay(provider)
+
+        timeout = launch()
+        while pending:
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Deadline passed without an answer: hedge on the next provider
+                timeout = None
+                if candidates:
+                    with self._lock:
+                        hedge = self._busy < settings.CHAT_ROUTING_WORKERS
+                        if hedge:
+                            self._hedges += 1
+                        else:
+                            self._hedges_skipped += 1
+                    if hedge:
+                        launch()
+                continue
+
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    answer = future.result()
+                except Exception as e:
+                    errors.append(f"{provider}: {e}")
+                    logger.warning("Provider %s failed: %s", provider, e)
+                    continue
+                if provider != primary:
+                    with self._lock:
+                        self._hedge_wins += 1
+                return provider, answer
+
+            # Every request in flight failed: try the next provider right away
+            if not pending and candidates:
+                timeout = launch()
+
+        raise RuntimeError(f"All providers failed: {'; '.join(errors)}")
+
+    def _submit(self, fn, *args):
+        """``fn(*args)`` on the routing pool, counted while queued or running."""
+        with self._lock:
+            self._busy += 1
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        with self._lock:
+            self._busy -= 1
+
+    def stream(self, turn: Dict) -> Tuple[str, Iterator[str]]:
+        """
+        Stream from the fastest healthy provider, as (provider, chunks).
+        Streams are not hedged: the answer is already reaching the client.
+        """
+        provider = self.ranked()[0]
+        return provider, providers.stream(provider, turn)
+
+    def stats(self) -> Dict:
+        ranking = self.ranked()
+        with self._lock:
+            return {
+                "ranking": ranking,
+                "hedges": self._hedges,
+                "hedge_wins": self._hedge_wins,
+                "hedges_skipped": self._hedges_skipped,
+                "busy_workers": self._busy,
+            }
+
+
+def requested_provider(value: str = None) -> str:
+    """Provider of a request, ``auto`` by default when CHAT_ROUTING_DEFAULT is set."""
+    if value:
+        return value
+    return AUTO_PROVIDER if settings.CHAT_ROUTING_DEFAULT else ModelUsedEnum.GEMINI.value
+
+
+def complete(provider: str, turn: Dict) -> Tuple[str, str]:
+    """(provider that answered, answer) for a fixed provider or ``auto``."""
+    if provider == AUTO_PROVIDER:
+        return ProviderRouter().complete(turn)
+    return provider, providers.complete(provider, turn)
+
+
+def stream(provider: str, turn: Dict) -> Tuple[str, Iterator[str]]:
+    """(provider that answers, chunks) for a fixed provider or ``auto``."""
+    if provider == AUTO_PROVIDER:
+        return ProviderRouter().stream(turn)
+    return provider, providers.stream(provider, turn)
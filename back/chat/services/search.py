@@ -0,0 +1,164 @@
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchHeadline, SearchQuery, SearchRank, SearchVectorField, TrigramWordSimilarity,
+)
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Greatest
+from django.utils.html import escape
+
+from core.enums.enums import TranslationStatusEnum
+from core.models.conversation import Conversation
+from core.models.conversation_line import ConversationLine
+from core.utils.cursor import decode_cursor, encode_cursor
+from core.utils.search import NormalizeArabic
+
+# Highlight delimiters (private-use characters), turned into <mark> tags once
+# the headline is HTML-escaped
+START_SEL = "\ue000"
+STOP_SEL = "\ue001"
+
+
+def search_vector(language: str) -> RawSQL:
+    # Generated column of migration 0019, not a model field so regular reads never load it
+    return RawSQL(f'"core_conversationline"."search_{language}"', [], output_field=SearchVectorField())
+
+
+def search_queries(text: str) -> dict:
+    """websearch_to_tsquery of ``text`` per language, normalized the way the vectors are."""
+    return {
+        "en": SearchQuery(text, config='english', search_type='websearch'),
+        "ar": SearchQuery(NormalizeArabic(Value(text)), config='arabic', search_type='websearch'),
+    }
+
+
+def headline_query_ar(text: str) -> SearchQuery:
+    """
+    Query for the Arabic headlines, which run on the original text_ar (the
+    displayed spelling): the terms as typed or normalized, so a match is
+    highlighted whichever form the text uses.
+    """
+    return (
+        SearchQuery(text, config='arabic', search_type='websearch')
+        | SearchQuery(NormalizeArabic(Value(text)), config='arabic', search_type='websearch')
+    )
+
+
+def highlight(headline: str) -> str:
+    return escape(headline).replace(START_SEL, "<mark>").replace(STOP_SEL, "</mark>")
+
+
+class ConversationSearchService:
+    """
+    Full-text search over the user's messages in both languages.
+
+    A line matches on its ``search_en`` or ``search_ar`` tsvector and is
+    ranked by ts_rank, best first. Both GIN indexes lead with the line's
+    denormalized ``user_id``, so only the user's lines are read. Pages are
+    keyset on (rank, id) and the headlines (ts_headline) are only computed for
+    the rows of the page.
+
+    The first page also lists the conversations whose title matches (pg_trgm
+    word similarity, best first).
+    """
+
+    @staticmethod
+    def search_messages(user_id, text: str, language: str = "en", pageSize: int = 20, cursor: str = None):
+        queries = search_queries(text)
+        options = {
+            "start_sel": START_SEL,
+            "stop_sel": STOP_SEL,
+            "max_words": settings.CHAT_SEARCH_HEADLINE_MAX_WORDS,
+            "min_words": max(settings.CHAT_SEARCH_HEADLINE_MAX_WORDS // 2, 1),
+        }
+
+        queryset = ConversationLine.objects.filter(user_id=user_id, conversation__isnull=False).alias(
+            search_en=search_vector("en"),
+            search_ar=search_vector("ar"),
+        ).filter(
+            Q(search_en=queries["en"]) | Q(search_ar=queries["ar"])
+        ).annotate(
+            # double precision so the rank round-trips exactly through the cursor
+            rank=Cast(
+                Greatest(SearchRank(F("search_en"), queries["en"]), SearchRank(F("search_ar"), queries["ar"])),
+                FloatField()
+            ),
+        )
+
+        if cursor:
+            last_rank, last_id = ConversationSearchService.decode_search_cursor(cursor)
+            queryset = queryset.filter(Q(rank__lt=last_rank) | Q(rank=last_rank, id__lt=last_id))
+
+        rows = list(
+            queryset.order_by('-rank', '-id').annotate(
+                conversation_title=F(f'conversation__title_{language}'),
+                headline_en=SearchHeadline('text_en', queries["en"], config='english', **options),
+                headline_ar=SearchHeadline('text_ar', headline_query_ar(text), config='arabic', **options),
+            ).values(
+                'id', 'conversation_id', 'conversation_title', 'sent_by', 'created_at', 'language_id',
+                'translation_status', 'rank', 'headline_en', 'headline_ar'
+            )[:pageSize + 1]
+        )
+        has_next = len(rows) > pageSize
+        rows = rows[:pageSize]
+
+        items = []
+        for row in rows:
+            # Original language while the line is not translated
+            lang = language
+            if row['translation_status'] != TranslationStatusEnum.DONE.value and row['language_id']:
+                lang = row['language_id']
+            items.append({
+                "id": row['id'],
+                "conversation_id": row['conversation_id'],
+                "conversation_title": row['conversation_title'],
+                "sent_by": row['sent_by'],
+                "created_at": row['created_at'],
+                "rank": row['rank'],
+                "highlight": highlight(row.get(f'headline_{lang}') or row['headline_en']),
+            })
+
+        return {
+            "conversations": [] if cursor else ConversationSearchService.search_titles(user_id, text, language),
+            "items": items,
+            "pageSize": pageSize,
+            "nextCursor": encode_cursor([rows[-1]['rank'], rows[-1]['id']]) if has_next else None,
+        }
+
+    @staticmethod
+    def search_titles(user_id, text: str, language: str = "en") -> list:
+        """The user's conversations whose English or (normalized) Arabic title matches ``text``, best first."""
+        rows = Conversation.objects.filter(user_id=user_id).alias(
+            title_ar_normalized=NormalizeArabic('title_ar'),
+        ).filter(
+            # Trigram word similarity, served by the title GIN indexes
+            Q(title_en__trigram_word_similar=text)
+            | Q(title_ar_normalized__trigram_word_similar=NormalizeArabic(Value(text)))
+        ).annotate(
+            similarity=Cast(
+                Greatest(
+                    TrigramWordSimilarity(text, 'title_en'),
+                    TrigramWordSimilarity(NormalizeArabic(Value(text)), NormalizeArabic('title_ar')),
+                ),
+                FloatField()
+            ),
+        ).order_by('-similarity', '-last_message_at', '-id').values(
+            'id', 'title_en', 'title_ar', 'similarity'
+        )[:settings.CHAT_SEARCH_TITLE_HITS]
+
+        return [
+            {
+                "id": row['id'],
+                "title": row[f'title_{language}'] or row['title_en'] or row['title_ar'],
+                "similarity": row['similarity'],
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def decode_search_cursor(cursor: str):
+        """(rank, id) of a search cursor; raises ValueError."""
+        values = decode_cursor(cursor)
+        if len(values) != 2 or not isinstance(values[0], (int, float)) or not isinstance(values[1], int):
+            raise ValueError("Invalid cursor")
+        return float(values[0]), values[1]
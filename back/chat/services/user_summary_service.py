@@ -11,7 +11,7 @@ class UserSummaryService:
     def __init__(self):
         self.analyzer = ChatAnalyzerService()
 
-    def get_user_summary(self, user: User, lang_code: str = 'en') -> dict:
+    def get_user_summary(self, user: User, lang_code: str = 'en', profile: str = None) -> dict:
         """
         If the user's conversation quota is reached and no summary has been generated,
         automatically trigger summarization for the last conversations.
@@ -34,14 +34,16 @@ class UserSummaryService:
             analysis_ar =  self.analyzer.analyze_conversations(
                 conversation_ids=[conv.id for conv in last_conversations],
                 user=user,
-                output_lang='ar'
+                output_lang='ar',
+                profile=profile
             )
             
             
             analysis_en = self.analyzer.analyze_conversations(
                 conversation_ids=[conv.id for conv in last_conversations],
                 user=user,
-                output_lang='en'
+                output_lang='en',
+                profile=profile
             )
 
             # Reset user fields after summarization
@@ -1,3 +1,752 @@
-from django.test import TestCase
+import tempfile
+import time
+from datetime import timedelta
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from unittest import mock
 
-# Create your tests here.
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from chat.services import ai_clients, model as model_module
+from chat.services.ai_clients import ProviderClientRegistry
+from chat.services.batching import BatchScheduler
+from chat.services.chat_crud import ConversationService
+from chat.services.chat_turn import ChatTurnService
+from chat.services.context_builder import ContextBuilder, ConversationMemoryService
+from chat.services.line_translation import LineTranslationService
+from chat.services.model import ModelManager, generate_text
+from chat.services.provider_guard import CircuitBreaker, ProviderGuard, ProviderUnavailable, RetryBudget
+from chat.services.routing import ProviderRouter
+from core.models import Conversation, ConversationAnalysis, ConversationLine, GenerationCacheEntry, Language, User
+from config.settings.base import _parse_model_backends, _parse_routing_providers
+
+
+class ApiTestCase(TestCase):
+    """Authenticated API client and the two languages of the app."""
+
+    def setUp(self):
+        Language.objects.create(language_code="en", language_name="English")
+        Language.objects.create(language_code="ar", language_name="Arabic")
+        self.user = User.objects.create_user("user@example.com", "password", is_active=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class BatchSchedulerTests(SimpleTestCase):
+    def test_concurrent_prompts_share_one_batch(self):
+        calls = []
+
+        def runner(key, prompts, **params):
+            calls.append(list(prompts))
+            return [p.upper() for p in prompts]
+
+        scheduler = BatchScheduler(runner, window_ms=50, max_batch_size=8)
+        futures = [scheduler.submit("k", p) for p in ("a", "b", "c")]
+
+        self.assertEqual([f.result(timeout=2) for f in futures], ["A", "B", "C"])
+        self.assertEqual(calls, [["a", "b", "c"]])
+
+    def test_short_runner_output_fails_every_caller(self):
+        scheduler = BatchScheduler(lambda key, prompts, **params: prompts[:-1], window_ms=1, result_timeout=2)
+
+        with self.assertRaises(RuntimeError):
+            scheduler.generate("k", ["a", "b"])
+
+    def test_generate_times_out(self):
+        scheduler = BatchScheduler(
+            lambda key, prompts, **params: time.sleep(0.5) or prompts, window_ms=1, result_timeout=0.05
+        )
+
+        with self.assertRaises(FutureTimeoutError):
+            scheduler.generate("k", ["a"])
+
+
+@override_settings(ML_MODELS_MEMORY_BUDGET_MB=250)
+class ModelMemoryBudgetTests(SimpleTestCase):
+    KEYS = ("title_en", "title_ar", "summary_ar")
+
+    def setUp(self):
+        self.manager = ModelManager()
+        for key in self.KEYS:
+            self.manager.evict(key)
+            self.addCleanup(self.manager.evict, key)
+            self.addCleanup(self.manager._model_ids.pop, key, None)
+        entry = {"repo": "org/model", "backend": "fp32", "model": object()}
+        for name, kwargs in (
+            ("load_entry", {"side_effect": lambda key: dict(entry)}),
+            ("_module_size_bytes", {"side_effect": lambda obj: 100 * 1024 * 1024 if obj is entry["model"] else 0}),
+        ):
+            patcher = mock.patch.object(ModelManager, name, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_least_recently_used_model_is_evicted(self):
+        self.manager.get("title_en")
+        self.manager.get("title_ar")
+        self.manager.get("title_en")
+
+        self.manager.get("summary_ar")
+
+        loaded = {key for key in self.KEYS if self.manager.stats()["models"][key]["loaded"]}
+        self.assertEqual(loaded, {"title_en", "summary_ar"})
+        self.assertLessEqual(self.manager.resident_mb(), 250)
+
+
+class ModelArtifactTests(SimpleTestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        settings_override = override_settings(ML_MODEL_CACHE_DIR=cache_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.manager = ModelManager()
+
+    def test_failed_export_leaves_no_cache(self):
+        with mock.patch.object(model_module, "AutoModelForSeq2SeqLM") as auto_model:
+            auto_model.from_pretrained.side_effect = OSError("download failed")
+            with self.assertRaises(OSError):
+                self.manager._export_model("org/model", "int8")
+
+        path = self.manager.artifact_dir("org/model", "int8")
+        self.assertFalse(path.exists())
+        self.assertFalse(self.manager.artifacts_ready("org/model", "int8"))
+
+    def test_export_is_marked_complete(self):
+        def save(model, path):
+            path.write_bytes(b"weights")
+
+        with mock.patch.object(model_module, "AutoModelForSeq2SeqLM"), \
+                mock.patch.object(ModelManager, "quantize_int8", side_effect=lambda m: m), \
+                mock.patch.object(model_module.torch, "save", side_effect=save, create=True):
+            path = self.manager._export_model("org/model", "int8")
+
+        self.assertTrue((path / "model.pt").exists())
+        self.assertTrue(self.manager.artifacts_ready("org/model", "int8"))
+
+    def test_empty_artifact_dir_is_not_a_cache(self):
+        self.manager.artifact_dir("org/model", "onnx").mkdir(parents=True)
+
+        self.assertFalse(self.manager.artifacts_ready("org/model", "onnx"))
+
+
+class ModelBackendsSettingTests(SimpleTestCase):
+    def test_parses_entries(self):
+        self.assertEqual(
+            _parse_model_backends("summary_ar=onnx, title_en=int8"),
+            {"summary_ar": "onnx", "title_en": "int8"},
+        )
+
+    def test_names_the_bad_entry(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, "'title_en'"):
+            _parse_model_backends("summary_ar=onnx,title_en")
+        with self.assertRaisesMessage(ImproperlyConfigured, "'title_en=fp16'"):
+            _parse_model_backends("title_en=fp16")
+
+
+@override_settings(ML_BATCHING_ENABLED=False, INFERENCE_SERVER_URL='', GENERATION_CACHE_ENABLED=True)
+class ModelFallbackIdTests(TestCase):
+    def setUp(self):
+        ModelManager().evict("title_ar")
+        ModelManager()._model_ids.pop("title_ar", None)
+        self.addCleanup(ModelManager().evict, "title_ar")
+        self.addCleanup(ModelManager()._model_ids.pop, "title_ar", None)
+
+    def _load_fallback(self):
+        def tokenizer(repo):
+            if repo == ModelManager.MODEL_SPECS["title_ar"]["repo"]:
+                raise OSError("primary unavailable")
+            return object()
+
+        return mock.patch.multiple(
+            model_module,
+            AutoTokenizer=mock.Mock(from_pretrained=mock.Mock(side_effect=tokenizer)),
+        )
+
+    def test_model_id_is_the_loaded_fallback(self):
+        with self._load_fallback(), mock.patch.object(ModelManager, "_load_model", return_value=object()):
+            ModelManager().get("title_ar")
+
+        self.assertEqual(ModelManager().model_id("title_ar"), "facebook/mbart-large-50:fp32")
+
+    def test_fallback_output_is_not_cached_under_the_primary_id(self):
+        with self._load_fallback(), mock.patch.object(ModelManager, "_load_model", return_value=object()), \
+                mock.patch.object(ModelManager, "run", return_value=["عنوان"]):
+            generate_text("title_ar", "نص المحادثة", num_beams=4)
+            generate_text("title_ar", "نص المحادثة", num_beams=4)
+
+        self.assertEqual(
+            list(GenerationCacheEntry.objects.values_list("model_id", flat=True)),
+            ["facebook/mbart-large-50:fp32"],
+        )
+
+
+class DecodingProfileValidationTests(ApiTestCase):
+    def test_user_summary_rejects_unknown_profile(self):
+        response = self.client.get("/api/chat/user-summary/", {"decoding_profile": "bogus"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ConversationAnalysis.objects.exists())
+
+    def test_title_regeneration_rejects_unknown_profile(self):
+        conversation = Conversation.objects.create(user=self.user, title_en="Title", title_ar="عنوان")
+
+        with mock.patch.object(model_module.ConversationTitleService, "regenerate_conversation_title") as regenerate:
+            response = self.client.patch(
+                f"/api/chat/conversations/{conversation.id}/title?decoding_profile=bogus"
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["info"], "VALIDATION_ERROR")
+        regenerate.assert_not_called()
+
+    def test_chat_message_rejects_unknown_profile(self):
+        for url in ("/api/chat/message", "/api/chat/message/stream"):
+            with mock.patch("chat.services.routing.complete") as complete, \
+                    mock.patch("chat.services.routing.stream") as stream:
+                response = self.client.post(url, {"text": "A question", "decoding_profile": "bogus"}, format="json")
+
+            self.assertEqual(response.status_code, 400, url)
+            self.assertEqual(response.json()["info"], "VALIDATION_ERROR")
+            complete.assert_not_called()
+            stream.assert_not_called()
+        self.assertFalse(Conversation.objects.exists())
+
+    def test_unknown_profile_falls_back_to_a_keyword_title(self):
+        title = model_module.ConversationTitleService()._generate_topic_title(
+            ["Invoices for the March order"], "en", profile="bogus"
+        )
+
+        self.assertTrue(title)
+
+
+@override_settings(CHAT_TRANSLATION_MODE="lazy", CHAT_MEMORY_ENABLED=False)
+class ChatTurnCounterTests(ApiTestCase):
+    def post_message(self, **data):
+        with mock.patch("chat.services.routing.complete", return_value=("Gemini", "An answer")):
+            return self.client.post("/api/chat/message", {"text": "A question", "provider": "Gemini", **data}, format="json")
+
+    def test_each_turn_is_counted_with_a_stale_user(self):
+        # force_authenticate hands the same, never refreshed, user to every request
+        User.objects.filter(id=self.user.id).update(last_analysis_summary_en="kept")
+        conversation_id = self.post_message().json()["data"]["conversation"]["id"]
+        User.objects.filter(id=self.user.id).update(conversations_count=F("conversations_count") + 5)
+
+        self.post_message(conversation_id=conversation_id)
+
+        user = User.objects.get(id=self.user.id)
+        self.assertEqual(user.conversations_count, 7)
+        self.assertEqual(user.last_analysis_summary_en, "kept")
+
+    def test_reaching_the_quota_clears_last_summary_generated(self):
+        User.objects.filter(id=self.user.id).update(
+            conversations_count=F("conversations_quota") - 1, last_summary_generated=True
+        )
+
+        self.post_message()
+
+        self.assertFalse(User.objects.get(id=self.user.id).last_summary_generated)
+
+
+@override_settings(CHAT_TRANSLATION_MODE="lazy", CHAT_MEMORY_ENABLED=False)
+class ChatMessageTests(ApiTestCase):
+    def post_message(self, **data):
+        with mock.patch("chat.services.routing.complete", return_value=("Gemini", "An answer")) as complete:
+            response = self.client.post("/api/chat/message", {"text": "A question", "provider": "Gemini", **data}, format="json")
+        return response, complete
+
+    def test_retried_message_is_answered_once(self):
+        first, _ = self.post_message(client_message_id="retry-1")
+        conversation_id = first.json()["data"]["conversation"]["id"]
+
+        retry, complete = self.post_message(client_message_id="retry-1", conversation_id=conversation_id)
+
+        self.assertEqual(retry.status_code, 200)
+        complete.assert_not_called()
+        self.assertEqual(ConversationLine.objects.count(), 2)
+        self.assertEqual(retry.json()["data"]["conversation"]["id"], conversation_id)
+
+    def test_persisted_turn_returns_the_updated_conversation(self):
+        conversation_id = self.post_message()[0].json()["data"]["conversation"]["id"]
+        turn = ChatTurnService.prepare(user=self.user, question="Another question", conversation_id=conversation_id)
+
+        conversation, _, bot_line = ChatTurnService.persist(
+            turn, user=self.user, provider="Gemini", answer="Another answer", user_text=None, bot_text=None
+        )
+
+        self.assertEqual(conversation.message_count, 4)
+        self.assertEqual(conversation.last_message_at, bot_line.created_at)
+        self.assertEqual(conversation.last_message_snippet, "Another answer")
+
+    def test_compact_response_returns_only_the_new_lines(self):
+        first, _ = self.post_message()
+        conversation_id = first.json()["data"]["conversation"]["id"]
+
+        response, _ = self.post_message(conversation_id=conversation_id, response_mode="compact")
+
+        data = response.json()["data"]
+        self.assertEqual([line["sent_by"] for line in data["lines"]], ["User", "Bot"])
+        self.assertEqual(data["lines"][1]["text_en"], "An answer")
+        self.assertNotIn("lines", data["conversation"])
+
+
+@override_settings(
+    CHAT_CONTEXT_MAX_LINES=4, CHAT_MEMORY_FOLD_BATCH=3, CHAT_CONTEXT_TOKEN_BUDGET=3000,
+    CHAT_MEMORY_CHUNK_CHARS=1000, CHAT_MEMORY_MAX_CHARS=100000, CHAT_MEMORY_ENABLED=True,
+)
+class ConversationMemoryTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.conversation = Conversation.objects.create(user=self.user, title_en="Memory")
+        self.prompts = []
+
+        def summarize(key, prompt, **params):
+            self.prompts.append(prompt)
+            return f"Summary number {len(self.prompts)}."
+
+        patcher = mock.patch("chat.services.context_builder.generate_text", side_effect=summarize)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def add_lines(self, count, text="A line of the conversation."):
+        for i in range(count):
+            ConversationLine.objects.create(
+                conversation=self.conversation, language_id="en", sent_by="User" if i % 2 == 0 else "Bot",
+                text_en=f"{text} {i}", text_ar=f"{text} {i}",
+            )
+
+    def test_every_line_is_summarized_or_sent(self):
+        for _ in range(20):
+            self.add_lines(2)
+            ConversationMemoryService().update(self.conversation.id)
+            self.conversation.refresh_from_db()
+
+            sent = {line.id for line in ContextBuilder.build(self.conversation, "en")["lines"]}
+            summarized = set(
+                ConversationLine.objects.filter(id__lte=self.conversation.memory_line_id or 0).values_list("id", flat=True)
+            )
+            self.assertEqual(sent | summarized, set(ConversationLine.objects.values_list("id", flat=True)))
+            self.assertFalse(sent & summarized)
+
+        # Folded in batches, not on every turn
+        self.assertLess(len(self.prompts), 20)
+
+    def test_long_backlog_is_folded_in_bounded_chunks(self):
+        self.add_lines(120, text="x" * 90)
+
+        ConversationMemoryService().update(self.conversation.id)
+
+        self.conversation.refresh_from_db()
+        self.assertGreater(len(self.prompts), 1)
+        self.assertTrue(all(len(prompt) < 1500 for prompt in self.prompts))
+        kept = ConversationLine.objects.filter(id__gt=self.conversation.memory_line_id).count()
+        self.assertEqual(kept, 4)
+
+    @override_settings(CHAT_CONTEXT_TOKEN_BUDGET=30)
+    def test_lines_over_the_budget_stay_in_the_prompt_summary(self):
+        self.add_lines(1, text="An early question about invoices")
+        self.add_lines(1, text="y" * 400)
+
+        context = ContextBuilder.build(self.conversation, "en")
+
+        self.assertEqual(len(context["lines"]), 1)
+        self.assertIn("An early question about invoices", context["summary"])
+
+
+@override_settings(CHAT_TRANSLATION_MODE="lazy")
+class LazyTranslationReadTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.conversation = Conversation.objects.create(user=self.user, title_en="Lazy", message_count=1)
+        self.line = ConversationLine.objects.create(
+            conversation=self.conversation, language_id="en", text_en="Good morning",
+            text_html_en="<p>Good morning</p>", translation_status="pending",
+        )
+
+    def get_messages(self):
+        return self.client.get(f"/api/chat/conversations/{self.conversation.id}/messages/", {"language_code": "ar"})
+
+    @mock.patch("chat.services.line_translation.translate_texts", return_value=["صباح الخير"])
+    def test_read_serves_the_original_and_translates_in_the_background(self, translate):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.get_messages()
+            self.get_messages()
+
+        item = response.json()["data"]["items"][0]
+        self.assertEqual((item["text"], item["language_code"]), ("<p>Good morning</p>", "en"))
+        translate.assert_not_called()
+        # Queued once, however many readers
+        self.assertEqual(len(callbacks), 1)
+
+        with mock.patch("chat.services.background.run_in_background", side_effect=lambda fn, *a, **kw: fn(*a, **kw)):
+            callbacks[0]()
+
+        self.line.refresh_from_db()
+        self.assertEqual((self.line.text_ar, self.line.translation_status), ("صباح الخير", "done"))
+
+    @mock.patch("chat.services.line_translation.translate_texts", side_effect=RuntimeError("quota exceeded"))
+    def test_failed_lines_are_not_retried_on_read(self, translate):
+        with mock.patch("chat.services.background.run_in_background", side_effect=lambda fn, *a, **kw: fn(*a, **kw)), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.get_messages()
+        self.line.refresh_from_db()
+        self.assertEqual(self.line.translation_status, "failed")
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            item = self.get_messages().json()["data"]["items"][0]
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(translate.call_count, 1)
+        self.assertEqual(item["language_code"], "en")
+
+
+class MessagesETagTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.conversation = Conversation.objects.create(user=self.user, title_en="ETag", message_count=1)
+        self.line = ConversationLine.objects.create(
+            conversation=self.conversation, language_id="en", text_en="Good morning", translation_status="pending",
+        )
+        self.url = f"/api/chat/conversations/{self.conversation.id}/messages/"
+
+    def get(self, etag=None, **params):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(self.url, {"language_code": "ar", **params}, **headers)
+
+    def test_unchanged_query_is_not_modified(self):
+        etag = self.get()["ETag"]
+
+        self.assertEqual(self.get(etag).status_code, 304)
+        self.assertEqual(self.get(f'W/"other", {etag}').status_code, 304)
+        self.assertEqual(self.get("*").status_code, 304)
+        self.assertEqual(self.get('W/"other"').status_code, 200)
+
+    def test_each_query_has_its_own_etag(self):
+        etag = self.get()["ETag"]
+
+        for params in ({"pageSize": 5}, {"pageNumber": 2}, {"before": self.line.id}, {"since": 0}, {"language_code": "en"}):
+            response = self.get(etag, **params)
+            self.assertEqual(response.status_code, 200, params)
+            self.assertNotEqual(response["ETag"], etag)
+        # Same query spelled differently
+        self.assertEqual(self.get(etag, pageSize=10, pageNumber=1).status_code, 304)
+
+    @mock.patch("chat.services.line_translation.translate_texts", return_value=["صباح الخير"])
+    def test_translation_changes_the_etag(self, translate):
+        etag = self.get()["ETag"]
+
+        LineTranslationService().backfill()
+
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["items"][0]["text"], "<p>صباح الخير</p>")
+
+    @override_settings(CHAT_TRANSLATION_MODE="eager", CHAT_MEMORY_ENABLED=False)
+    def test_new_turn_changes_the_etag(self):
+        etag = self.get()["ETag"]
+
+        with mock.patch("chat.services.routing.complete", return_value=("Gemini", "An answer")), \
+                mock.patch("chat.services.chat_turn.translate_texts", side_effect=lambda texts, *a, **kw: texts):
+            self.client.post("/api/chat/message", {
+                "text": "A question", "provider": "Gemini", "conversation_id": self.conversation.id
+            }, format="json")
+
+        self.assertEqual(self.get(etag).status_code, 200)
+
+
+class SearchMessagesTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.conversation = Conversation.objects.create(user=self.user, title_en="Invoices", title_ar="الفواتير")
+
+    def add_line(self, conversation=None, **texts):
+        conversation = conversation or self.conversation
+        return ConversationLine.objects.create(conversation=conversation, user=conversation.user, **texts)
+
+    def search(self, q, **params):
+        return self.client.get("/api/chat/search", {"q": q, **params}).json()["data"]
+
+    def test_arabic_highlight_keeps_the_original_spelling(self):
+        self.add_line(language_id="ar", text_ar="أرسلت الفاتورة إلى المحاسب", text_en="I sent the invoice")
+
+        data = self.search("الفاتورة", language_code="ar")
+
+        self.assertEqual(len(data["items"]), 1)
+        highlight = data["items"][0]["highlight"]
+        self.assertIn("أرسلت", highlight)
+        self.assertIn("إلى", highlight)
+        self.assertIn("<mark>", highlight)
+
+    def test_only_the_users_lines_are_searched(self):
+        other = User.objects.create_user("other@example.com", "password", is_active=True)
+        self.add_line(Conversation.objects.create(user=other), language_id="en", text_en="Invoice of the other user")
+        line = self.add_line(language_id="en", text_en="Where is my invoice?")
+
+        data = self.search("invoice")
+
+        self.assertEqual([item["id"] for item in data["items"]], [line.id])
+
+    def test_first_page_lists_matching_titles(self):
+        Conversation.objects.create(user=self.user, title_en="Holidays")
+        for i in range(3):
+            self.add_line(language_id="en", text_en=f"Invoice number {i}")
+
+        first = self.search("invoices", pageSize=2)
+        second = self.search("invoices", pageSize=2, cursor=first["nextCursor"])
+
+        self.assertEqual([hit["id"] for hit in first["conversations"]], [self.conversation.id])
+        self.assertEqual(first["conversations"][0]["title"], "Invoices")
+        self.assertEqual(second["conversations"], [])
+        self.assertEqual(len(first["items"]) + len(second["items"]), 3)
+
+
+class ServerError(Exception):
+    status_code = 503
+
+
+@override_settings(
+    AI_PROVIDER_BREAKER_FAILURES=2, AI_PROVIDER_BREAKER_WINDOW=60, AI_PROVIDER_BREAKER_COOLDOWN=60,
+    AI_PROVIDER_RETRY_ATTEMPTS=3, AI_PROVIDER_RETRY_MAX_WAIT=0, AI_PROVIDER_MAX_IN_FLIGHT=2,
+    AI_PROVIDER_QUEUE_TIMEOUT=0.01,
+)
+class ProviderGuardTests(SimpleTestCase):
+    def setUp(self):
+        self.guard = ProviderGuard("Gemini")
+        budget = ProviderGuard._budget
+        self.addCleanup(setattr, ProviderGuard, "_budget", budget)
+        ProviderGuard._budget = RetryBudget(ratio=0, capacity=10)
+
+    def test_transient_errors_are_retried(self):
+        fn = mock.Mock(side_effect=[ServerError(), "answer"])
+
+        self.assertEqual(self.guard.call(fn), "answer")
+        self.assertEqual(fn.call_count, 2)
+        self.assertEqual(self.guard.stats()["retries"], 1)
+
+    def test_client_errors_are_not_retried(self):
+        fn = mock.Mock(side_effect=ValueError("bad request"))
+
+        with self.assertRaises(ValueError):
+            self.guard.call(fn)
+        self.assertEqual(fn.call_count, 1)
+
+    def test_retries_stop_when_the_budget_is_spent(self):
+        ProviderGuard._budget = RetryBudget(ratio=0, capacity=1)
+        fn = mock.Mock(side_effect=ServerError())
+
+        with self.assertRaises(ServerError):
+            self.guard.call(fn)
+        # One retry paid by the only token
+        self.assertEqual(fn.call_count, 2)
+        self.assertEqual(ProviderGuard._budget.stats()["exhausted"], 1)
+
+    def test_open_circuit_rejects_calls(self):
+        fn = mock.Mock(side_effect=ServerError())
+
+        # The second failure opens the circuit: the third attempt is not made
+        with self.assertRaises(ProviderUnavailable):
+            self.guard.call(fn)
+        self.assertEqual(fn.call_count, 2)
+        self.assertEqual(self.guard.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.guard.available())
+        with self.assertRaises(ProviderUnavailable):
+            self.guard.call(mock.Mock(return_value="answer"))
+
+    def test_client_errors_do_not_open_the_circuit(self):
+        error = ServerError()
+        error.status_code = 400
+        for _ in range(3):
+            with self.assertRaises(ServerError):
+                self.guard.call(mock.Mock(side_effect=error))
+            with self.assertRaises(ValueError):
+                self.guard.call(mock.Mock(side_effect=ValueError("bad request")))
+
+        self.assertEqual(self.guard.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.guard.call(mock.Mock(return_value="answer")), "answer")
+
+    def test_half_open_circuit_allows_one_trial(self):
+        breaker = CircuitBreaker(failures=1, window=60, cooldown=0)
+        breaker.record_failure()
+
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_saturated_provider_rejects_calls(self):
+        with self.guard._slot(), self.guard._slot():
+            with self.assertRaises(ProviderUnavailable):
+                self.guard.call(mock.Mock(return_value="answer"))
+
+
+class MessagesDeltaSyncTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.conversation = Conversation.objects.create(user=self.user, title_en="Sync", message_count=4)
+        self.lines = [
+            ConversationLine.objects.create(
+                conversation=self.conversation, user=self.user, language_id="en", text_en=f"Line {i}",
+            )
+            for i in range(4)
+        ]
+
+    def sync(self, since):
+        return ConversationService.get_conversation_messages(
+            self.conversation.id, pageSize=10, user_id=self.user.id, language_code="en", since=since
+        )
+
+    def ids(self, lines):
+        return [line.id for line in lines]
+
+    def test_since_returns_only_newer_lines(self):
+        page = self.sync(str(self.lines[1].id))
+
+        self.assertEqual([item["id"] for item in page["items"]], self.ids(self.lines[2:]))
+        self.assertEqual(page["nextSince"], self.lines[-1].id)
+        self.assertEqual(self.sync(str(page["nextSince"]))["items"], [])
+
+    def test_first_poll_returns_every_line(self):
+        page = self.sync("0")
+
+        self.assertEqual([item["id"] for item in page["items"]], self.ids(self.lines))
+        self.assertEqual(page["nextSince"], self.lines[-1].id)
+
+    def test_unknown_or_foreign_anchor_falls_back_to_the_id(self):
+        other = ConversationLine.objects.create(
+            conversation=Conversation.objects.create(user=self.user), user=self.user, language_id="en", text_en="Other",
+        )
+        deleted_id = self.lines[1].id
+        self.lines[1].delete()
+
+        self.assertEqual([item["id"] for item in self.sync(str(deleted_id))["items"]], self.ids(self.lines[2:]))
+        self.assertEqual([item["id"] for item in self.sync(str(other.id))["items"]], [])
+
+
+class ConversationListPaginationTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        self.conversations = [
+            Conversation.objects.create(user=self.user, title_en=f"Conversation {i}", last_message_at=now - timedelta(minutes=i % 3))
+            for i in range(7)
+        ]
+
+    def get_page(self, **params):
+        return self.client.get("/api/chat/conversation", {"pageSize": 3, **params})
+
+    def test_cursor_pages_cover_every_conversation_once(self):
+        ids, cursor = [], ""
+        while cursor is not None:
+            data = self.get_page(cursor=cursor).json()["data"]
+            self.assertIsNone(data["totalPages"])
+            ids += [item["id"] for item in data["items"]]
+            cursor = data["nextCursor"]
+
+        expected = Conversation.objects.order_by("-last_message_at", "-id").values_list("id", flat=True)
+        self.assertEqual(ids, list(expected))
+
+    def test_offset_pages_count_the_total(self):
+        data = self.get_page(pageNumber=3).json()["data"]
+
+        self.assertEqual((data["totalPages"], len(data["items"]), data["nextCursor"]), (3, 1, None))
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertEqual(self.get_page(cursor="not-a-cursor").status_code, 400)
+
+
+class ConversationMessagesPaginationTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.conversation = Conversation.objects.create(user=self.user, title_en="Pages", message_count=7)
+        created_at = timezone.now()
+        self.lines = []
+        for i in range(7):
+            line = ConversationLine.objects.create(
+                conversation=self.conversation, user=self.user, language_id="en",
+                text_en=f"Line {i}", text_html_en=f"<p>Line {i}</p>",
+            )
+            # Pairs share a timestamp, as the two lines of a turn can
+            ConversationLine.objects.filter(id=line.id).update(created_at=created_at + timedelta(seconds=i // 2))
+            self.lines.append(line)
+
+    def get_messages(self, **params):
+        return ConversationService.get_conversation_messages(
+            self.conversation.id, pageSize=3, user_id=self.user.id, language_code="en", **params
+        )
+
+    def test_before_pages_walk_back_through_every_line(self):
+        page = self.get_messages()
+        ids = [item["id"] for item in page["items"]]
+        while page["hasMore"]:
+            page = self.get_messages(before=page["nextBefore"])
+            ids = [item["id"] for item in page["items"]] + ids
+
+        self.assertEqual(ids, [line.id for line in self.lines])
+
+    def test_page_queries_do_not_grow_with_the_page(self):
+        with self.assertNumQueries(2):
+            self.get_messages(before=self.lines[-1].id)
+        with self.assertNumQueries(2):
+            ConversationService.get_conversation_messages(
+                self.conversation.id, pageSize=7, user_id=self.user.id, language_code="en"
+            )
+
+
+@override_settings(AI_PROVIDER_CONNECT_TIMEOUT=3, AI_PROVIDER_READ_TIMEOUT=40)
+class ProviderClientTests(SimpleTestCase):
+    def test_gemini_client_gets_connect_and_read_timeouts(self):
+        self.addCleanup(ProviderClientRegistry()._client_stats.pop, ("gemini", "test"), None)
+        with mock.patch.object(ai_clients.genai, "Client") as client:
+            ProviderClientRegistry()._create_client("gemini", "key", ("gemini", "test"))
+
+        self.assertEqual(client.call_args.kwargs["http_options"], {"timeout": (3, 40)})
+
+
+class ProviderRouterTests(SimpleTestCase):
+    def setUp(self):
+        for name, value in (("ranked", ["Gemini", "DEEPSEEK"]), ("hedge_delay", 0.05)):
+            patcher = mock.patch.object(ProviderRouter, name, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def complete(self, answers):
+        def provider_complete(provider, turn):
+            answer = answers[provider]
+            if isinstance(answer, Exception):
+                raise answer
+            time.sleep(0.5 if answer == "slow" else 0)
+            return answer
+
+        with mock.patch("chat.services.routing.providers.complete", side_effect=provider_complete):
+            return ProviderRouter().complete({})
+
+    def test_slow_primary_is_hedged(self):
+        self.assertEqual(self.complete({"Gemini": "slow", "DEEPSEEK": "fast"}), ("DEEPSEEK", "fast"))
+
+    def test_failed_primary_falls_over_to_the_next_provider(self):
+        self.assertEqual(self.complete({"Gemini": ServerError(), "DEEPSEEK": "answer"}), ("DEEPSEEK", "answer"))
+
+    def test_all_providers_failing_raises(self):
+        with self.assertRaisesMessage(RuntimeError, "All providers failed"):
+            self.complete({"Gemini": ServerError(), "DEEPSEEK": ServerError()})
+
+    @override_settings(CHAT_ROUTING_WORKERS=0)
+    def test_no_hedge_while_every_worker_is_busy(self):
+        self.assertEqual(self.complete({"Gemini": "slow", "DEEPSEEK": "fast"}), ("Gemini", "slow"))
+
+
+class ProviderRoutingSettingsTests(SimpleTestCase):
+    def test_unknown_or_missing_providers_are_rejected(self):
+        self.assertEqual(_parse_routing_providers("Gemini, GPT"), ["Gemini", "GPT"])
+        with self.assertRaisesMessage(ImproperlyConfigured, "'Claude'"):
+            _parse_routing_providers("Gemini,Claude")
+        with self.assertRaisesMessage(ImproperlyConfigured, "at least one provider"):
+            _parse_routing_providers("")
+
+    @override_settings(CHAT_ROUTING_PROVIDERS=["Claude"])
+    def test_router_without_known_providers_raises_a_configuration_error(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, "CHAT_ROUTING_PROVIDERS"):
+            ProviderRouter().complete({})
@@ -1,56 +1,35 @@
-from django.db.models import F 
 from rest_framework.views import APIView
+from rest_framework.response import Response
 from rest_framework import status
-from langdetect import detect
 from rest_framework.permissions import IsAuthenticated
-from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
+from django.conf import settings
 from django.db import transaction
+from django.utils.decorators import method_decorator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
 from django.utils.html import escape, linebreaks
-from core.models.user import User as UserModel
+from django.utils.http import parse_etags
 from chat.services.chat_crud import ConversationService
-from chat.services.model import ConversationTitleService
-from core.models import Conversation, ConversationLine, Language
-from core.enums.enums import ModelUsedEnum, SentByEnum
-from chat.serializers.chat import ChatRequestSerializer, ConversationSerializer
+from chat.services.chat_turn import ChatTurnService
+from core.models import Conversation
+from chat.serializers.conversation_analysis import DecodingProfileReq
+from chat.serializers.chat import ChatRequestSerializer, ConversationHeaderSerializer, ConversationLineSerializer, ConversationSerializer
 from core.utils.response_wrapper import api_response
-import os
-
-from google import genai
-from openai import OpenAI
-
-from core.utils.translate_text import translate_text
-from decouple import config
-
-GEMINI_API_KEY = config("GEMINI_API_KEY")
-OPENROUTER_API_KEY = config("OPENROUTER_API_KEY")
-
-# ---------------------------
-# AI Client Factory
-# ---------------------------
-def get_ai_client(provider: str):
-    """
-    Return the client for the requested AI provider.
-    """
-    if provider == ModelUsedEnum.GEMINI:
-        api_key = GEMINI_API_KEY
-        return genai.Client(api_key=api_key)
-    # view at https://openrouter.ai/deepseek/deepseek-chat-v3.1:free/api
-    #view at https://openrouter.ai/openai/gpt-oss-20b:free
-
-    elif (provider == ModelUsedEnum.DEEPSEEK or provider == ModelUsedEnum.GPT):
-        return OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=OPENROUTER_API_KEY
-        )
-    else:
-        raise ValueError(f"Unknown AI provider: {provider}")
+from chat.services import routing
+from chat.services.provider_guard import ProviderUnavailable
+import json
 
 
 # ---------------------------
 # ChatView: Main AI interaction
 # ---------------------------
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
 class ChatView(APIView):
+    """
+    Transactions are managed by ChatTurnService (short read and write phases)
+    so that none is held open across the LLM and DeepL calls.
+    """
     permission_classes = [IsAuthenticated]
 
     @extend_schema(
@@ -72,7 +51,6 @@ class ChatView(APIView):
         summary="Ask a question to AI chat",
         description="Creates a new conversation if conversation_id is not provided and returns AI response"
     )
-    @transaction.atomic
     def post(self, request):
         try:
             question = request.data.get("text")
@@ -83,143 +61,144 @@ class ChatView(APIView):
                     error="You must provide a question",
                     status_code=status.HTTP_400_BAD_REQUEST
                 )
-            language_to_be_used = detect(question) 
-            if language_to_be_used not in ['en', 'ar']:
-                language_to_be_used = 'en'
-
-            conversation_id = request.data.get("conversation_id")
-            user = request.user if request.user.is_authenticated else None
-            title = request.data.get("title", "New Conversation")
-            provider = request.data.get("provider", ModelUsedEnum.GEMINI)
-            model_name = request.data.get("model")
-            
-            
-            language_obj = Language.objects.filter(language_code=language_to_be_used).first()
-            if not language_obj:
-                language_obj = Language.objects.filter(language_code='en').first()
-
-
-            text_field_name = f"text_{language_to_be_used}"
-            text_html_field_name = f"text_html_{language_to_be_used}"
-            title_field_name = f"title_{language_to_be_used}"
-            text_opposite_language = f"text_{'ar' if language_to_be_used == 'en' else 'en'}"
-            
-
-            # Fetch or create conversation
-            if conversation_id:
-                conversation = get_object_or_404(Conversation, id=conversation_id)
-            else:
-                conversation = Conversation.objects.create(
-                    user=user,
-                    **{title_field_name: title}
-                )
-                # Increment conversations_count atomically
-                from django.contrib.auth import get_user_model
-                User = get_user_model()
-                User.objects.filter(id=user.id).update(conversations_count=F('conversations_count') + 1)
-
-
-            # Build conversation history
-            chat_history = [
-                (getattr(line, text_field_name, ""), line.sent_by)
-                for line in conversation.lines.all()
-            ]
-            history_text = "\n".join([f"{sent_by}: {text}" for text, sent_by in chat_history if text])
-            user_history_text = f"{history_text}\nUser: {question}" if history_text else f"User: {question}"
-
-            system_instruction = """As an AI assistant, answer the user's question using your own knowledge.
-Include previous chat history for context but do not invent information.detect user language from the LAST {question} and respond in the same language.Note that languages supported are English and Arabic only . But you must strictly respond in one single language ! Start directly from yur answer, please do not mention the history before replying !!"""
-
-            client = get_ai_client(provider)
-
-            # --- Generate AI response ---
-            if provider == ModelUsedEnum.GEMINI:
-                chat = client.chats.create(
-                    model="gemini-2.5-flash",
-                    config=genai.types.GenerateContentConfig(system_instruction=system_instruction)
+            params = DecodingProfileReq(data=request.data)
+            if not params.is_valid():
+                return api_response(
+                    success=False,
+                    info="VALIDATION_ERROR",
+                    error=str(params.errors),
+                    status_code=status.HTTP_400_BAD_REQUEST
                 )
-                response = chat.send_message(user_history_text)
-                answer = response.text
 
-            elif provider == ModelUsedEnum.DEEPSEEK:
+            conversation_id = request.data.get("conversation_id")
+            provider = routing.requested_provider(request.data.get("provider"))
+            decoding_profile = params.validated_data.get("decoding_profile")
+            compact = is_compact(request)
 
-                completion = client.chat.completions.create(
-                    model="deepseek/deepseek-chat-v3.1:free",
-                    messages=[
-                        {"role": "system", "content": system_instruction},
-                        {"role": "user", "content": user_history_text}
-                    ]
-                )
-                answer = completion.choices[0].message.content
-                
-            elif provider == ModelUsedEnum.GPT:
-                completion = client.chat.completions.create(
-                    model="openai/gpt-oss-20b:free",
-                    messages=[
-                        {"role": "system", "content": system_instruction},
-                        {"role": "user", "content": user_history_text}
-                    ]
+            # --- Read phase ---
+            turn = ChatTurnService.prepare(
+                user=request.user,
+                question=question,
+                conversation_id=conversation_id,
+                title=request.data.get("title"),
+                client_message_id=request.data.get("client_message_id"),
+            )
+            if turn["existing"]:
+                # Retried request already answered: return the stored turn
+                user_line, bot_line = turn["existing"]
+                return self._answer_response(
+                    bot_line.conversation, bot_line.get_text(turn["language"]),
+                    lines=(user_line, bot_line) if compact else None
                 )
-                answer = completion.choices[0].message.content
 
-            else:
-                raise ValueError(f"Provider {provider} is not supported")
+            # --- External calls, no DB transaction held ---
+            provider, answer = routing.complete(provider, turn)
 
             # --- Convert AI response to plain text + HTML ---
             plain_text = answer.strip()
-            html_text = linebreaks(escape(plain_text))  
-            opposite_language = 'ar' if language_to_be_used == 'en' else 'en'
-            user_text = translate_text(question, language_to_be_used, opposite_language)
-            bot_text = translate_text(plain_text, language_to_be_used, opposite_language)
-
-
-            ConversationLine.objects.create(
-                conversation=conversation,
-                sent_by=SentByEnum.USER.value,
-                model_used=provider,
-                language=language_obj,
-                **{
-                    text_field_name: question, 
-                    text_opposite_language: user_text,
-                    text_html_field_name: linebreaks(question) 
-                }
+            user_text, bot_text = ChatTurnService.translate(turn, plain_text)
+
+            # --- Write phase ---
+            conversation, user_line, bot_line = ChatTurnService.persist(
+                turn,
+                user=request.user,
+                provider=provider,
+                answer=plain_text,
+                user_text=user_text,
+                bot_text=bot_text,
+                decoding_profile=decoding_profile,
             )
 
-            # --- Save AI (bot) response ---
-            ConversationLine.objects.create(
-                conversation=conversation,
-                sent_by=SentByEnum.BOT.value,
-                model_used=provider,
-                language=language_obj,
-                **{
-                    text_field_name: plain_text,
-                    text_opposite_language: bot_text,
-                    text_html_field_name: linebreaks(answer.strip()) 
+            return self._answer_response(
+                conversation, plain_text, lines=(user_line, bot_line) if compact else None
+            )
+
+        except ProviderUnavailable as e:
+            return api_response(
+                success=False,
+                info="PROVIDER_UNAVAILABLE",
+                error=str(e),
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        except Exception as e:
+            from core.utils.logger import exception_log
+            exception_log(e, __file__)
+            return api_response(
+                success=False,
+                info="CHAT_FAILED",
+                error=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+    @staticmethod
+    def _answer_response(conversation, answer_text, lines=None):
+        return api_response(
+            success=True,
+            info="QUESTION_ANSWERED",
+            data=answer_payload(conversation, answer_text, lines),
+            status_code=status.HTTP_200_OK
+        )
+
+
+# ---------------------------
+# ChatStreamView: same as ChatView, streamed as Server-Sent Events
+# ---------------------------
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+class ChatStreamView(APIView):
+    """
+    Streams the provider tokens as they arrive:
+        event: token  data: {"text": "..."}            (repeated)
+        event: done   data: {"conversation": {...}, "content": "<p>...</p>"}  (+ "lines" in compact mode)
+        event: error  data: {"info": "CHAT_FAILED" | "PROVIDER_UNAVAILABLE", "error": "..."}
+    The lines and translations are persisted once the stream completes.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        request=ChatRequestSerializer,
+        responses={
+            (200, "text/event-stream"): OpenApiTypes.STR,
+            400: {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean"},
+                    "info": {"type": "string"},
+                    "error": {"type": "string"},
                 }
+            }
+        },
+        summary="Ask a question to AI chat (streaming)",
+        description="Same as /chat/message but the answer is streamed as Server-Sent Events"
+    )
+    def post(self, request):
+        question = request.data.get("text")
+        if not question:
+            return api_response(
+                success=False,
+                info="QUESTION_REQUIRED",
+                error="You must provide a question",
+                status_code=status.HTTP_400_BAD_REQUEST
             )
-            if (not conversation_id):
-                service = ConversationTitleService()  
-                conversation = service.regenerate_conversation_title(
-                conversation_id=conversation.id,
-                user=request.user
-            )  
-                
-            request.user.increment_conversations_count()
-            
-
-            serializer = ConversationSerializer(conversation)
+        params = DecodingProfileReq(data=request.data)
+        if not params.is_valid():
             return api_response(
-                success=True,
-                info="QUESTION_ANSWERED",
-                data={
-                    "conversation": serializer.data,
-                    "content": html_text
-                },
-                status_code=status.HTTP_200_OK
+                success=False,
+                info="VALIDATION_ERROR",
+                error=str(params.errors),
+                status_code=status.HTTP_400_BAD_REQUEST
             )
+        provider = routing.requested_provider(request.data.get("provider"))
 
+        try:
+            # --- Read phase, before the stream starts so errors are plain 400s ---
+            turn = ChatTurnService.prepare(
+                user=request.user,
+                question=question,
+                conversation_id=request.data.get("conversation_id"),
+                title=request.data.get("title"),
+                client_message_id=request.data.get("client_message_id"),
+            )
         except Exception as e:
-            transaction.set_rollback(True)
             from core.utils.logger import exception_log
             exception_log(e, __file__)
             return api_response(
@@ -229,6 +208,88 @@ Include previous chat history for context but do not invent information.detect u
                 status_code=status.HTTP_400_BAD_REQUEST
             )
 
+        events = self._events(
+            request.user, turn, provider, params.validated_data.get("decoding_profile"), is_compact(request)
+        )
+        response = StreamingHttpResponse(events, content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # disable proxy buffering (nginx)
+        return response
+
+    def _events(self, user, turn, provider, decoding_profile, compact=False):
+        if turn["existing"]:
+            user_line, bot_line = turn["existing"]
+            yield sse_event("done", answer_payload(
+                bot_line.conversation, bot_line.get_text(turn["language"]),
+                (user_line, bot_line) if compact else None
+            ))
+            return
+
+        try:
+            chunks = []
+            provider, stream = routing.stream(provider, turn)
+            for chunk in stream:
+                chunks.append(chunk)
+                yield sse_event("token", {"text": chunk})
+
+            plain_text = "".join(chunks).strip()
+            if not plain_text:
+                raise ValueError("The provider returned an empty answer")
+            user_text, bot_text = ChatTurnService.translate(turn, plain_text)
+            conversation, user_line, bot_line = ChatTurnService.persist(
+                turn,
+                user=user,
+                provider=provider,
+                answer=plain_text,
+                user_text=user_text,
+                bot_text=bot_text,
+                decoding_profile=decoding_profile,
+            )
+            yield sse_event("done", answer_payload(conversation, plain_text, (user_line, bot_line) if compact else None))
+
+        except ProviderUnavailable as e:
+            yield sse_event("error", {"info": "PROVIDER_UNAVAILABLE", "error": str(e)})
+        except Exception as e:
+            from core.utils.logger import exception_log
+            exception_log(e, __file__)
+            yield sse_event("error", {"info": "CHAT_FAILED", "error": str(e)})
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)}\n\n"
+
+
+def is_compact(request) -> bool:
+    return request.data.get("response_mode", settings.CHAT_RESPONSE_MODE) == "compact"
+
+
+def answer_payload(conversation, answer_text: str, lines=None) -> dict:
+    """
+    Full mode: the whole conversation with all its lines. Compact mode (``lines``
+    given): the conversation header and only the new lines, serialized from the
+    objects in memory without any query.
+    """
+    if lines is not None:
+        return {
+            "conversation": ConversationHeaderSerializer(conversation).data,
+            "lines": ConversationLineSerializer(lines, many=True).data,
+            "content": linebreaks(escape(answer_text))
+        }
+    return {
+        "conversation": ConversationSerializer(conversation).data,
+        "content": linebreaks(escape(answer_text))
+    }
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match (a list of ETags, or *) against ``etag``, with weak comparison."""
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    if etags == ["*"]:
+        return True
+    return etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in etags}
+
 
 # ---------------------------
 # ConversationMessagesView: Fetch conversation lines
@@ -238,9 +299,13 @@ class ConversationMessagesView(APIView):
 
     @extend_schema(
         parameters=[
-            OpenApiParameter("language_code", OpenApiTypes.STR, description="Language code (e.g., 'en', 'ar')", required=False),
-            OpenApiParameter("pageNumber", OpenApiTypes.INT, description="Page number for pagination", required=False),
+            OpenApiParameter("language_code", OpenApiTypes.STR, description="Language code (e.g., 'en', 'ar'); messages default to their own language", required=False),
+            OpenApiParameter("pageNumber", OpenApiTypes.INT, description="Page number for pagination, counted from the latest messages", required=False),
             OpenApiParameter("pageSize", OpenApiTypes.INT, description="Number of items per page", required=False),
+            OpenApiParameter("before", OpenApiTypes.INT, description="Load the messages older than this message id (nextBefore of the previous page); takes precedence over pageNumber", required=False),
+            OpenApiParameter("includeTotal", OpenApiTypes.BOOL, description="Also compute totalPages (an extra COUNT)", required=False),
+            OpenApiParameter("since", OpenApiTypes.STR, description="Delta sync: only the messages newer than this message id or ISO timestamp (nextSince of the previous call)", required=False),
+            OpenApiParameter("If-None-Match", OpenApiTypes.STR, location=OpenApiParameter.HEADER, description="ETags of previous responses (or *); 304 if one matches, i.e. the same query and no new or translated message since", required=False),
         ],
         responses={
             200: {
@@ -265,13 +330,17 @@ class ConversationMessagesView(APIView):
                                     }
                                 }
                             },
-                            "totalPages": {"type": "integer"},
-                            "pageNumber": {"type": "integer"},
+                            "totalPages": {"type": "integer", "nullable": True},
+                            "pageNumber": {"type": "integer", "nullable": True},
                             "pageSize": {"type": "integer"},
+                            "hasMore": {"type": "boolean"},
+                            "nextBefore": {"type": "integer", "nullable": True},
+                            "nextSince": {"type": "string", "nullable": True},
                         }
                     }
                 }
             },
+            304: None,
             400: {
                 "type": "object",
                 "properties": {
@@ -286,24 +355,38 @@ class ConversationMessagesView(APIView):
     )
     def get(self, request, conversation_id):
         try:
-            conversation = get_object_or_404(Conversation, id=conversation_id)
             pageNumber = int(request.GET.get("pageNumber", 1))
             pageSize = int(request.GET.get("pageSize", 10))
+            before = request.GET.get("before")
             user = request.user if request.user.is_authenticated else None
+            query = {
+                "pageNumber": pageNumber,
+                "pageSize": pageSize,
+                "before": int(before) if before else None,
+                "since": request.GET.get("since"),
+                "language_code": request.GET.get("language_code"),
+                "include_total": request.GET.get("includeTotal", "").lower() in ("1", "true"),
+            }
+
+            # Nothing new since the client's copy: no message query at all
+            etag = ConversationService.get_messages_etag(conversation_id, user.id if user else None, query)
+            if etag_matches(request.headers.get("If-None-Match"), etag):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
 
             data = ConversationService.get_conversation_messages(
-                conversation_id=conversation.id,
-                pageNumber=pageNumber,
-                pageSize=pageSize,
-                user_id=user.id if user else None
+                conversation_id=conversation_id,
+                user_id=user.id if user else None,
+                **query
             )
 
-            return api_response(
+            response = api_response(
                 success=True,
                 info="MESSAGES_RETRIEVED",
                 data=data,
                 status_code=status.HTTP_200_OK
             )
+            response["ETag"] = etag
+            return response
         except Exception as e:
             return api_response(
                 success=False,
@@ -20,9 +20,10 @@ class ConversationView(APIView):
 
     @extend_schema(
         parameters=[
-            OpenApiParameter("pageSize", int, description="Number of items per page", required=True),
-            OpenApiParameter("pageNumber", int, description="Page number", required=True),
+            OpenApiParameter("pageSize", int, description="Number of items per page (default 20)", required=False),
+            OpenApiParameter("pageNumber", int, description="Page number (default 1)", required=False),
             OpenApiParameter("search", str, description="Search string (optional)", required=False),
+            OpenApiParameter("cursor", str, description="Keyset pagination: nextCursor of the previous page, empty for the first page. Takes precedence over pageNumber", required=False),
         ],
         responses={
             200: GetConversationsSerializer,
@@ -45,7 +46,24 @@ class ConversationView(APIView):
             language_code = request.GET.get("language_code", "en")
 
 
-            convs = ConversationService.get_conversations(1, 20, user or 1, language_code)
+            serializer = GetConversationsReq(data=request.GET)
+            if not serializer.is_valid():
+                return api_response(
+                    success=False,
+                    info=t("VALIDATION_ERROR", language_code),
+                    error=str(serializer.errors),
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            params = serializer.validated_data
+
+            convs = ConversationService.get_conversations(
+                params["pageNumber"],
+                params["pageSize"],
+                user or 1,
+                language_code,
+                search=params.get("search", ""),
+                cursor=params.get("cursor"),
+            )
             
             return api_response(
                 success=True,
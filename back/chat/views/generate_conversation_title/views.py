@@ -3,8 +3,8 @@ from jsonschema import ValidationError
 from rest_framework.views import APIView
 from rest_framework import status
 from django.db import transaction
-from drf_spectacular.utils import extend_schema
-from chat.serializers.conversation_analysis import ConversationTitleGenRequestSerializer
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from chat.serializers.conversation_analysis import ConversationTitleGenRequestSerializer, DecodingProfileReq
 from chat.serializers.chat import ConversationSerializer
 from chat.services.model import ConversationTitleService
 from core.models.conversation import Conversation
@@ -17,6 +17,43 @@ class ConversationTitleView(APIView):
     permission_classes = [IsAuthenticated]  
 
     @extend_schema(
+        responses={
+            200: {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean"},
+                    "info": {"type": "string"},
+                    "data": {
+                        "type": "object",
+                        "properties": {
+                            "title_en": {"type": "string"},
+                            "title_ar": {"type": "string"},
+                            "title_status": {"type": "string", "enum": ["provisional", "generated", "failed"]},
+                        }
+                    }
+                }
+            },
+        },
+        summary="Get conversation title",
+        description="Current titles of a conversation. While title_status is 'provisional' the model-generated titles are still being computed."
+    )
+    def get(self, request, conversation_id):
+        conversation = get_object_or_404(Conversation, id=conversation_id, user=request.user)
+        return api_response(
+            success=True,
+            info="CONVERSATION_TITLE_RETURNED",
+            data={
+                "title_en": conversation.title_en,
+                "title_ar": conversation.title_ar,
+                "title_status": conversation.title_status
+            },
+            status_code=status.HTTP_200_OK
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("decoding_profile", str, description="Decoding profile (e.g. 'fast', 'balanced', 'quality')", required=False),
+        ],
         responses={
             200: ConversationSerializer,
             400: {
@@ -34,13 +71,21 @@ class ConversationTitleView(APIView):
     @transaction.atomic
     def patch(self, request,conversation_id):
         try:     
-           
+            params = DecodingProfileReq(data=request.GET)
+            if not params.is_valid():
+                return api_response(
+                    success=False,
+                    info="VALIDATION_ERROR",
+                    error=str(params.errors),
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
 
             conversation = get_object_or_404(Conversation, id=conversation_id)
             service = ConversationTitleService()  
             conversation = service.regenerate_conversation_title(
                 conversation_id=conversation_id,
-                user=request.user
+                user=request.user,
+                profile=params.validated_data.get("decoding_profile")
             )           
 
             return api_response(
@@ -48,7 +93,8 @@ class ConversationTitleView(APIView):
                 info="CONVERSATION_TAG_REGENERATED_SUCCESSFULLY",
                 data={
                     "title_en": conversation.title_en,
-                    "title_ar": conversation.title_ar
+                    "title_ar": conversation.title_ar,
+                    "title_status": conversation.title_status
                 },
                 status_code=status.HTTP_200_OK
             )
@@ -0,0 +1,49 @@
+from rest_framework.views import APIView
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from drf_spectacular.utils import extend_schema
+from chat.services.ai_clients import ProviderClientRegistry
+from chat.services.generation_cache import GenerationCache
+from chat.services.model import ModelManager, get_batch_scheduler
+from chat.services.provider_guard import ProviderGuard
+from chat.services.routing import ProviderRouter
+from core.utils.response_wrapper import api_response
+from core.utils.translation_memory import TranslationMemory
+from core.utils import translation_backends
+
+
+class MetricsView(APIView):
+    """Per-process runtime metrics of the chat services (staff only)."""
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        responses={
+            200: {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean"},
+                    "info": {"type": "string"},
+                    "data": {"type": "object"},
+                }
+            }
+        },
+        summary="Chat service metrics",
+        description="Returns metrics of the current worker process: loaded ML models, their load time and resident size, generation batching, the generation cache and the AI provider clients (reuse, health, latency, circuit breakers and queue depth) and the translation memory."
+    )
+    def get(self, request):
+        scheduler = get_batch_scheduler()
+        return api_response(
+            success=True,
+            info="METRICS_RETRIEVED",
+            data={
+                "models": ModelManager().stats(),
+                "batching": scheduler.stats() if scheduler else None,
+                "generation_cache": GenerationCache().stats(),
+                "ai_providers": ProviderClientRegistry().stats(),
+                "routing": ProviderRouter().stats(),
+                "provider_guard": ProviderGuard.all_stats(),
+                "translation_memory": TranslationMemory().stats(),
+                "translation_backends": translation_backends.stats(),
+            },
+            status_code=status.HTTP_200_OK
+        )
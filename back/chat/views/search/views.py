@@ -0,0 +1,70 @@
+from rest_framework.views import APIView
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from chat.services.search import ConversationSearchService
+from chat.serializers.chat import SearchMessagesReq, SearchMessagesSerializer
+from core.utils.error_translator import t
+from core.utils.logger import exception_log
+from core.utils.response_wrapper import api_response
+
+
+class SearchMessagesView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("q", str, description="Search text, matched in English and Arabic", required=True),
+            OpenApiParameter("pageSize", int, description="Number of results per page (default 20)", required=False),
+            OpenApiParameter("cursor", str, description="nextCursor of the previous page", required=False),
+            OpenApiParameter("language_code", str, description="Language of titles and highlights (default en)", required=False),
+        ],
+        responses={
+            200: SearchMessagesSerializer,
+            400: {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean"},
+                    "info": {"type": "string"},
+                    "error": {"type": "string"},
+                }
+            }
+        },
+        summary="Search messages",
+        description="Full-text search over the user's messages in both languages, best match first, with highlighted excerpts. Paginated with nextCursor. The first page also lists the conversations whose title matches."
+    )
+    def get(self, request):
+        language_code = request.GET.get("language_code", "en")
+        try:
+            serializer = SearchMessagesReq(data=request.GET)
+            if not serializer.is_valid():
+                return api_response(
+                    success=False,
+                    info=t("VALIDATION_ERROR", language_code),
+                    error=str(serializer.errors),
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            params = serializer.validated_data
+
+            results = ConversationSearchService.search_messages(
+                request.user.id,
+                params["q"],
+                language="ar" if language_code.startswith("ar") else "en",
+                pageSize=params["pageSize"],
+                cursor=params.get("cursor") or None,
+            )
+            return api_response(
+                success=True,
+                info=t("SEARCH_RESULTS_RETURNED", language_code),
+                data=SearchMessagesSerializer(results).data,
+                status_code=status.HTTP_200_OK
+            )
+
+        except Exception as e:
+            exception_log(e, __file__)
+            return api_response(
+                success=False,
+                info=t("PROBLEM", language_code),
+                error=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
@@ -2,8 +2,11 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from chat.serializers.conversation_analysis import DecodingProfileReq
 from chat.services.user_summary_service import UserSummaryService
+from core.utils.error_translator import t
+from core.utils.response_wrapper import api_response
 
 
 class UserSummaryView(APIView):
@@ -13,6 +16,9 @@ class UserSummaryView(APIView):
     @extend_schema(
         description="Retrieve the latest summary of the user's analyses. If the user has reached their quota, a new summary will be generated.",
         tags=["profile"],
+        parameters=[
+            OpenApiParameter("decoding_profile", str, description="Decoding profile used if a summary is generated (e.g. 'fast', 'balanced', 'quality')", required=False),
+        ],
         responses={
             200: {
                 "type": "object",
@@ -23,6 +29,14 @@ class UserSummaryView(APIView):
                     "language": {"type": "string"},
                     "triggered": {"type": "boolean"}
                 }
+            },
+            400: {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean"},
+                    "info": {"type": "string"},
+                    "error": {"type": "string"},
+                }
             }
         }
     )
@@ -30,7 +44,16 @@ class UserSummaryView(APIView):
         user = request.user
         lang = request.GET.get('language_code', 'en')
 
+        params = DecodingProfileReq(data=request.GET)
+        if not params.is_valid():
+            return api_response(
+                success=False,
+                info=t("VALIDATION_ERROR", lang),
+                error=str(params.errors),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
         service = UserSummaryService()
-        result = service.get_user_summary(user, lang)
+        result = service.get_user_summary(user, lang, params.validated_data.get('decoding_profile'))
 
         return Response(result, status=status.HTTP_200_OK)
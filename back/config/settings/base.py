@@ -1,4 +1,7 @@
+from decouple import config, Csv
+from django.core.exceptions import ImproperlyConfigured
 from datetime import timedelta
+from pathlib import Path
 from corsheaders.defaults import default_headers
 
 # Application definition
@@ -19,6 +22,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'corsheaders',
     'storages',
     'drf_spectacular',
@@ -138,3 +142,154 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+
+###### ML MODELS CONFIG ######
+# Local seq2seq models are loaded on first use. The budget (MB) caps the
+# resident size per process, least recently used models are evicted first
+# (0 = no limit). Preloaded keys: summary_ar, title_en, title_ar
+ML_MODELS_MEMORY_BUDGET_MB = config('ML_MODELS_MEMORY_BUDGET_MB', default=0, cast=int)
+ML_MODELS_PRELOAD = config('ML_MODELS_PRELOAD', default='', cast=Csv())
+# Per-model inference backend, e.g. "summary_ar=onnx,title_en=int8" (fp32 | int8 | onnx).
+# Artifacts are built once with `manage.py export_models` and cached in ML_MODEL_CACHE_DIR
+def _parse_model_backends(value):
+    backends = {}
+    for item in Csv()(value):
+        key, sep, backend = item.partition('=')
+        if not sep or not key.strip() or backend.strip() not in ('fp32', 'int8', 'onnx'):
+            raise ImproperlyConfigured(
+                f"ML_MODEL_BACKENDS entry {item!r} must be <model>=<fp32|int8|onnx>"
+            )
+        backends[key.strip()] = backend.strip()
+    return backends
+
+
+ML_MODEL_BACKENDS = config('ML_MODEL_BACKENDS', default='', cast=_parse_model_backends)
+ML_MODEL_CACHE_DIR = config('ML_MODEL_CACHE_DIR', default=str(Path(__file__).resolve().parent.parent.parent / 'model_cache'))
+
+# Shared inference server (manage.py run_inference_server). When set, title and
+# summary generation is delegated to it instead of loading models in-process.
+INFERENCE_SERVER_URL = config('INFERENCE_SERVER_URL', default='')
+INFERENCE_SERVER_CONNECT_TIMEOUT = config('INFERENCE_SERVER_CONNECT_TIMEOUT', default=2, cast=float)
+INFERENCE_SERVER_READ_TIMEOUT = config('INFERENCE_SERVER_READ_TIMEOUT', default=30, cast=float)
+
+# Micro-batching of concurrent title/summary prompts (same model and decode
+# params) into one generate call: collect for up to WINDOW_MS or MAX_SIZE items
+ML_BATCHING_ENABLED = config('ML_BATCHING_ENABLED', default=True, cast=bool)
+ML_BATCHING_WINDOW_MS = config('ML_BATCHING_WINDOW_MS', default=15, cast=float)
+ML_BATCHING_MAX_SIZE = config('ML_BATCHING_MAX_SIZE', default=8, cast=int)
+# Seconds a caller waits for its batched outputs before giving up
+ML_BATCHING_RESULT_TIMEOUT = config('ML_BATCHING_RESULT_TIMEOUT', default=120, cast=float)
+
+# Cache of generated titles/summaries: in-process LRU in front of the database
+GENERATION_CACHE_ENABLED = config('GENERATION_CACHE_ENABLED', default=True, cast=bool)
+GENERATION_CACHE_LRU_SIZE = config('GENERATION_CACHE_LRU_SIZE', default=1024, cast=int)
+
+# Decoding profiles for title/summary generation. max_time is the wall-clock
+# budget (seconds); past it the keyword-based fallback is used instead
+GENERATION_PROFILES = {
+    'fast': {'num_beams': 1, 'max_time': 1.5},
+    'balanced': {'num_beams': 2, 'early_stopping': True, 'max_time': 3.0},
+    'quality': {'num_beams': 5, 'early_stopping': True, 'max_time': 8.0},
+}
+# Default profile per call site, overridable per request
+GENERATION_CALL_SITE_PROFILES = {
+    'title': config('GENERATION_TITLE_PROFILE', default='quality'),
+    'summary': config('GENERATION_SUMMARY_PROFILE', default='quality'),
+    'memory': config('GENERATION_MEMORY_PROFILE', default='fast'),
+}
+
+# Threads of the in-process pool running post-commit work (e.g. title generation)
+BACKGROUND_WORKERS = config('BACKGROUND_WORKERS', default=2, cast=int)
+
+# Long-lived AI provider clients (one per provider endpoint per process):
+# keep-alive pool size (OpenRouter only: the Gemini SDK takes no pool),
+# connect/read timeouts (seconds), and the number of consecutive failures
+# after which a provider is reported unhealthy
+AI_PROVIDER_POOL_SIZE = config('AI_PROVIDER_POOL_SIZE', default=20, cast=int)
+AI_PROVIDER_CONNECT_TIMEOUT = config('AI_PROVIDER_CONNECT_TIMEOUT', default=5, cast=float)
+AI_PROVIDER_READ_TIMEOUT = config('AI_PROVIDER_READ_TIMEOUT', default=60, cast=float)
+AI_PROVIDER_UNHEALTHY_AFTER = config('AI_PROVIDER_UNHEALTHY_AFTER', default=3, cast=int)
+# Number of recent calls per provider used for latency percentiles and error rate
+AI_PROVIDER_STATS_WINDOW = config('AI_PROVIDER_STATS_WINDOW', default=50, cast=int)
+
+# Provider guard: max concurrent calls per provider (others wait up to
+# QUEUE_TIMEOUT seconds), circuit breaker opening after BREAKER_FAILURES
+# failures within BREAKER_WINDOW seconds for BREAKER_COOLDOWN seconds, and
+# jittered retries of transient errors. Every call adds RETRY_BUDGET_RATIO
+# retry tokens to a shared bucket of RETRY_BUDGET_CAPACITY; a retry spends one
+AI_PROVIDER_MAX_IN_FLIGHT = config('AI_PROVIDER_MAX_IN_FLIGHT', default=10, cast=int)
+AI_PROVIDER_QUEUE_TIMEOUT = config('AI_PROVIDER_QUEUE_TIMEOUT', default=5, cast=float)
+AI_PROVIDER_BREAKER_FAILURES = config('AI_PROVIDER_BREAKER_FAILURES', default=5, cast=int)
+AI_PROVIDER_BREAKER_WINDOW = config('AI_PROVIDER_BREAKER_WINDOW', default=30, cast=float)
+AI_PROVIDER_BREAKER_COOLDOWN = config('AI_PROVIDER_BREAKER_COOLDOWN', default=30, cast=float)
+AI_PROVIDER_RETRY_ATTEMPTS = config('AI_PROVIDER_RETRY_ATTEMPTS', default=3, cast=int)
+AI_PROVIDER_RETRY_MAX_WAIT = config('AI_PROVIDER_RETRY_MAX_WAIT', default=4, cast=float)
+AI_PROVIDER_RETRY_BUDGET_RATIO = config('AI_PROVIDER_RETRY_BUDGET_RATIO', default=0.2, cast=float)
+AI_PROVIDER_RETRY_BUDGET_CAPACITY = config('AI_PROVIDER_RETRY_BUDGET_CAPACITY', default=10, cast=float)
+
+# Latency-aware routing (provider "auto"): fastest healthy provider first, hedged
+# on the next one after its p95 latency clamped to [MIN_DELAY, MAX_DELAY] seconds.
+# CHAT_ROUTING_DEFAULT makes "auto" the default when no provider is requested
+CHAT_ROUTING_DEFAULT = config('CHAT_ROUTING_DEFAULT', default=False, cast=bool)
+
+
+def _parse_routing_providers(value):
+    providers = [item.strip() for item in Csv()(value)]
+    for provider in providers:
+        if provider not in ('Gemini', 'DEEPSEEK', 'GPT'):
+            raise ImproperlyConfigured(
+                f"CHAT_ROUTING_PROVIDERS entry {provider!r} must be one of Gemini, DEEPSEEK, GPT"
+            )
+    if not providers:
+        raise ImproperlyConfigured("CHAT_ROUTING_PROVIDERS must name at least one provider")
+    return providers
+
+
+CHAT_ROUTING_PROVIDERS = config('CHAT_ROUTING_PROVIDERS', default='Gemini,DEEPSEEK,GPT', cast=_parse_routing_providers)
+CHAT_ROUTING_MAX_ERROR_RATE = config('CHAT_ROUTING_MAX_ERROR_RATE', default=0.5, cast=float)
+CHAT_ROUTING_HEDGE_MIN_DELAY = config('CHAT_ROUTING_HEDGE_MIN_DELAY', default=1.0, cast=float)
+CHAT_ROUTING_HEDGE_MAX_DELAY = config('CHAT_ROUTING_HEDGE_MAX_DELAY', default=8.0, cast=float)
+# Threads running the routed calls; a hedge is skipped when none is free
+CHAT_ROUTING_WORKERS = config('CHAT_ROUTING_WORKERS', default=8, cast=int)
+
+# Chat prompt context: a rolling summary of the older lines kept on the
+# conversation plus the lines after it within TOKEN_BUDGET (estimated tokens).
+# The summary is folded forward in the background once FOLD_BATCH lines are
+# older than the last MAX_LINES, in chunks of at most MEMORY_CHUNK_CHARS
+CHAT_CONTEXT_MAX_LINES = config('CHAT_CONTEXT_MAX_LINES', default=12, cast=int)
+CHAT_CONTEXT_TOKEN_BUDGET = config('CHAT_CONTEXT_TOKEN_BUDGET', default=3000, cast=int)
+CHAT_MEMORY_ENABLED = config('CHAT_MEMORY_ENABLED', default=True, cast=bool)
+CHAT_MEMORY_FOLD_BATCH = config('CHAT_MEMORY_FOLD_BATCH', default=6, cast=int)
+CHAT_MEMORY_MAX_CHARS = config('CHAT_MEMORY_MAX_CHARS', default=2000, cast=int)
+CHAT_MEMORY_CHUNK_CHARS = config('CHAT_MEMORY_CHUNK_CHARS', default=3000, cast=int)
+
+# Translation memory of DeepL results: in-process LRU in front of the database
+TRANSLATION_MEMORY_ENABLED = config('TRANSLATION_MEMORY_ENABLED', default=True, cast=bool)
+TRANSLATION_MEMORY_LRU_SIZE = config('TRANSLATION_MEMORY_LRU_SIZE', default=4096, cast=int)
+
+# When the opposite-language text of chat lines is translated: "eager" (before
+# the lines are written), "background" (right after commit) or "lazy" (queued
+# in the background on first read in that language, which serves the original
+# text meanwhile, or by `manage.py backfill_translations`)
+CHAT_TRANSLATION_MODE = config('CHAT_TRANSLATION_MODE', default='eager')
+
+# Translation backends, in fallback order: "deepl" and/or "local" (MarianMT
+# models mt_en_ar/mt_ar_en). Texts up to TRANSLATION_LOCAL_MAX_CHARS are sent
+# to the local backend first when it is enabled
+TRANSLATION_BACKENDS = config('TRANSLATION_BACKENDS', default='deepl', cast=Csv())
+TRANSLATION_LOCAL_MAX_CHARS = config('TRANSLATION_LOCAL_MAX_CHARS', default=300, cast=int)
+TRANSLATION_LOCAL_NUM_BEAMS = config('TRANSLATION_LOCAL_NUM_BEAMS', default=2, cast=int)
+
+# Texts of at least TRANSLATION_SEGMENT_MIN_CHARS are translated sentence by
+# sentence through the translation memory (code blocks and URLs are kept as is)
+TRANSLATION_SEGMENTATION_ENABLED = config('TRANSLATION_SEGMENTATION_ENABLED', default=True, cast=bool)
+TRANSLATION_SEGMENT_MIN_CHARS = config('TRANSLATION_SEGMENT_MIN_CHARS', default=200, cast=int)
+
+# Default response_mode of POST /chat/message: "full" (whole conversation) or
+# "compact" (conversation header and the new lines only)
+CHAT_RESPONSE_MODE = config('CHAT_RESPONSE_MODE', default='full')
+
+# Message search: words of context around the matches in each highlight
+CHAT_SEARCH_HEADLINE_MAX_WORDS = config('CHAT_SEARCH_HEADLINE_MAX_WORDS', default=30, cast=int)
+# Conversations matched on their title, listed on the first page of a search
+CHAT_SEARCH_TITLE_HITS = config('CHAT_SEARCH_TITLE_HITS', default=5, cast=int)
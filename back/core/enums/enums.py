@@ -9,3 +9,13 @@ class ModelUsedEnum(str, Enum):
 class SentByEnum(str, Enum):
     USER = "User"
     BOT = "Bot"
+
+class TitleStatusEnum(str, Enum):
+    PROVISIONAL = "provisional"  # keyword-based, model generation pending
+    GENERATED = "generated"
+    FAILED = "failed"
+
+class TranslationStatusEnum(str, Enum):
+    PENDING = "pending"  # only the original language is stored
+    DONE = "done"
+    FAILED = "failed"
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from core.models import Conversation, ConversationLine
+
+
+class Command(BaseCommand):
+    help = "Recompute message_count, last_message_at and last_message_snippet of existing conversations"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Conversations updated per query")
+
+    def handle(self, *args, **options):
+        lines = ConversationLine.objects.filter(conversation=OuterRef('pk'))
+        message_count = lines.order_by().values('conversation').annotate(count=Count('id')).values('count')
+        last_line = lines.order_by('-created_at', '-id')
+
+        batch_size = options["batch_size"]
+        updated = 0
+        last_id = 0
+        while True:
+            ids = list(
+                Conversation.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            updated += Conversation.objects.filter(id__in=ids).update(
+                message_count=Coalesce(Subquery(message_count), 0),
+                last_message_at=Coalesce(Subquery(last_line.values('created_at')[:1]), F('created_at')),
+            )
+
+            # Snippet of the last line, in its original language, as ChatTurnService.persist writes it
+            snippets = dict.fromkeys(ids, "")
+            last_lines = ConversationLine.objects.filter(conversation_id__in=ids).order_by(
+                'conversation_id', '-created_at', '-id'
+            ).distinct('conversation_id').values_list('conversation_id', 'language_id', 'text_en', 'text_ar')
+            for conversation_id, language_id, text_en, text_ar in last_lines:
+                snippets[conversation_id] = Conversation.make_snippet(text_ar if language_id == 'ar' else text_en)
+            Conversation.objects.bulk_update(
+                [Conversation(id=id, last_message_snippet=snippet) for id, snippet in snippets.items()],
+                ['last_message_snippet'],
+            )
+            last_id = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} conversations"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from chat.services.line_translation import LineTranslationService
+
+
+class Command(BaseCommand):
+    help = "Translate the conversation lines stored without their opposite-language text (pending or failed)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50, help="Lines per DeepL request")
+        parser.add_argument("--limit", type=int, default=None, help="Maximum number of lines to process")
+
+    def handle(self, *args, **options):
+        processed = LineTranslationService().backfill(
+            batch_size=options["batch_size"], limit=options["limit"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} lines"))
@@ -0,0 +1,77 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from chat.services.model import ModelManager
+
+# Representative inputs per model, taken from the title/summary call sites
+SAMPLE_PROMPTS = {
+    'title_en': [
+        "Write a short and concise title for this conversation in 3-5 words only: How do I reverse a list in Python? You can use the reverse() method or slicing with [::-1].",
+        "Write a short and concise title for this conversation in 3-5 words only: What are the health benefits of green tea? Green tea contains antioxidants that may improve brain function.",
+        "Analyze these user questions and write ONE clear sentence about the main topics the user asks about. Be specific.\n\nUser messages: how to train a neural network what is overfitting how to use dropout\n\nAnalysis: The user asks about",
+    ],
+    'title_ar': [
+        "كيف يمكنني تعلم البرمجة بلغة بايثون؟ يمكنك البدء بالدروس المجانية على الإنترنت.",
+        "ما هي فوائد الشاي الأخضر؟ يحتوي الشاي الأخضر على مضادات الأكسدة.",
+        "ما هي عاصمة فرنسا؟ عاصمة فرنسا هي باريس.",
+    ],
+    'summary_ar': [
+        "قم بتحليل الأسئلة التالية واكتب جملة واحدة فقط توضح المواضيع الرئيسية التي يهتم بها المستخدم:\n\nكيف أتعلم بايثون ما هي الخوارزميات كيف أكتب دالة\n بحثت في الآونة الأخيرة عن:",
+        "قم بتحليل الأسئلة التالية واكتب جملة واحدة فقط توضح المواضيع الرئيسية التي يهتم بها المستخدم:\n\nما هي فوائد الرياضة كيف أخسر الوزن ما هو النظام الغذائي الصحي\n بحثت في الآونة الأخيرة عن:",
+    ],
+}
+
+DECODE_PARAMS = {'max_length': 40, 'min_length': 3, 'num_beams': 5, 'early_stopping': True}
+
+
+def token_f1(candidate: str, reference: str) -> float:
+    """Bag-of-tokens F1 between a candidate output and the fp32 reference."""
+    cand, ref = candidate.split(), reference.split()
+    if not cand or not ref:
+        return float(cand == ref)
+    common = sum(min(cand.count(t), ref.count(t)) for t in set(cand))
+    if not common:
+        return 0.0
+    precision, recall = common / len(cand), common / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+class Command(BaseCommand):
+    help = "Compare latency and output quality of the int8 / ONNX backends against fp32"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--models", nargs="*", default=list(SAMPLE_PROMPTS))
+        parser.add_argument("--backends", nargs="*", default=['int8', 'onnx'], choices=['int8', 'onnx'])
+        parser.add_argument("--runs", type=int, default=3, help="Timed runs per prompt")
+
+    def handle(self, *args, **options):
+        manager = ModelManager()
+        for key in options["models"]:
+            if key not in SAMPLE_PROMPTS:
+                raise CommandError(f"Unknown model: {key}")
+            prompts = SAMPLE_PROMPTS[key]
+
+            reference = None
+            self.stdout.write(self.style.MIGRATE_HEADING(key))
+            for backend in ['fp32'] + options["backends"]:
+                entry = manager.load_entry(key, backend)
+                manager.run(entry, prompts[:1], **DECODE_PARAMS)  # warm-up
+
+                latencies, outputs = [], []
+                for prompt in prompts:
+                    for _ in range(options["runs"]):
+                        started = time.perf_counter()
+                        output = manager.run(entry, [prompt], **DECODE_PARAMS)[0]
+                        latencies.append((time.perf_counter() - started) * 1000)
+                    outputs.append(output)
+
+                if reference is None:
+                    reference = outputs
+                exact = sum(o == r for o, r in zip(outputs, reference)) / len(outputs)
+                f1 = statistics.mean(token_f1(o, r) for o, r in zip(outputs, reference))
+                self.stdout.write(
+                    f"  {backend:<5} p50 {statistics.median(latencies):8.1f} ms"
+                    f"  max {max(latencies):8.1f} ms"
+                    f"  exact-match {exact:5.0%}  token-F1 {f1:.2f}"
+                )
+                del entry
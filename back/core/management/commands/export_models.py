@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from chat.services.model import ModelManager
+
+
+class Command(BaseCommand):
+    help = "Export int8-quantized / ONNX Runtime artifacts of the seq2seq models and cache them on disk"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--models", nargs="*", default=list(ModelManager.MODEL_SPECS),
+            help="Model keys to export (default: all)"
+        )
+        parser.add_argument(
+            "--backends", nargs="*", default=['int8', 'onnx'], choices=['int8', 'onnx'],
+        )
+
+    def handle(self, *args, **options):
+        manager = ModelManager()
+        for key in options["models"]:
+            if key not in manager.MODEL_SPECS:
+                raise CommandError(f"Unknown model: {key}")
+            for backend in options["backends"]:
+                self.stdout.write(f"Exporting {key} ({backend})...")
+                path = manager.export(key, backend)
+                self.stdout.write(self.style.SUCCESS(f"  -> {path}"))
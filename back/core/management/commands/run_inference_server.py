@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from chat.services.inference_server import serve
+from chat.services.model import ModelManager
+
+
+class Command(BaseCommand):
+    help = "Run the shared inference server that owns the title/summary models"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8501)
+        parser.add_argument(
+            "--preload", nargs="*", default=None,
+            help="Models to load before accepting requests (defaults to ML_MODELS_PRELOAD)"
+        )
+
+    def handle(self, *args, **options):
+        ModelManager().preload(options["preload"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Inference server listening on http://{options['host']}:{options['port']}"
+        ))
+        serve(options["host"], options["port"])
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_generationcacheentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='title_status',
+            field=models.CharField(choices=[('provisional', 'provisional'), ('generated', 'generated'), ('failed', 'failed')], default='generated', max_length=20),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_conversation_title_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversationline',
+            name='client_message_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='conversationline',
+            constraint=models.UniqueConstraint(condition=models.Q(('client_message_id__isnull', False)), fields=('conversation', 'client_message_id', 'sent_by'), name='unique_client_message_id'),
+        ),
+    ]
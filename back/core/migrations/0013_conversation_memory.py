@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_conversationline_client_message_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='memory_line_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='memory_summary',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_translationmemoryentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversationline',
+            name='translation_status',
+            field=models.CharField(choices=[('pending', 'pending'), ('done', 'done'), ('failed', 'failed')], default='done', max_length=10),
+        ),
+    ]
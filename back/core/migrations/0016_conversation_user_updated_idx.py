@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_conversationline_translation_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['user', '-updated_at', '-id'], name='conversation_user_updated_idx'),
+        ),
+    ]
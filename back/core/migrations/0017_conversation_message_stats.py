@@ -0,0 +1,75 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:30
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def make_snippet(text, length=200):
+    # Conversation.make_snippet as of this migration
+    text = " ".join((text or "").split())
+    return text if len(text) <= length else text[:length - 1] + "…"
+
+
+def backfill_stats(apps, schema_editor):
+    Conversation = apps.get_model('core', 'Conversation')
+    ConversationLine = apps.get_model('core', 'ConversationLine')
+    lines = ConversationLine.objects.filter(conversation=OuterRef('pk'))
+    message_count = lines.order_by().values('conversation').annotate(count=Count('id')).values('count')
+    last_line = lines.order_by('-created_at', '-id')
+
+    last_id = 0
+    while True:
+        ids = list(Conversation.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:500])
+        if not ids:
+            break
+        Conversation.objects.filter(id__in=ids).update(
+            message_count=Coalesce(Subquery(message_count), 0),
+            last_message_at=Coalesce(Subquery(last_line.values('created_at')[:1]), F('created_at')),
+        )
+        snippets = dict.fromkeys(ids, "")
+        last_lines = ConversationLine.objects.filter(conversation_id__in=ids).order_by(
+            'conversation_id', '-created_at', '-id'
+        ).distinct('conversation_id').values_list('conversation_id', 'language_id', 'text_en', 'text_ar')
+        for conversation_id, language_id, text_en, text_ar in last_lines:
+            snippets[conversation_id] = make_snippet(text_ar if language_id == 'ar' else text_en)
+        Conversation.objects.bulk_update(
+            [Conversation(id=id, last_message_snippet=snippet) for id, snippet in snippets.items()],
+            ['last_message_snippet'],
+        )
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_conversation_user_updated_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='conversation',
+            name='conversation_user_updated_idx',
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_snippet',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='message_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['user', '-last_message_at', '-id'], name='conversation_user_last_msg_idx'),
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
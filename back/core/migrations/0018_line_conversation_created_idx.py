@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_conversation_message_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='conversationline',
+            index=models.Index(fields=['conversation', 'created_at', 'id'], name='line_conversation_created_idx'),
+        ),
+    ]
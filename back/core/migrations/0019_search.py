@@ -0,0 +1,54 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:36
+
+import core.utils.search
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# Alef with hamza/madda/wasla -> alef, alef maqsura -> yaa, taa marbuta -> haa;
+# tashkeel (U+064B..U+0652) and tatweel (U+0640) are removed
+NORMALIZE_ARABIC_SQL = """
+CREATE OR REPLACE FUNCTION normalize_arabic(value text) RETURNS text
+LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+AS $$
+    SELECT regexp_replace(
+        translate(value, '\u0623\u0625\u0622\u0671\u0649\u0629', '\u0627\u0627\u0627\u0627\u064a\u0647'),
+        '[\\u064B-\\u0652\\u0640]', '', 'g'
+    )
+$$;
+"""
+
+SEARCH_VECTORS_SQL = """
+ALTER TABLE core_conversationline
+    ADD COLUMN search_en tsvector
+        GENERATED ALWAYS AS (to_tsvector('english'::regconfig, coalesce(text_en, ''))) STORED,
+    ADD COLUMN search_ar tsvector
+        GENERATED ALWAYS AS (to_tsvector('arabic'::regconfig, normalize_arabic(coalesce(text_ar, '')))) STORED;
+CREATE INDEX line_search_en_idx ON core_conversationline USING gin (search_en);
+CREATE INDEX line_search_ar_idx ON core_conversationline USING gin (search_ar);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_line_conversation_created_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunSQL(NORMALIZE_ARABIC_SQL, reverse_sql="DROP FUNCTION IF EXISTS normalize_arabic(text);"),
+        migrations.RunSQL(
+            SEARCH_VECTORS_SQL,
+            reverse_sql="ALTER TABLE core_conversationline DROP COLUMN IF EXISTS search_en, DROP COLUMN IF EXISTS search_ar;",
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('title_en', name='gin_trgm_ops'), name='conversation_title_en_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(core.utils.search.NormalizeArabic('title_ar'), name='gin_trgm_ops'), name='conversation_title_ar_trgm'),
+        ),
+    ]
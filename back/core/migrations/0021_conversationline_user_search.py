@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import BtreeGinExtension
+from django.db import migrations, models
+
+
+BACKFILL_USER_SQL = """
+UPDATE core_conversationline AS line
+SET user_id = conversation.user_id
+FROM core_conversation AS conversation
+WHERE line.conversation_id = conversation.id;
+"""
+
+# user_id leads the GIN indexes (btree_gin), so a search only reads the
+# posting lists of the user's own lines
+USER_SEARCH_INDEXES_SQL = """
+DROP INDEX IF EXISTS line_search_en_idx;
+DROP INDEX IF EXISTS line_search_ar_idx;
+CREATE INDEX line_user_search_en_idx ON core_conversationline USING gin (user_id, search_en);
+CREATE INDEX line_user_search_ar_idx ON core_conversationline USING gin (user_id, search_ar);
+"""
+
+SEARCH_INDEXES_SQL = """
+DROP INDEX IF EXISTS line_user_search_en_idx;
+DROP INDEX IF EXISTS line_user_search_ar_idx;
+CREATE INDEX line_search_en_idx ON core_conversationline USING gin (search_en);
+CREATE INDEX line_search_ar_idx ON core_conversationline USING gin (search_ar);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_conversation_content_version'),
+    ]
+
+    operations = [
+        BtreeGinExtension(),
+        migrations.AddField(
+            model_name='conversationline',
+            name='user',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='conversation_lines', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunSQL(BACKFILL_USER_SQL, reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(USER_SEARCH_INDEXES_SQL, reverse_sql=SEARCH_INDEXES_SQL),
+    ]
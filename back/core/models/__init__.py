@@ -2,4 +2,6 @@ from .user import User
 from .language import Language
 from .conversation import Conversation
 from .conversation_line import ConversationLine
-from .conversation_analysis import ConversationAnalysis
\ No newline at end of file
+from .conversation_analysis import ConversationAnalysis
+from .generation_cache import GenerationCacheEntry
+from .translation_memory import TranslationMemoryEntry
@@ -1,6 +1,10 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.utils import timezone
+from core.enums.enums import TitleStatusEnum
 from core.models.language import Language
 from core.models.user import User
+from core.utils.search import NormalizeArabic
 from .base import TimestampedModel
 
 class Conversation(TimestampedModel):
@@ -14,6 +18,36 @@ class Conversation(TimestampedModel):
     )
     title_ar = models.CharField(max_length=100,default= "")
     title_en = models.CharField(max_length=100,default= "")
+    title_status = models.CharField(
+        max_length=20,
+        choices=[(tag.value, tag.value) for tag in TitleStatusEnum],
+        default=TitleStatusEnum.GENERATED.value
+    )
+    # Rolling summary of the lines up to memory_line_id (older than the context window)
+    memory_summary = models.TextField(blank=True, default="")
+    memory_line_id = models.BigIntegerField(null=True, blank=True)
+
+    # Maintained when lines are written (ChatTurnService.persist), so the
+    # conversation list needs no join or aggregate over the lines
+    message_count = models.PositiveIntegerField(default=0)
+    last_message_at = models.DateTimeField(default=timezone.now)
+    last_message_snippet = models.CharField(max_length=200, blank=True, default="")
+    # Bumped whenever lines are added or translated (ETag of the messages)
+    content_version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Conversation list: user's conversations by (last_message_at, id), newest first
+            models.Index(fields=['user', '-last_message_at', '-id'], name='conversation_user_last_msg_idx'),
+            # Title search (pg_trgm word similarity), Arabic titles normalized
+            GinIndex(OpClass('title_en', name='gin_trgm_ops'), name='conversation_title_en_trgm'),
+            GinIndex(OpClass(NormalizeArabic('title_ar'), name='gin_trgm_ops'), name='conversation_title_ar_trgm'),
+        ]
+
+    @staticmethod
+    def make_snippet(text: str, length: int = 200) -> str:
+        text = " ".join((text or "").split())
+        return text if len(text) <= length else text[:length - 1] + "…"
 
 
     def __str__(self):
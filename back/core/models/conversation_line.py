@@ -1,9 +1,11 @@
 from django.db import models
 from django.db.models import Q
 from django.core.validators import MinLengthValidator
-from core.enums.enums import ModelUsedEnum, SentByEnum
+from django.utils.html import linebreaks
+from core.enums.enums import ModelUsedEnum, SentByEnum, TranslationStatusEnum
 from core.models.conversation import Conversation
 from core.models.language import Language
+from core.models.user import User
 from .base import TimestampedModel
 
 
@@ -34,6 +36,17 @@ class ConversationLine(TimestampedModel):
         on_delete=models.SET_NULL,
         related_name="lines"
     )
+
+    # Owner of the conversation, denormalized so the search indexes can be
+    # scoped to one user (GIN on (user_id, search_*), migration 0021)
+    user = models.ForeignKey(
+        User,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="conversation_lines",
+        db_index=False
+    )
     
     
     language = models.ForeignKey(
@@ -57,6 +70,18 @@ class ConversationLine(TimestampedModel):
         choices=[(tag.value, tag.value) for tag in SentByEnum],
         default=SentByEnum.USER.value
     )
+
+    # Idempotency key sent by the client with a chat message; retries of the
+    # same message return the stored turn instead of writing it twice
+    client_message_id = models.CharField(max_length=64, null=True, blank=True)
+
+    # Whether the opposite-language text_*/text_html_* fields are filled
+    # (translations are deferred when CHAT_TRANSLATION_MODE is not "eager")
+    translation_status = models.CharField(
+        max_length=10,
+        choices=[(tag.value, tag.value) for tag in TranslationStatusEnum],
+        default=TranslationStatusEnum.DONE.value
+    )
     class Meta:
         constraints = [
             models.CheckConstraint(
@@ -66,11 +91,33 @@ class ConversationLine(TimestampedModel):
             models.CheckConstraint(
                 check=Q(sent_by__in=[tag.value for tag in SentByEnum]),
                 name="check_sent_by_enum"
+            ),
+            models.UniqueConstraint(
+                fields=["conversation", "client_message_id", "sent_by"],
+                condition=Q(client_message_id__isnull=False),
+                name="unique_client_message_id"
             )
         ]
+        indexes = [
+            # Message history pages (keyset on created_at, id within a conversation)
+            models.Index(fields=["conversation", "created_at", "id"], name="line_conversation_created_idx"),
+        ]
+        # The search_en/search_ar tsvector columns and their GIN indexes are
+        # generated by Postgres (migrations 0019 and 0021) and deliberately not
+        # model fields, so regular reads never load them; see chat.services.search.
 
     def __str__(self):
         return f"{self.get_text('en')[:50]}... ({self.language.language_code if self.language else 'unknown'})"
 
     def get_text(self, lang_code: str = 'en'):
-        return getattr(self, f"text_{lang_code}", self.text_en)
\ No newline at end of file
+        """Text in ``lang_code``, or in the original language while it is not translated."""
+        if self.translation_status != TranslationStatusEnum.DONE.value and self.language_id:
+            lang_code = self.language_id
+        return getattr(self, f"text_{lang_code}", self.text_en)
+
+    def get_text_html(self, lang_code: str = 'en'):
+        if self.translation_status != TranslationStatusEnum.DONE.value and self.language_id:
+            lang_code = self.language_id
+        html = getattr(self, f"text_html_{lang_code}", "")
+        # Only the original language had its HTML stored before lazy translation
+        return html if html.strip() else linebreaks(self.get_text(lang_code))
\ No newline at end of file
@@ -0,0 +1,12 @@
+from django.db import models
+from .base import TimestampedModel
+
+
+class GenerationCacheEntry(TimestampedModel):
+    """Generated title/summary, keyed by hash(model id, decode params, normalized input)"""
+    key = models.CharField(max_length=64, unique=True)
+    model_id = models.CharField(max_length=150)
+    output = models.TextField()
+
+    def __str__(self):
+        return f"{self.model_id} {self.key[:12]}"
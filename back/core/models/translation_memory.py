@@ -0,0 +1,13 @@
+from django.db import models
+from .base import TimestampedModel
+
+
+class TranslationMemoryEntry(TimestampedModel):
+    """DeepL translation, keyed by hash(source lang, target lang, normalized text)"""
+    key = models.CharField(max_length=64, unique=True)
+    source_lang = models.CharField(max_length=10)
+    target_lang = models.CharField(max_length=10)
+    translation = models.TextField()
+
+    def __str__(self):
+        return f"{self.source_lang}->{self.target_lang} {self.key[:12]}"
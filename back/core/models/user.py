@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.contrib.auth.base_user import BaseUserManager
 from django.db import models
+from django.db.models import Case, F, Value, When
 from .base import TimestampedModel
 from .language import Language
 
@@ -53,7 +54,17 @@ class User(AbstractBaseUser, PermissionsMixin, TimestampedModel):
         return self.email
     
     def increment_conversations_count(self):
-        self.conversations_count += 1
-        if self.conversations_count >= self.conversations_quota:
-            self.last_summary_generated = False
-        self.save()
+        """
+        Count one more conversation turn in a single UPDATE, so concurrent
+        turns are all counted and no other field of the row is overwritten.
+        Reaching the quota clears last_summary_generated.
+        """
+        type(self).objects.filter(pk=self.pk).update(
+            conversations_count=F('conversations_count') + 1,
+            # Right-hand sides see the row before the update
+            last_summary_generated=Case(
+                When(conversations_count__gte=F('conversations_quota') - 1, then=Value(False)),
+                default=F('last_summary_generated'),
+            ),
+        )
+        self.refresh_from_db(fields=['conversations_count', 'last_summary_generated'])
@@ -0,0 +1,168 @@
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Conversation, ConversationLine, Language, User
+
+from core.utils.segmenter import reassemble, segment
+from core.utils.translate_text import translate_texts
+from core.utils.translation_backends import TranslationBackend
+from core.utils.translation_memory import TranslationMemory
+
+
+class TranslationMemoryKeyTests(SimpleTestCase):
+    def test_line_structure_is_part_of_the_key(self):
+        self.assertNotEqual(
+            TranslationMemory.make_key("en", "ar", "First point\nSecond point"),
+            TranslationMemory.make_key("en", "ar", "First point Second point"),
+        )
+        self.assertNotEqual(
+            TranslationMemory.make_key("en", "ar", "Paragraph one.\n\nParagraph two."),
+            TranslationMemory.make_key("en", "ar", "Paragraph one.\nParagraph two."),
+        )
+
+    def test_unicode_form_and_trailing_whitespace_are_ignored(self):
+        self.assertEqual(
+            TranslationMemory.make_key("en", "ar", "Café menu  \nNext line\n"),
+            TranslationMemory.make_key("en", "ar", "Café menu\nNext line"),
+        )
+
+
+@override_settings(TRANSLATION_MEMORY_ENABLED=True)
+class TranslationMemoryTests(TestCase):
+    def test_stored_translation_keeps_its_line_breaks(self):
+        memory = TranslationMemory()
+        memory.set("en", "ar", "Hello\nWorld", "مرحبا\nيا عالم")
+
+        self.assertEqual(memory.get("en", "ar", "Hello\nWorld"), "مرحبا\nيا عالم")
+        self.assertIsNone(memory.get("en", "ar", "Hello World"))
+
+
+class TranslationBackendTests(SimpleTestCase):
+    def test_backend_must_implement_translate(self):
+        class Incomplete(TranslationBackend):
+            name = 'incomplete'
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+
+class SegmenterTests(SimpleTestCase):
+    def sentences(self, text):
+        return [item.text for item in segment(text) if item.translatable]
+
+    def test_url_stays_inside_its_sentence(self):
+        segments = segment("See https://example.com/docs?page=2 it works! Then reload.")
+
+        self.assertEqual(self.sentences("See https://example.com/docs?page=2 it works! Then reload."),
+                         ["See [1] it works!", "Then reload."])
+        self.assertEqual(
+            reassemble(segments, {"See [1] it works!": "انظر [1] إنه يعمل!", "Then reload.": "ثم أعد التحميل."}),
+            "انظر https://example.com/docs?page=2 إنه يعمل! ثم أعد التحميل.",
+        )
+
+    def test_inline_code_and_existing_brackets_are_kept(self):
+        segments = segment("Call `run()` as in [1].")
+
+        self.assertEqual(self.sentences("Call `run()` as in [1]."), ["Call [2] as in [1]."])
+        self.assertEqual(reassemble(segments, {"Call [2] as in [1].": "استدع [2] كما في [1]."}),
+                         "استدع `run()` كما في [1].")
+
+    def test_dropped_placeholder_is_appended(self):
+        segments = segment("Open www.example.com now.")
+
+        self.assertEqual(reassemble(segments, {"Open [1] now.": "افتح الآن."}), "افتح الآن. www.example.com")
+
+    def test_abbreviations_do_not_end_sentences(self):
+        self.assertEqual(
+            self.sentences("Dr. Smith met J. Doe, e.g. at noon. They left."),
+            ["Dr. Smith met J. Doe, e.g. at noon.", "They left."],
+        )
+
+    def test_code_blocks_and_line_breaks_are_not_translated(self):
+        text = "Run this:\n```\nls -la. Then\n```\nDone."
+        segments = segment(text)
+
+        self.assertEqual(self.sentences(text), ["Run this:", "Done."])
+        self.assertEqual(reassemble(segments, {"Run this:": "Run this:", "Done.": "Done."}), text)
+
+
+class BackfillConversationStatsTests(TestCase):
+    def setUp(self):
+        Language.objects.create(language_code="en", language_name="English")
+        Language.objects.create(language_code="ar", language_name="Arabic")
+        user = User.objects.create_user("user@example.com", "password")
+        self.conversation = Conversation.objects.create(user=user, title_en="Stats")
+        self.empty = Conversation.objects.create(user=user, title_en="Empty", last_message_snippet="stale")
+        ConversationLine.objects.create(conversation=self.conversation, language_id="en", text_en="First")
+        self.last = ConversationLine.objects.create(
+            conversation=self.conversation, language_id="ar", text_en="Last", text_ar="  سطر\n\nأخير  " + "ن" * 300
+        )
+
+    def assert_backfilled(self):
+        conversation = Conversation.objects.get(id=self.conversation.id)
+        self.assertEqual(conversation.message_count, 2)
+        self.assertEqual(conversation.last_message_at, self.last.created_at)
+        self.assertEqual(conversation.last_message_snippet, Conversation.make_snippet(self.last.text_ar))
+        self.assertTrue(conversation.last_message_snippet.startswith("سطر أخير "))
+        self.assertTrue(conversation.last_message_snippet.endswith("…"))
+        empty = Conversation.objects.get(id=self.empty.id)
+        self.assertEqual((empty.message_count, empty.last_message_at, empty.last_message_snippet),
+                         (0, empty.created_at, ""))
+
+    def test_command_recomputes_the_stats(self):
+        call_command("backfill_conversation_stats", batch_size=1, stdout=StringIO())
+
+        self.assert_backfilled()
+
+    def test_migration_recomputes_the_stats(self):
+        migration = import_module("core.migrations.0017_conversation_message_stats")
+
+        migration.backfill_stats(apps, None)
+
+        self.assert_backfilled()
+
+
+@override_settings(TRANSLATION_MEMORY_ENABLED=True, TRANSLATION_SEGMENTATION_ENABLED=True, TRANSLATION_SEGMENT_MIN_CHARS=40)
+class TranslateTextsTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch(
+            "core.utils.translate_text.translate_batch",
+            side_effect=lambda texts, source, target: [f"AR({text})" for text in texts],
+        )
+        self.translate_batch = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_texts_share_one_request_and_repeats_hit_the_memory(self):
+        self.assertEqual(
+            translate_texts(["Question one", "Answer one"], "en", "ar"),
+            ["AR(Question one)", "AR(Answer one)"],
+        )
+        self.assertEqual(translate_texts(["Answer one"], "en", "ar"), ["AR(Answer one)"])
+
+        self.translate_batch.assert_called_once_with(["Question one", "Answer one"], "en", "ar")
+
+    def test_long_text_sends_each_sentence_once_without_its_url(self):
+        text = "Read https://example.com/guide first. Then try again. Then try again."
+
+        translation = translate_texts([text], "en", "ar")[0]
+
+        self.translate_batch.assert_called_once_with(["Read [1] first.", "Then try again."], "en", "ar")
+        self.assertEqual(
+            translation, "AR(Read https://example.com/guide first.) AR(Then try again.) AR(Then try again.)"
+        )
+
+    def test_memory_costs_the_same_queries_however_many_sentences(self):
+        def queries(sentences):
+            text = " ".join(f"Sentence number {sentences} {i} is here." for i in range(sentences))
+            with CaptureQueriesContext(connection) as context:
+                translate_texts([text], "en", "ar")
+            return len(context.captured_queries)
+
+        self.assertEqual(queries(3), queries(12))
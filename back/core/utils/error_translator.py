@@ -11,6 +11,10 @@ ERROR_MESSAGES = {
         "en": "Conversations retrieved successfully.",
         "ar": "تم استرجاع المحادثة بنجاح."
     },
+    "SEARCH_RESULTS_RETURNED": {
+        "en": "Search results retrieved successfully.",
+        "ar": "تم استرجاع نتائج البحث بنجاح."
+    },
     "AUTHENTICATION_ERROR": {
         "en": "Authentication failed. Please log in again.",
         "ar": "فشل التحقق من الهوية. الرجاء تسجيل الدخول مرة أخرى."
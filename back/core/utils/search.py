@@ -0,0 +1,12 @@
+from django.db.models import Func, TextField
+
+
+class NormalizeArabic(Func):
+    """
+    ``normalize_arabic(text)`` SQL function (migration 0019): folds the alef,
+    alef maqsura and taa marbuta variants and strips diacritics and tatweel,
+    so Arabic text matches however it was typed. Used by the title trigram
+    index, the ``search_ar`` vector of the lines and the queries against them.
+    """
+    function = 'normalize_arabic'
+    output_field = TextField()
@@ -0,0 +1,109 @@
+import re
+from typing import List, NamedTuple, Tuple
+
+# Never translated: fenced code blocks are segments of their own; inline code
+# and URLs stay inside their sentence behind a placeholder, so the sentence is
+# still translated in one piece
+_CODE_BLOCK = re.compile(r"```.*?```", re.S)
+_INLINE = re.compile(
+    r"`[^`\n]+`"
+    r"|(?:https?://|www\.)[^\s<>()\[\]]*[^\s<>()\[\].,;:!?'\"،]"
+)
+# Sentence boundaries: whitespace after a sentence-final mark (not a list
+# number such as "1."), or line breaks
+_BOUNDARY = re.compile(r"(?<=[^\d\s][.!?؟…])[ \t]+|\s*\n\s*")
+# A period that ends an abbreviation or an initial does not end the sentence
+_ABBREVIATION = re.compile(
+    r"(?:^|[\s(])(?:(?i:dr|mr|mrs|ms|prof|sr|jr|st|vs|etc|no|fig|approx|e\.g|i\.e|cf)|[A-Z])\.$"
+)
+_LETTER = re.compile(r"[^\W\d_]")
+
+
+class Segment(NamedTuple):
+    text: str
+    translatable: bool
+    # (placeholder, original) pairs of the inline code and URLs of the text
+    protected: Tuple[Tuple[str, str], ...] = ()
+
+
+def segment(text: str) -> List[Segment]:
+    """
+    Split ``text`` into segments whose concatenation is ``text`` (once
+    reassembled): sentences are translatable; code blocks, line breaks, the
+    whitespace between sentences and pieces without letters are not. Inline
+    code and URLs are replaced by placeholders inside their sentence.
+    """
+    segments = []
+    position = 0
+    for match in _CODE_BLOCK.finditer(text):
+        _split_sentences(text[position:match.start()], segments)
+        segments.append(Segment(match.group(), False))
+        position = match.end()
+    _split_sentences(text[position:], segments)
+    return segments
+
+
+def reassemble(segments: List[Segment], translations: dict) -> str:
+    """Join the segments, replacing the translatable ones by ``translations[text]``."""
+    return "".join(
+        restore(translations[item.text], item.protected) if item.translatable else item.text
+        for item in segments
+    )
+
+
+def restore(translation: str, protected: Tuple[Tuple[str, str], ...]) -> str:
+    """Put the originals back in place of their placeholders; lost placeholders are appended."""
+    for placeholder, original in protected:
+        if placeholder in translation:
+            translation = translation.replace(placeholder, original, 1)
+        else:
+            translation = f"{translation} {original}"
+    return translation
+
+
+def _split_sentences(text: str, segments: List[Segment]):
+    inline = [match.span() for match in _INLINE.finditer(text)]
+    position = 0
+    for match in _BOUNDARY.finditer(text):
+        if any(start < match.start() < end for start, end in inline):
+            continue
+        if match.group().strip(" \t") == "" and _ABBREVIATION.search(text[position:match.start()]):
+            continue
+        _add(text[position:match.start()], segments)
+        if match.group():
+            segments.append(Segment(match.group(), False))
+        position = match.end()
+    _add(text[position:], segments)
+
+
+def _add(piece: str, segments: List[Segment]):
+    if not piece:
+        return
+    stripped = piece.strip()
+    masked, protected = _protect(stripped)
+    if not _LETTER.search(masked):
+        segments.append(Segment(piece, False))
+        return
+    leading = piece[:len(piece) - len(piece.lstrip())]
+    trailing = piece[len(piece.rstrip()):]
+    if leading:
+        segments.append(Segment(leading, False))
+    segments.append(Segment(masked, True, protected))
+    if trailing:
+        segments.append(Segment(trailing, False))
+
+
+def _protect(sentence: str) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    """Replace inline code and URLs by numbered placeholders ([1], [2]...) not already in ``sentence``."""
+    protected = []
+    number = 0
+
+    def placeholder(match):
+        nonlocal number
+        number += 1
+        while f"[{number}]" in sentence:
+            number += 1
+        protected.append((f"[{number}]", match.group()))
+        return f"[{number}]"
+
+    return _INLINE.sub(placeholder, sentence), tuple(protected)
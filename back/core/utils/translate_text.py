@@ -1,37 +1,88 @@
 
 
 #translator for the app generated content my models
-from decouple import config
-import requests
+from typing import List
+from django.conf import settings
+from core.utils.segmenter import Segment, reassemble, segment
+from core.utils.translation_backends import translate_batch
+from core.utils.translation_memory import TranslationMemory
 
-DEEPL_API_KEY = config('DEEPL_API_KEY')
-DEEPL_URL = "https://api-free.deepl.com/v2/translate" 
-#this api is limited to 500,000 characters per month for free plan
 def translate_text(text: str, source_lang: str,target_lang: str) -> str:
     """
-    Translate text using DeepL REST API.
+    Translate text through the translation memory and the translation
+    backends (DeepL and/or the local model, see translation_backends).
+    Returns the text unchanged if the translation fails.
     
     Args:
         text: the text to translate
         target_lang: target language code (e.g., 'EN', 'AR')
         source_lang: source language code (optional)
     """
-    data = {
-        "auth_key": DEEPL_API_KEY,
-        "text": text,
-        "target_lang": target_lang.upper()
+    return translate_texts([text], source_lang, target_lang)[0]
+
+
+def translate_texts(texts: List[str], source_lang: str, target_lang: str, fallback: bool = True) -> List[str]:
+    """
+    Translate several texts with one request per backend (texts found in
+    the translation memory are not sent). Long texts are translated sentence
+    by sentence, so repeated sentences hit the memory and code blocks and URLs
+    are never sent. Same order as ``texts``; if the translation fails the
+    texts are returned unchanged, or the error is raised when ``fallback`` is False.
+    """
+    results = list(texts)
+    memory = TranslationMemory()
+
+    # One memory query for the whole texts, one for their sentences, one insert
+    texts_to_look_up = {text for text in texts if text and text.strip()}
+    cached = memory.get_many(source_lang, target_lang, texts_to_look_up) if memory.enabled else {}
+    missing = {}  # text -> indexes, duplicates are sent once
+    for index, text in enumerate(texts):
+        if text not in texts_to_look_up:
+            continue
+        if text in cached:
+            results[index] = cached[text]
+        else:
+            missing.setdefault(text, []).append(index)
+
+    if not missing:
+        return results
+
+    segmented = {
+        text: segment(text) if _should_segment(text) else [Segment(text, True)]
+        for text in missing
     }
-    if source_lang:
-        data["source_lang"] = source_lang.upper()
-    
+    pieces = list(dict.fromkeys(
+        piece for segments in segmented.values() for piece, translatable, _ in segments if translatable
+    ))
+    # Whole texts were already looked up above
+    translated = memory.get_many(
+        source_lang, target_lang, [piece for piece in pieces if piece not in missing]
+    ) if memory.enabled else {}  # segment -> translation
+    to_translate = [piece for piece in pieces if piece not in translated]
+
     try:
-        response = requests.post(DEEPL_URL, data=data, timeout=15)
-        response.raise_for_status()
-        result = response.json()
-        return result["translations"][0]["text"]
+        translations = translate_batch(to_translate, source_lang, target_lang) if to_translate else []
     except Exception as e:
-        return text
+        if not fallback:
+            raise
+        return results
+
+    new_entries = dict(zip(to_translate, translations))
+    translated.update(new_entries)
+
+    for text, indexes in missing.items():
+        translation = reassemble(segmented[text], translated)
+        for index in indexes:
+            results[index] = translation
+        if len(segmented[text]) > 1:
+            new_entries[text] = translation
+    if memory.enabled:
+        memory.set_many(source_lang, target_lang, new_entries)
+    return results
+
 
+def _should_segment(text: str) -> bool:
+    return settings.TRANSLATION_SEGMENTATION_ENABLED and len(text) >= settings.TRANSLATION_SEGMENT_MIN_CHARS
 
 
 
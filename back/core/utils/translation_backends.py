@@ -0,0 +1,132 @@
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Dict, List
+from decouple import config
+from django.conf import settings
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEEPL_API_KEY = config('DEEPL_API_KEY')
+DEEPL_URL = "https://api-free.deepl.com/v2/translate"
+
+# Shared session: keep-alive connections to DeepL are reused across requests
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=10))
+
+
+class TranslationError(Exception):
+    """Every backend selected for a text failed to translate it."""
+
+
+class TranslationBackend(ABC):
+    """Translates a batch of texts; raises on failure."""
+    name = None
+
+    @abstractmethod
+    def translate(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        """One translation per text of ``texts``, in order."""
+
+
+class DeepLBackend(TranslationBackend):
+    #this api is limited to 500,000 characters per month for free plan
+    name = 'deepl'
+
+    def translate(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        """One DeepL request for all ``texts`` (repeated ``text`` fields)."""
+        data = [("auth_key", DEEPL_API_KEY), ("target_lang", target_lang.upper())]
+        data += [("text", text) for text in texts]
+        if source_lang:
+            data.append(("source_lang", source_lang.upper()))
+
+        response = _session.post(DEEPL_URL, data=data, timeout=15)
+        response.raise_for_status()
+        result = response.json()
+        return [translation["text"] for translation in result["translations"]]
+
+
+class LocalMarianBackend(TranslationBackend):
+    """MarianMT (Helsinki-NLP opus-mt) models on CPU, loaded through ModelManager."""
+    name = 'local'
+    MODELS = {('en', 'ar'): 'mt_en_ar', ('ar', 'en'): 'mt_ar_en'}
+
+    def translate(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        key = self.MODELS.get(((source_lang or '').lower(), target_lang.lower()))
+        if key is None:
+            raise ValueError(f"No local model for {source_lang} -> {target_lang}")
+        # Imported here: torch is only needed when the local backend is used
+        from chat.services.model import generate_texts
+        return generate_texts(key, texts, num_beams=settings.TRANSLATION_LOCAL_NUM_BEAMS, max_length=512)
+
+
+BACKENDS: Dict[str, TranslationBackend] = {
+    backend.name: backend for backend in (DeepLBackend(), LocalMarianBackend())
+}
+
+_counters = defaultdict(lambda: {'requests': 0, 'texts': 0, 'chars': 0, 'failures': 0})
+_counters_lock = threading.Lock()
+
+
+def backends_for(text: str) -> List[TranslationBackend]:
+    """
+    Backends to try for ``text``, in order: TRANSLATION_BACKENDS, except that
+    texts up to TRANSLATION_LOCAL_MAX_CHARS go to the local backend first.
+    """
+    names = list(settings.TRANSLATION_BACKENDS)
+    if 'local' in names and len(text) <= settings.TRANSLATION_LOCAL_MAX_CHARS:
+        names.remove('local')
+        names.insert(0, 'local')
+    return [BACKENDS[name] for name in names]
+
+
+def translate_batch(texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+    """
+    Translate ``texts`` with one call per selected backend, falling back to the
+    next backend for the texts a backend failed on. Raises TranslationError.
+    """
+    results = [None] * len(texts)
+    pending = defaultdict(list)  # backend chain -> indexes
+    for index, text in enumerate(texts):
+        pending[tuple(backend.name for backend in backends_for(text))].append(index)
+
+    while pending:
+        chain, indexes = pending.popitem()
+        if not chain:
+            raise TranslationError(f"No translation backend left for {len(indexes)} texts")
+        backend = BACKENDS[chain[0]]
+        batch = [texts[index] for index in indexes]
+        try:
+            translations = backend.translate(batch, source_lang, target_lang)
+            if len(translations) != len(batch):
+                raise TranslationError(f"{backend.name} returned {len(translations)} of {len(batch)} texts")
+        except Exception as e:
+            logger.warning("Translation backend %s failed: %s", backend.name, e)
+            _count(backend.name, batch, failed=True)
+            if len(chain) == 1:
+                raise TranslationError(str(e)) from e
+            pending[chain[1:]].extend(indexes)
+            continue
+
+        _count(backend.name, batch)
+        for index, translation in zip(indexes, translations):
+            results[index] = translation
+    return results
+
+
+def stats() -> Dict:
+    with _counters_lock:
+        return {name: dict(value) for name, value in _counters.items()}
+
+
+def _count(name: str, texts: List[str], failed: bool = False):
+    with _counters_lock:
+        counters = _counters[name]
+        counters['requests'] += 1
+        if failed:
+            counters['failures'] += 1
+        else:
+            counters['texts'] += len(texts)
+            counters['chars'] += sum(len(text) for text in texts)
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import logging
+import threading
+import unicodedata
+from typing import Dict, Iterable, Optional
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from core.models.translation_memory import TranslationMemoryEntry
+from core.utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationMemory:
+    """
+    Cache of DeepL translations keyed by (source lang, target lang, normalized
+    text hash): an in-process LRU in front of the database, so repeated texts
+    cost no request and no DeepL character quota. Only successful
+    translations are stored.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._lru = LRUCache(getattr(settings, 'TRANSLATION_MEMORY_LRU_SIZE', 4096))
+                    instance._counters = {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'chars_saved': 0}
+                    instance._counters_lock = threading.Lock()
+                    cls._instance = instance
+        return cls._instance
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(settings, 'TRANSLATION_MEMORY_ENABLED', True)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        NFC, without trailing whitespace on each line or blank lines around the
+        text. Line breaks are kept: texts that differ in paragraph or markdown
+        layout are translated separately.
+        """
+        lines = unicodedata.normalize('NFC', text).splitlines()
+        return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+    @classmethod
+    def make_key(cls, source_lang: str, target_lang: str, text: str) -> str:
+        payload = json.dumps(
+            [(source_lang or '').lower(), target_lang.lower(), cls.normalize(text)],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, source_lang: str, target_lang: str, text: str) -> Optional[str]:
+        return self.get_many(source_lang, target_lang, [text]).get(text)
+
+    def get_many(self, source_lang: str, target_lang: str, texts: Iterable[str]) -> Dict[str, str]:
+        """Stored translations of ``texts`` (text -> translation, found ones only), in one query."""
+        found = {}
+        missing = {}  # key -> texts
+        for text in texts:
+            key = self.make_key(source_lang, target_lang, text)
+            translation = self._lru.get(key)
+            if translation is not None:
+                found[text] = translation
+                self._count('memory_hits', len(text))
+            else:
+                missing.setdefault(key, []).append(text)
+
+        if missing:
+            try:
+                stored = dict(
+                    TranslationMemoryEntry.objects.filter(key__in=list(missing)).values_list('key', 'translation')
+                )
+            except DatabaseError as e:
+                logger.warning("Translation memory lookup failed: %s", e)
+                stored = {}
+            for key, key_texts in missing.items():
+                translation = stored.get(key)
+                for text in key_texts:
+                    if translation is None:
+                        self._count('misses')
+                        continue
+                    found[text] = translation
+                    self._count('db_hits', len(text))
+                if translation is not None:
+                    self._lru.set(key, translation)
+        return found
+
+    def set(self, source_lang: str, target_lang: str, text: str, translation: str):
+        self.set_many(source_lang, target_lang, {text: translation})
+
+    def set_many(self, source_lang: str, target_lang: str, translations: Dict[str, str]):
+        """Store ``translations`` (text -> translation) in one insert; existing keys are kept."""
+        entries = {}
+        for text, translation in translations.items():
+            key = self.make_key(source_lang, target_lang, text)
+            self._lru.set(key, translation)
+            entries[key] = TranslationMemoryEntry(
+                key=key,
+                source_lang=(source_lang or '').lower(),
+                target_lang=target_lang.lower(),
+                translation=translation,
+            )
+        if not entries:
+            return
+        try:
+            with transaction.atomic():
+                TranslationMemoryEntry.objects.bulk_create(entries.values(), ignore_conflicts=True)
+        except DatabaseError as e:
+            logger.warning("Translation memory write failed: %s", e)
+
+    def stats(self) -> dict:
+        with self._counters_lock:
+            stats = dict(self._counters)
+        lookups = stats['memory_hits'] + stats['db_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['db_hits']) / lookups, 3) if lookups else 0
+        stats['memory_entries'] = len(self._lru)
+        return stats
+
+    def _count(self, name: str, chars: int = 0):
+        with self._counters_lock:
+            self._counters[name] += 1
+            self._counters['chars_saved'] += chars